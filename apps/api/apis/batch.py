@@ -0,0 +1,138 @@
+# Core
+import json
+import logging
+from functools import partial
+from inspect import iscoroutinefunction
+
+# Libs
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+
+from rest_framework.response import Response
+from rest_framework.status import (
+    HTTP_200_OK,
+    HTTP_400_BAD_REQUEST,
+    HTTP_404_NOT_FOUND,
+    HTTP_500_INTERNAL_SERVER_ERROR,
+)
+from rest_framework.decorators import api_view
+
+from drf_spectacular.utils import OpenApiResponse, extend_schema
+
+# Apps
+from apps.api.serializers import batch as srz
+
+# Global
+from common import routers
+from common.concurrency import run_concurrently
+from common.db import QueryRecorder
+from common.decorators import get_query_budget, read_only
+
+logger = logging.getLogger(__name__)
+
+# Headers of the batch request not passed on: sub-responses are neither
+# conditional nor compressed, and have no body.
+_REQUEST_ONLY_META = {
+    "CONTENT_LENGTH",
+    "CONTENT_TYPE",
+    "HTTP_ACCEPT_ENCODING",
+    "HTTP_IF_MODIFIED_SINCE",
+    "HTTP_IF_NONE_MATCH",
+}
+
+
+def _error(status: int, detail: str) -> dict:
+    return {"status": status, "body": {"errors": {"detail": detail}}}
+
+
+def _sub_request(request, path: str, query: str) -> HttpRequest:
+    """Return a GET request of `path`, authenticated as the batch request."""
+    sub = HttpRequest()
+    sub.method = "GET"
+    sub.path = sub.path_info = path
+    sub.META = {
+        key: value
+        for key, value in request.META.items()
+        if key not in _REQUEST_ONLY_META
+    }
+    sub.META.update(REQUEST_METHOD="GET", PATH_INFO=path, QUERY_STRING=query)
+    sub.GET = QueryDict(query)
+    sub.COOKIES = request.COOKIES
+    # Read by DRF views instead of authenticating the request again.
+    sub._force_auth_user = request.user
+    sub._force_auth_token = request.auth
+    return sub
+
+
+def _dispatch(request, path: str, query: str) -> dict:
+    """Run a sub-request through its view and return its status and body."""
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return _error(HTTP_404_NOT_FOUND, f"No endpoint matches `{path}`.")
+    if match.func is batch_requests or iscoroutinefunction(match.func):
+        return _error(HTTP_400_BAD_REQUEST, f"`{path}` cannot be batched.")
+
+    sub = _sub_request(request, path, query)
+    sub.resolver_match = match
+    token = routers.current_request.set(sub)
+    try:
+        with QueryRecorder().record() as queries:
+            response = match.func(sub, *match.args, **match.kwargs)
+    except Exception:
+        logger.exception("Batched request of %s failed.", path)
+        return _error(HTTP_500_INTERNAL_SERVER_ERROR, "Server error.")
+    finally:
+        routers.current_request.reset(token)
+
+    budget = get_query_budget(match.func)
+    if budget is not None and queries.count > budget:
+        logger.warning(
+            "%s ran %d queries in a batch, over its budget of %d.",
+            match.view_name,
+            queries.count,
+            budget,
+        )
+
+    if isinstance(response, Response):
+        body = response.data
+    else:
+        content = response.content.decode(response.charset)
+        is_json = response.get("Content-Type", "").startswith("application/json")
+        body = json.loads(content) if is_json and content else content
+    return {"status": response.status_code, "body": body}
+
+
+@extend_schema(
+    tags=["📦 Batch"],
+    summary="Batch requests",
+    request=srz.BatchSerializer,
+    responses=OpenApiResponse(
+        response=srz.BatchResultInfoSerializer(many=True),
+        description="Results of the sub-requests, in their order.",
+    ),
+)
+@read_only
+@api_view(["POST"])
+def batch_requests(request) -> Response:
+    """
+    Run GET requests of the API at once and return all their results.
+
+    The batch is authenticated once, its user and permissions are reused by
+    every sub-request, which run concurrently. Each result has the status and
+    body the endpoint would return on its own.
+    """
+    payload = srz.BatchSerializer(data=request.data)
+    payload.check_data()
+
+    if request.user.is_authenticated:
+        # Cached on the user, for the permission checks of all sub-requests.
+        request.user.get_all_permissions()
+
+    results = run_concurrently(
+        *(
+            partial(_dispatch, request, item["path"], item["query"])
+            for item in payload.validated_data["requests"]
+        )
+    )
+    return Response(data=results, status=HTTP_200_OK)
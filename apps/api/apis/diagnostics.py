@@ -0,0 +1,160 @@
+# Core
+from functools import partial
+
+# Libs
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
+from rest_framework.status import HTTP_200_OK
+from rest_framework.permissions import IsAdminUser
+from rest_framework.decorators import api_view, permission_classes
+
+from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_schema
+
+# Apps
+from apps.api.serializers import diagnostics as srz
+
+# Global
+from common.db import pool_stats
+from common.decorators import query_budget
+from common.profiling import profiles
+from common import tracing
+
+_diagnostics_api_schema = partial(extend_schema, tags=["🩺 Diagnostics"])
+
+
+# noinspection PyUnusedLocal
+@_diagnostics_api_schema(
+    summary="Database pools",
+    responses=OpenApiResponse(
+        response=srz.PoolStatsInfoSerializer(many=True),
+        description="Connection pool statistics of the serving process.",
+    ),
+)
+@query_budget(1)
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def get_database_pools(request) -> Response:
+    """Return the connection pool statistics of every database."""
+    output = srz.PoolStatsInfoSerializer(
+        [pool_stats(alias) for alias in settings.DATABASES],
+        many=True,
+    )
+    return Response(data=output.data, status=HTTP_200_OK)
+
+
+# noinspection PyUnusedLocal
+@_diagnostics_api_schema(
+    summary="Profiles",
+    operation_id="diagnostics_profiles_list",
+    responses=OpenApiResponse(
+        response=srz.ProfileInfoSerializer(many=True),
+        description="Views profiled by the serving process.",
+    ),
+)
+@query_budget(1)
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def list_profiles(request) -> Response:
+    """Return the views profiled, with their requests and samples."""
+    output = srz.ProfileInfoSerializer(profiles.summary(), many=True)
+    return Response(data=output.data, status=HTTP_200_OK)
+
+
+# noinspection PyUnusedLocal
+@_diagnostics_api_schema(
+    summary="Get profile",
+    parameters=[
+        OpenApiParameter(
+            name="view",
+            description="View name, e.g. `api:posts:publication:feed`.",
+            location=OpenApiParameter.PATH,
+        ),
+    ],
+    responses={
+        (200, "text/plain"): OpenApiResponse(
+            response=str,
+            description="Collapsed stacks, for flamegraph tools.",
+        )
+    },
+)
+@query_budget(1)
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def get_profile(request, view: str) -> HttpResponse:
+    """Return a view's sampled stacks, in the collapsed format."""
+    return HttpResponse(
+        profiles.collapsed(view),
+        content_type="text/plain; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{view}.folded"'},
+    )
+
+
+# noinspection PyUnusedLocal
+@_diagnostics_api_schema(
+    summary="Traces",
+    operation_id="diagnostics_traces_list",
+    parameters=[
+        OpenApiParameter(
+            name="min_ms",
+            description="Only traces at least this long, in milliseconds.",
+            type=float,
+        ),
+    ],
+    responses=OpenApiResponse(
+        response=srz.TraceInfoSerializer(many=True),
+        description="Latest traces of the serving process, slowest first.",
+    ),
+)
+@query_budget(1)
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def list_traces(request) -> Response:
+    """Return the latest traces, slowest first."""
+    try:
+        min_ms = float(request.query_params.get("min_ms", 0))
+    except ValueError:
+        raise ValidationError({"min_ms": "Must be a number."})
+    found = [trace.info() for trace in list(tracing.traces)]
+    output = srz.TraceInfoSerializer(
+        sorted(
+            (info for info in found if info["duration_ms"] >= min_ms),
+            key=lambda info: info["duration_ms"],
+            reverse=True,
+        ),
+        many=True,
+    )
+    return Response(data=output.data, status=HTTP_200_OK)
+
+
+# noinspection PyUnusedLocal
+@_diagnostics_api_schema(
+    summary="Get trace",
+    parameters=[
+        OpenApiParameter(
+            name="trace_id",
+            description="Trace ID, as sent in `X-Trace-Id`.",
+            location=OpenApiParameter.PATH,
+        ),
+    ],
+    responses={
+        (200, "text/plain"): OpenApiResponse(
+            response=str,
+            description="Waterfall of the trace's spans.",
+        ),
+        404: OpenApiResponse(description="Trace not kept by the serving process."),
+    },
+)
+@query_budget(1)
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def get_trace(request, trace_id: str) -> HttpResponse:
+    """Return a trace's spans as a waterfall."""
+    trace = tracing.find_trace(trace_id)
+    if trace is None:
+        raise Http404
+    return HttpResponse(
+        tracing.waterfall(trace), content_type="text/plain; charset=utf-8"
+    )
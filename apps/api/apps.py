@@ -1,4 +1,14 @@
+# Libs
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.checks import register
+from django.db.backends.signals import connection_created
+
+# Global
+from common import tracing
+from common.checks import check_shared_cache
+from common.db import install_query_recorder
+from common.slow_queries import install_slow_query_log
 
 
 class ApiConfig(AppConfig):
@@ -7,3 +17,13 @@ class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.api"
     verbose_name = "APIs"
+
+    def ready(self):
+        register(check_shared_cache)
+        connection_created.connect(install_query_recorder)
+        if settings.SLOW_QUERY_THRESHOLD:
+            connection_created.connect(install_slow_query_log)
+        if settings.TRACING_RATE:
+            tracing.exporter = tracing.get_exporter()
+            tracing.instrument_services()
+            connection_created.connect(tracing.install_trace_query)
@@ -0,0 +1,312 @@
+# Core
+import gc
+import re
+import json
+import math
+import time
+import threading
+import statistics
+import http.client
+from datetime import timedelta
+from typing import Any, Callable, Iterable, TypedDict
+from urllib.parse import urlsplit
+
+# Libs
+from django.db import models
+from django.urls import URLResolver
+from django.utils.timezone import now
+
+# Apps
+from apps.api.views import LazyView
+from apps.users.models import User
+from apps.posts.models import Comment, Publication
+
+
+_PARAMETER = re.compile(r"<(?:\w+:)?(\w+)>")
+
+# Query strings of the endpoints that need one.
+QUERY_STRINGS = {
+    "api:users:user:search": "search=user",
+    "api:posts:publication:feed": "page=1",
+    "api:async:users:user:search": "search=user",
+    "api:async:posts:publication:feed": "page=1",
+}
+
+
+class TimingT(TypedDict):
+    """Per-call timing statistics, in seconds."""
+
+    mean: float
+    stdev: float
+    median: float
+    best: float
+    runs: int
+
+
+def measure(
+    func: Callable[[], Any],
+    *,
+    number=1,
+    repeat=5,
+    warmup=1,
+    timer: Callable[[], float] = time.perf_counter,
+) -> TimingT:
+    """Time `func` with warmup runs and the garbage collector paused."""
+    for _ in range(warmup):
+        func()
+
+    samples = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = timer()
+            for _ in range(number):
+                func()
+            samples.append((timer() - start) / number)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    return {
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "median": statistics.median(samples),
+        "best": min(samples),
+        "runs": len(samples),
+    }
+
+
+def calibrate(func: Callable[[], Any], min_time: float = 0.01) -> int:
+    """Return the calls of `func` per timed run, so a run lasts `min_time`."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - start >= min_time:
+            return number
+        number *= 2
+
+
+def compare(before: TimingT, after: TimingT) -> tuple[float, bool]:
+    """
+    Return the relative change of the mean time, and whether it is
+    significant, by Welch's t-test at about 95% confidence.
+    """
+    change = after["mean"] / before["mean"] - 1
+    error = math.sqrt(
+        before["stdev"] ** 2 / before["runs"] + after["stdev"] ** 2 / after["runs"]
+    )
+    if not error:
+        return change, before["mean"] != after["mean"]
+    return change, abs(after["mean"] - before["mean"]) / error > 2
+
+
+class LatencyT(TypedDict):
+    """Latency percentiles of requests, in milliseconds, with their throughput."""
+
+    p50: float
+    p95: float
+    p99: float
+    mean: float
+    max: float
+    requests: int
+    # Requests per second, over all workers.
+    throughput: float
+    # Mean queries per request, if known.
+    queries: float | None
+
+
+def latency(
+    samples: list[float], elapsed: float, queries: list[int] | None = None
+) -> LatencyT:
+    """Return the statistics of request durations, in seconds."""
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "p50": cuts[49] * 1000,
+        "p95": cuts[94] * 1000,
+        "p99": cuts[98] * 1000,
+        "mean": statistics.fmean(samples) * 1000,
+        "max": max(samples) * 1000,
+        "requests": len(samples),
+        "throughput": len(samples) / elapsed,
+        "queries": statistics.fmean(queries) if queries else None,
+    }
+
+
+def regressions(
+    results: dict[str, LatencyT], baseline: dict[str, LatencyT], tolerance: float
+) -> list[str]:
+    """Return the slowdowns past `tolerance` and query increases on `baseline`."""
+    found = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        for key in ("p50", "p95", "p99"):
+            if result[key] > before[key] * (1 + tolerance):
+                found.append(
+                    f"{name} {key} {before[key]:.1f} -> {result[key]:.1f} ms "
+                    f"(+{result[key] / before[key] - 1:.0%})"
+                )
+        # Queries are unknown when a side ran on a server without DEBUG.
+        if None in (result["queries"], before["queries"]):
+            continue
+        if result["queries"] > before["queries"]:
+            found.append(
+                f"{name} queries {before['queries']:.1f} -> {result['queries']:.1f}"
+            )
+    return found
+
+
+# ==== Endpoints ====
+# A request function, from its method, path, query string and JSON body to
+# its status and the queries it ran, if known.
+SendT = Callable[[str, str, str, dict | None], tuple[int, int | None]]
+
+
+def server_sender(url: str, token: str) -> SendT:
+    """
+    Return a function sending requests to a server, over a kept-alive
+    connection per thread, reopened once if the server closed it while idle.
+    Queries are known when the server runs with DEBUG.
+    """
+    base = urlsplit(url)
+    connection_class = (
+        http.client.HTTPSConnection
+        if base.scheme == "https"
+        else http.client.HTTPConnection
+    )
+    local = threading.local()
+
+    def send(method, path, query, body):
+        if not hasattr(local, "connection"):
+            local.connection = connection_class(base.netloc, timeout=30)
+        target = base.path.rstrip("/") + path + (f"?{query}" if query else "")
+        headers = {"Authorization": f"Bearer {token}"}
+        if body:
+            headers["Content-Type"] = "application/json"
+        payload = json.dumps(body) if body else None
+        try:
+            local.connection.request(method, target, payload, headers)
+            response = local.connection.getresponse()
+        except (http.client.RemoteDisconnected, ConnectionResetError):
+            local.connection.close()
+            local.connection.request(method, target, payload, headers)
+            response = local.connection.getresponse()
+        response.read()
+        queries = response.getheader("X-Query-Count")
+        return response.status, int(queries) if queries else None
+
+    return send
+
+
+def endpoints(patterns, prefix: str = "/api/", namespace: str = "api"):
+    """Yield the route, name and view of each URL pattern."""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from endpoints(
+                pattern.url_patterns,
+                prefix + str(pattern.pattern),
+                ":".join(filter(None, [namespace, pattern.namespace])),
+            )
+        else:
+            yield prefix + str(pattern.pattern), f"{namespace}:{pattern.name}", (
+                pattern.callback
+            )
+
+
+def view_class(view) -> type | None:
+    """Return the class of a class-based view, importing a lazy one."""
+    if isinstance(view, LazyView):
+        view = view.view
+    return getattr(view, "view_class", None)
+
+
+def allows_get(view) -> bool:
+    """Return whether a view, class-based or an async function, serves GET."""
+    cls = view_class(view)
+    if cls is not None:
+        return hasattr(cls, "get")
+    return "get" in getattr(view, "http_method_names", ())
+
+
+def fill_route(route: str, samples: dict[str, str]) -> str:
+    """Return a route with its parameters replaced by sample values."""
+    return _PARAMETER.sub(lambda match: samples[match[1]], route)
+
+
+def get_requests(patterns, samples: dict[str, str]):
+    """Yield the name, path, query string and view of each GET endpoint."""
+    for route, name, view in endpoints(patterns):
+        if allows_get(view):
+            yield name, fill_route(route, samples), QUERY_STRINGS.get(name, ""), view
+
+
+# ==== Sample data ====
+def sample_users(count: int) -> list[User]:
+    """Return unsaved users with every profile field filled in."""
+    timestamp = now()
+    return [
+        User(
+            id=i,
+            username=f"user{i}",
+            first_name=f"First {i}",
+            last_name=f"Last {i}",
+            email=f"user{i}@example.com",
+            avatar=f"https://res.cloudinary.com/demo/image/avatars/v{i}.png",
+            description=f"Description of user {i}.",
+            website=f"https://user{i}.example.com",
+            is_active=True,
+            date_joined=timestamp - timedelta(days=i),
+            updated_at=timestamp - timedelta(hours=i),
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def sample_publications(count: int, users: list[User]) -> list[Publication]:
+    """Return unsaved publications spread over `users`."""
+    timestamp = now()
+    return [
+        Publication(
+            id=i,
+            code=f"{i:06d}",
+            image=f"https://res.cloudinary.com/demo/image/publications/v{i}.png",
+            description=f"Publication number {i}.",
+            user=users[i % len(users)],
+            created_at=timestamp - timedelta(minutes=i),
+            updated_at=timestamp - timedelta(minutes=i),
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def sample_comments(count: int, users: list[User]) -> list[Comment]:
+    """Return unsaved comments spread over `users`."""
+    timestamp = now()
+    return [
+        Comment(
+            id=i,
+            comment=f"Comment number {i}.",
+            user=users[i % len(users)],
+            created_at=timestamp - timedelta(seconds=i),
+            updated_at=timestamp - timedelta(seconds=i),
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def as_rows(instances: Iterable[models.Model], fields: list[str]) -> list[dict]:
+    """Return the rows `QuerySet.values(*fields)` would yield for `instances`."""
+    rows = []
+    for instance in instances:
+        row = {}
+        for field in fields:
+            value = instance
+            for attr in field.split("__"):
+                value = getattr(value, attr)
+            row[field] = value.pk if isinstance(value, models.Model) else value
+        rows.append(row)
+    return rows
@@ -0,0 +1,103 @@
+# Core
+import time
+import zlib
+
+# Libs
+from django.db.models import Count
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework.test import APIClient
+
+# Apps
+from apps.api import bench
+from apps.users.models import User
+from apps.posts.models import Publication
+
+# Global
+from common.middleware import COMPRESSORS, brotli, zstandard
+
+_CHUNK_SIZE = 8 * 1024
+
+
+def decompress(encoding: str, data: bytes) -> bytes:
+    """Return a response body decoded from a content coding."""
+    if encoding == "gzip":
+        return zlib.decompress(data, 16 + 15)
+    if encoding == "br":
+        return brotli.decompress(data)
+    return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+class Command(BaseCommand):
+    """Compare the response compressors on real API payloads."""
+
+    help = (
+        "Report the CPU cost and bytes saved by each available response "
+        "compressor for the feed, follower and comment endpoints."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20, help="Timed runs.")
+
+    def handle(self, *args, repeat: int, **options):
+        user = (
+            User.objects.annotate(count=Count("followers"))
+            .order_by("-count", "id")
+            .first()
+        )
+        publication = (
+            Publication.objects.annotate(count=Count("comments"))
+            .order_by("-count")
+            .first()
+        )
+        superuser = User.objects.filter(is_superuser=True).first()
+        if superuser is None or publication is None:
+            raise CommandError("A superuser and publications are required.")
+
+        client = APIClient()
+        client.force_authenticate(superuser)
+        paths = {
+            "feed": "/api/posts/publication/get_feed/?page=1",
+            "followers": f"/api/users/follow/{user.username}/get_followers/",
+            "comments": f"/api/posts/comment/{publication.code}/list/",
+            "publications": f"/api/posts/publication/{superuser.username}/list/",
+        }
+
+        self.stdout.write(
+            f"{'Endpoint':<14}{'Coding':<8}{'Bytes':>10}{'Sent':>10}"
+            f"{'Streamed':>10}{'Saved':>8}{'CPU ms':>9}{'MB/s':>9}"
+        )
+        for name, path in paths.items():
+            body = client.get(path).content
+
+            for compressor_class in COMPRESSORS:
+                encoding = compressor_class.encoding
+                response = client.get(path, HTTP_ACCEPT_ENCODING=encoding)
+                sent = response.content
+                if response.get("Content-Encoding") == encoding:
+                    if decompress(encoding, sent) != body:
+                        raise CommandError(f"{name} does not round-trip {encoding}.")
+
+                def compress():
+                    return compressor_class().finish(body)
+
+                def stream():
+                    compressor = compressor_class()
+                    chunks = [
+                        compressor.write(body[i : i + _CHUNK_SIZE])
+                        for i in range(0, len(body), _CHUNK_SIZE)
+                    ]
+                    return b"".join(chunks) + compressor.finish()
+
+                timing = bench.measure(compress, repeat=repeat, timer=time.process_time)
+                cpu = timing["median"]
+                self.stdout.write(
+                    f"{name:<14}{encoding:<8}{len(body):>10}{len(sent):>10}"
+                    f"{len(stream()):>10}{1 - len(sent) / len(body):>8.0%}"
+                    f"{cpu * 1000:>9.3f}{len(body) / cpu / 1e6 if cpu else 0:>9.0f}"
+                )
+
+        self.stdout.write(
+            "`Sent` is what the middleware sends: bodies under "
+            "COMPRESSION_MIN_SIZE go out uncompressed."
+        )
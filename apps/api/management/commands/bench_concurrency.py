@@ -0,0 +1,140 @@
+# Core
+import time
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+
+# Libs
+from django.db.models import Count
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework_simplejwt.tokens import AccessToken
+
+# Apps
+from apps.api import bench
+from apps.api.urls import urlpatterns
+from apps.users.models import User
+from apps.posts.models import Publication
+
+_ASYNC = "api:async:"
+
+
+class Command(BaseCommand):
+    """Compare the concurrent connections sync and async endpoints sustain."""
+
+    help = (
+        "Request each endpoint with an async variant, and the variant under "
+        "`/api/async/`, on a running ASGI server at increasing numbers of "
+        "parallel connections. Report throughput, latency percentiles and "
+        "errors per level, and the most connections each endpoint serves "
+        "within the p99 latency limit."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            required=True,
+            help="Base URL of a running ASGI server, e.g. http://127.0.0.1:8000.",
+        )
+        parser.add_argument(
+            "--levels",
+            default="1,4,16,64",
+            help="Comma-separated numbers of parallel connections.",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=20,
+            help="Timed requests per connection and level.",
+        )
+        parser.add_argument(
+            "--p99", type=float, default=250.0, help="Latency limit, in ms."
+        )
+        parser.add_argument("--only", help="Endpoints whose name contains this.")
+        parser.add_argument(
+            "--requester", help="User sending requests, defaults to a superuser."
+        )
+
+    def handle(self, *args, **options):
+        levels = sorted({int(level) for level in options["levels"].split(",")})
+        users = User.objects.order_by("id")
+        requester = (
+            users.filter(username=options["requester"]).first()
+            if options["requester"]
+            else users.filter(is_superuser=True, is_active=True).first()
+        )
+        if requester is None:
+            raise CommandError("A requester, or a superuser, is required.")
+        send = bench.server_sender(options["url"], str(AccessToken.for_user(requester)))
+
+        self.stdout.write(
+            f"{'Endpoint':<44}{'Conns':>6}{'req/s':>8}{'p50 ms':>9}"
+            f"{'p99 ms':>9}{'Errors':>8}"
+        )
+        capacities = {}
+        for name, path in self.get_paths():
+            if options["only"] and options["only"] not in name:
+                continue
+            query = bench.QUERY_STRINGS.get(name, "")
+            status, _queries = send("GET", path, query, None)
+            if status >= 400:
+                raise CommandError(f"{name} failed with {status}.")
+
+            capacities[name] = 0
+            for level in levels:
+                result, errors = self.run(send, path, query, level, **options)
+                self.stdout.write(
+                    f"{name:<44}{level:>6}{result['throughput']:>8.0f}"
+                    f"{result['p50']:>9.1f}{result['p99']:>9.1f}{errors:>8}"
+                )
+                if errors or result["p99"] > options["p99"]:
+                    break
+                capacities[name] = level
+
+        self.stdout.write(f"\nMost connections within p99 {options['p99']:.0f} ms:")
+        for name, capacity in capacities.items():
+            self.stdout.write(f"{name:<44}{capacity or '-':>6}")
+
+    def get_paths(self) -> list[tuple[str, str]]:
+        """Return the name and path of each async endpoint and its sync twin."""
+        user = (
+            User.objects.annotate(count=Count("followers"))
+            .order_by("-count", "id")
+            .first()
+        )
+        publication = Publication.objects.filter(user=user).first()
+        if publication is None:
+            raise CommandError("A user with publications is required.")
+
+        samples = {"username": user.username, "code": publication.code}
+        routes = {name: route for route, name, _view in bench.endpoints(urlpatterns)}
+        paths = []
+        for name, route in routes.items():
+            twin = "api:" + name.removeprefix(_ASYNC)
+            if name.startswith(_ASYNC) and twin in routes:
+                paths += [
+                    (twin, bench.fill_route(routes[twin], samples)),
+                    (name, bench.fill_route(route, samples)),
+                ]
+        return paths
+
+    def run(
+        self, send: bench.SendT, path: str, query: str, level: int, **options
+    ) -> tuple[bench.LatencyT, int]:
+        """Time `level` connections sending requests at once."""
+        durations, errors = [], []
+
+        def worker(_):
+            for _ in range(options["requests"]):
+                start = time.perf_counter()
+                try:
+                    status, _queries = send("GET", path, query, None)
+                except (OSError, http.client.HTTPException):
+                    status = 0
+                durations.append(time.perf_counter() - start)
+                if not 200 <= status < 400:
+                    errors.append(status)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(level) as pool:
+            list(pool.map(worker, range(level)))
+        return bench.latency(durations, time.perf_counter() - start), len(errors)
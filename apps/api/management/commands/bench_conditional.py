@@ -0,0 +1,91 @@
+# Core
+import time
+
+# Libs
+from django.db.models import Count
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework.test import APIClient
+
+# Apps
+from apps.api import bench
+from apps.users.models import User
+from apps.posts.models import Publication
+
+
+def polled_paths(user: User, publication: Publication) -> list[str]:
+    """Return the read endpoints a client polls for a profile and a post."""
+    return [
+        f"/api/users/user/{user.username}/get/",
+        f"/api/users/follow/{user.username}/count/",
+        f"/api/posts/publication/{user.username}/list/",
+        f"/api/posts/publication/{publication.code}/get/",
+        f"/api/posts/comment/{publication.code}/list/",
+    ]
+
+
+class Command(BaseCommand):
+    """Measure what conditional GET saves under a polling workload."""
+
+    help = (
+        "Poll the read endpoints with and without If-None-Match and compare "
+        "body bytes and CPU time of this process (the database is excluded)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", help="Polled user, defaults to the busiest.")
+        parser.add_argument("--polls", type=int, default=50, help="Polls per endpoint.")
+
+    def handle(self, *args, username: str | None, polls: int, **options):
+        users = User.objects.annotate(count=Count("publications"))
+        if username:
+            users = users.filter(username=username)
+        user = users.order_by("-count").first()
+
+        publication = (
+            Publication.objects.filter(user=user)
+            .annotate(count=Count("comments"))
+            .order_by("-count")
+            .first()
+        )
+        if publication is None:
+            raise CommandError("A user with publications is required.")
+
+        client = APIClient()
+        client.force_authenticate(user)
+
+        self.stdout.write(
+            f"{'Endpoint':<48}{'Bytes':>9}{'CPU ms':>9}{'304 ms':>9}{'Saved':>8}"
+        )
+        total_bytes = total_full = total_cached = 0
+        for path in polled_paths(user, publication):
+            response = client.get(path)
+            etag = response.get("ETag")
+            if response.status_code != 200 or not etag:
+                raise CommandError(f"{path} returned no ETag.")
+            if client.get(path, HTTP_IF_NONE_MATCH=etag).status_code != 304:
+                raise CommandError(f"{path} ignored a matching If-None-Match.")
+
+            def full():
+                return client.get(path)
+
+            def cached():
+                return client.get(path, HTTP_IF_NONE_MATCH=etag)
+
+            full_ms = bench.measure(full, repeat=polls, timer=time.process_time)
+            cached_ms = bench.measure(cached, repeat=polls, timer=time.process_time)
+            full_ms, cached_ms = full_ms["mean"] * 1000, cached_ms["mean"] * 1000
+
+            total_bytes += len(response.content)
+            total_full += full_ms
+            total_cached += cached_ms
+            self.stdout.write(
+                f"{path:<48}{len(response.content):>9}{full_ms:>9.2f}"
+                f"{cached_ms:>9.2f}{1 - cached_ms / full_ms:>8.0%}"
+            )
+
+        self.stdout.write(
+            f"Every unchanged poll round saves {total_bytes} body bytes and "
+            f"{total_full - total_cached:.2f} ms of CPU "
+            f"({1 - total_cached / total_full:.0%})."
+        )
@@ -0,0 +1,317 @@
+# Core
+import json
+import time
+from pathlib import Path
+from typing import NamedTuple
+from concurrent.futures import ThreadPoolExecutor
+
+# Libs
+from django.test import Client
+from django.urls import reverse
+from django.db.models import Count
+from django.utils.timezone import now
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# Apps
+from apps.api import bench
+from apps.api.urls import urlpatterns
+from apps.users.models import User
+from apps.posts.models import Comment, Publication
+
+# Text of the comments added by the benchmark, deleted once it ends.
+_COMMENT = "Benchmark comment."
+
+
+class _Request(NamedTuple):
+    name: str
+    method: str
+    path: str
+    query: str = ""
+    body: dict | None = None
+    # Untimed requests restoring the samples, before and after each timed one.
+    before: "_Request | None" = None
+    after: "_Request | None" = None
+
+
+def client_sender(token: str) -> bench.SendT:
+    """Return a function sending requests to this process, through the handler."""
+    client = Client()
+
+    def send(method, path, query, body):
+        response = client.generic(
+            method,
+            path,
+            json.dumps(body) if body else "",
+            content_type="application/json",
+            headers={"Authorization": f"Bearer {token}"},
+            QUERY_STRING=query,
+        )
+        queries = getattr(response.wsgi_request, "queries", None)
+        return response.status_code, queries.count if queries else None
+
+    return send
+
+
+class Command(BaseCommand):
+    """Benchmark the API endpoints, against a saved baseline."""
+
+    help = (
+        "Request every GET endpoint of the API, the auth ones and the like and "
+        "comment writes, in this process through the Django handler or on a running server with --url, "
+        "and report latency percentiles, throughput and queries per request. "
+        "Results can be saved as a baseline, and later runs fail when slower "
+        "than it past the tolerance."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            help="Base URL of a running WSGI or ASGI server, e.g. "
+            "http://127.0.0.1:8000, instead of this process.",
+        )
+        parser.add_argument(
+            "--requests", type=int, default=200, help="Timed requests per endpoint."
+        )
+        parser.add_argument(
+            "--warmup", type=int, default=10, help="Untimed requests per endpoint."
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Parallel connections, with --url only.",
+        )
+        parser.add_argument("--only", help="Endpoints whose name contains this.")
+        parser.add_argument(
+            "--username", help="User requested, defaults to the most followed."
+        )
+        parser.add_argument(
+            "--requester", help="User sending requests, defaults to a superuser."
+        )
+        parser.add_argument(
+            "--password", help="The requester's password, to benchmark logins."
+        )
+        parser.add_argument("--save", type=Path, help="Write the results there.")
+        parser.add_argument("--baseline", type=Path, help="Results compared to.")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.2,
+            help="Slowdown allowed on the baseline percentiles, 0.2 for 20%%.",
+        )
+
+    def handle(self, *args, **options):
+        if options["concurrency"] > 1 and not options["url"]:
+            raise CommandError("--concurrency requires a server, with --url.")
+        baseline = None
+        if options["baseline"]:
+            saved = json.loads(options["baseline"].read_text())
+            baseline = saved["results"]
+            setup = (options["url"] or "process", options["concurrency"])
+            if (saved["target"], saved["concurrency"]) != setup:
+                self.stderr.write(
+                    f"The baseline ran on {saved['target']} with concurrency "
+                    f"{saved['concurrency']}, its latencies may not compare."
+                )
+
+        requester = self.get_requester(options["requester"])
+        refresh = RefreshToken.for_user(requester)
+        token = str(refresh.access_token)
+        send = (
+            bench.server_sender(options["url"], token)
+            if options["url"]
+            else client_sender(token)
+        )
+
+        requests = self.get_requests(
+            options["username"], requester, str(refresh), options["password"]
+        )
+        if options["only"]:
+            requests = [r for r in requests if options["only"] in r.name]
+        if options["concurrency"] > 1:
+            # Concurrent likes and unlikes of the same user would conflict.
+            requests = [r for r in requests if not (r.before or r.after)]
+
+        self.stdout.write(
+            f"{'Endpoint':<40}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+            f"{'req/s':>9}{'Queries':>9}"
+        )
+        results = {}
+        try:
+            for request in requests:
+                result = results[request.name] = self.run(send, request, **options)
+                queries = result["queries"]
+                self.stdout.write(
+                    f"{request.name:<40}{result['p50']:>9.2f}{result['p95']:>9.2f}"
+                    f"{result['p99']:>9.2f}{result['throughput']:>9.0f}"
+                    f"{queries if queries is None else f'{queries:.1f}':>9}"
+                )
+        finally:
+            Comment.objects.filter(user=requester, comment=_COMMENT).delete()
+
+        if options["save"]:
+            options["save"].parent.mkdir(parents=True, exist_ok=True)
+            options["save"].write_text(
+                json.dumps(
+                    {
+                        "target": options["url"] or "process",
+                        "concurrency": options["concurrency"],
+                        "created_at": now().isoformat(),
+                        "results": results,
+                    },
+                    indent=2,
+                )
+            )
+            self.stdout.write(f"Results saved to {options['save']}.")
+
+        if baseline is not None:
+            found = bench.regressions(results, baseline, options["tolerance"])
+            for regression in found:
+                self.stdout.write(f"Regression: {regression}")
+            if found:
+                raise CommandError(f"{len(found)} regressions on the baseline.")
+            self.stdout.write("No regression on the baseline.")
+
+    def get_requester(self, username: str | None) -> User:
+        users = User.objects.order_by("id")
+        requester = (
+            users.filter(username=username).first()
+            if username
+            else users.filter(is_superuser=True, is_active=True).first()
+        )
+        if requester is None:
+            raise CommandError("A requester, or a superuser, is required.")
+        return requester
+
+    def get_requests(
+        self, username: str | None, requester: User, refresh: str, password: str
+    ) -> list[_Request]:
+        """Return the GET endpoints on sample rows, the auth ones, then writes."""
+        users = User.objects.all()
+        if username:
+            users = users.filter(username=username)
+        user = users.annotate(count=Count("followers")).order_by("-count", "id").first()
+        publication = (
+            Publication.objects.filter(user=user)
+            .annotate(count=Count("comments"))
+            .order_by("-count", "id")
+            .first()
+        )
+        if publication is None:
+            raise CommandError("A user with publications is required.")
+
+        samples = {"username": user.username, "code": publication.code}
+        requests = []
+        for route, name, view in bench.endpoints(urlpatterns):
+            # Diagnostics are not part of the API, writes change the samples.
+            if name.startswith("api:diagnostics:"):
+                continue
+            if bench.allows_get(view):
+                path = bench.fill_route(route, samples)
+                requests.append(
+                    _Request(name, "GET", path, bench.QUERY_STRINGS.get(name, ""))
+                )
+
+        bodies = {
+            "api:users:auth:verify_token": {"token": refresh},
+            "api:users:auth:renew_token": {"refresh": refresh},
+        }
+        if password:
+            bodies["api:users:auth:token_obtain_pair"] = {
+                "email": requester.email,
+                "password": password,
+            }
+        for name, body in bodies.items():
+            requests.append(_Request(name, "POST", reverse(name), body=body))
+        return requests + self.get_write_requests(requester)
+
+    def get_write_requests(self, requester: User) -> list[_Request]:
+        """
+        Return the like and comment writes, on a publication the requester has
+        not liked. Each is undone by an untimed request, but for added
+        comments, deleted once the benchmark ends. Removing a comment is not
+        timed, its path changes on every request.
+        """
+        publication = (
+            Publication.objects.exclude(likes__user=requester).order_by("id").first()
+        )
+        if publication is None:
+            raise CommandError("A publication the requester has not liked is required.")
+
+        kwargs = {"code": publication.code}
+        like = _Request(
+            "api:posts:like:add", "POST", reverse("api:posts:like:add", kwargs=kwargs)
+        )
+        unlike = _Request(
+            "api:posts:like:remove",
+            "DELETE",
+            reverse("api:posts:like:remove", kwargs=kwargs),
+        )
+        body = {"comment": _COMMENT, "publication": publication.code}
+        return [
+            like._replace(after=unlike),
+            unlike._replace(before=like),
+            _Request(
+                "api:posts:comment:add",
+                "POST",
+                reverse("api:posts:comment:add"),
+                body=body,
+            ),
+        ]
+
+    def run(
+        self,
+        send: bench.SendT,
+        request: _Request,
+        *,
+        requests: int,
+        warmup: int,
+        concurrency: int,
+        **options,
+    ) -> bench.LatencyT:
+        """Time an endpoint's requests, split over `concurrency` threads."""
+
+        def sender(request: _Request | None):
+            if request is None:
+                return lambda: None
+            args = (request.method, request.path, request.query, request.body)
+            return lambda: send(*args)
+
+        before, timed, after = map(sender, (request.before, request, request.after))
+        for _ in range(max(warmup, 1)):
+            before()
+            status, _queries = timed()
+            after()
+            if status >= 400:
+                raise CommandError(f"{request.name} failed with {status}.")
+
+        durations, queries = [], []
+
+        def worker(share: int):
+            for _ in range(share):
+                before()
+                start = time.perf_counter()
+                _status, count = timed()
+                durations.append(time.perf_counter() - start)
+                after()
+                if count is not None:
+                    queries.append(count)
+
+        shares = [
+            requests // concurrency + (i < requests % concurrency)
+            for i in range(concurrency)
+        ]
+        start = time.perf_counter()
+        if concurrency == 1:
+            # In this thread, which holds the database connection.
+            worker(requests)
+        else:
+            with ThreadPoolExecutor(concurrency) as pool:
+                list(pool.map(worker, shares))
+        elapsed = time.perf_counter() - start
+        if request.before or request.after:
+            # Run in one thread, without the untimed requests.
+            elapsed = sum(durations)
+        return bench.latency(durations, elapsed, queries)
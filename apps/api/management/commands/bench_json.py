@@ -0,0 +1,120 @@
+# Core
+import io
+import uuid
+from decimal import Decimal
+from datetime import date, timedelta
+
+# Libs
+from django.utils.timezone import now
+from django.utils.translation import gettext_lazy
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework import parsers, renderers
+
+# Apps
+from apps.api import bench
+from apps.posts.serializers.comment import CommentInfoSerializer
+from apps.posts.serializers.publication import PublicationInfoSerializer
+from apps.users.serializers.follow import FollowerInfoSerializer
+from apps.users.serializers.user import UserInfoSerializer
+
+# Global
+from common.compiled import compile_serializer
+from common.parsers import JSONParser
+from common.renderers import JSONRenderer, orjson
+
+
+def _many(serializer_class, instances) -> list[dict]:
+    compiled = compile_serializer(serializer_class)
+    return compiled.many(bench.as_rows(instances, compiled.values_fields))
+
+
+def response_shapes(size: int) -> dict[str, object]:
+    """Return representative API response bodies."""
+    users = bench.sample_users(max(size // 10, 1))
+    publications = _many(
+        PublicationInfoSerializer, bench.sample_publications(size, users)
+    )
+    return {
+        "feed page": publications[:4],
+        "publications": publications,
+        "followers": _many(FollowerInfoSerializer, bench.sample_users(size)),
+        "comments": _many(CommentInfoSerializer, bench.sample_comments(size, users)),
+        "user": UserInfoSerializer(users[0]).data,
+        "count": {"following_count": 120, "followers_count": 4512},
+        "errors": {"errors": {"image": ["Upload a valid image."]}},
+    }
+
+
+def edge_cases() -> dict[str, object]:
+    """Return values the encoders have to agree on beyond plain JSON types."""
+    timestamp = now()
+    return {
+        "aware datetime": timestamp,
+        "utc datetime": timestamp.replace(microsecond=0),
+        "naive datetime": timestamp.replace(tzinfo=None),
+        "date": date(2024, 2, 29),
+        "timedelta": timedelta(minutes=90),
+        "decimal": Decimal("12.50"),
+        "uuid": uuid.UUID(int=2**100),
+        "lazy string": gettext_lazy("Created"),
+        "bytes": b"bytes",
+        "tuple": (1, 2, 3),
+        "generator": (i for i in range(3)),
+        "integer keys": {1: "a", 2: "b"},
+        "unicode": 'Ñandú 📷     "quoted" \\',
+        "big integer": 2**70,
+        "floats": [0.1, 1.5, -2.25, 1e-7],
+        "nested": {"empty list": [], "empty dict": {}, "none": None, "bool": True},
+    }
+
+
+class Command(BaseCommand):
+    """Check the API JSON renderer against DRF's and measure throughput."""
+
+    help = "Benchmark JSON encoding of the API response shapes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", type=int, default=1000, help="Items per list.")
+        parser.add_argument("--repeat", type=int, default=7, help="Timed runs.")
+
+    def handle(self, *args, size: int, repeat: int, **options):
+        if orjson is None:
+            self.stderr.write("orjson is not installed, the renderer uses stdlib.")
+
+        stdlib, fast = renderers.JSONRenderer(), JSONRenderer()
+        shapes = response_shapes(size)
+        self._check_compatibility(stdlib, fast, {**shapes, **edge_cases()})
+
+        self.stdout.write(f"{'Shape':<14}{'KiB':>8}{'stdlib MB/s':>13}{'API MB/s':>10}")
+        for name, data in shapes.items():
+            size_mb = len(stdlib.render(data)) / 2**20
+            base = bench.measure(lambda: stdlib.render(data), repeat=repeat)
+            ours = bench.measure(lambda: fast.render(data), repeat=repeat)
+            self.stdout.write(
+                f"{name:<14}{size_mb * 1024:>8.1f}"
+                f"{size_mb / base['median']:>13.1f}{size_mb / ours['median']:>10.1f}"
+            )
+
+    def _check_compatibility(self, stdlib, fast, cases: dict) -> None:
+        """Fail unless both renderers and parsers agree on every case."""
+        stdlib_parser, fast_parser = parsers.JSONParser(), JSONParser()
+        reformatted = []
+        for name, data in cases.items():
+            # Generators can only be consumed once.
+            if name == "generator":
+                expected = stdlib.render(i for i in range(3))
+            else:
+                expected = stdlib.render(data)
+            rendered = fast.render(data)
+
+            parsed = fast_parser.parse(io.BytesIO(rendered))
+            if parsed != stdlib_parser.parse(io.BytesIO(expected)):
+                raise CommandError(f"{name}: {rendered!r} != {expected!r}")
+            if rendered != expected:
+                # Same values, different spelling (e.g. `1e-7` for `1e-07`).
+                reformatted.append(name)
+
+        self.stdout.write(f"Renderer and parser match DRF on {len(cases)} cases.")
+        if reformatted:
+            self.stdout.write(f"Equal values, different bytes: {reformatted}.")
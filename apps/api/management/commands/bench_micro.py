@@ -0,0 +1,224 @@
+# Core
+import json
+import itertools
+from pathlib import Path
+from contextlib import ExitStack
+from typing import Any, Callable
+
+# Libs
+from django.db import connections, transaction
+from django.db.models import Count
+from django.http import HttpRequest
+from django.utils.timezone import now
+from django.core.management.base import BaseCommand, CommandError
+
+# Apps
+from apps.api import bench
+from apps.users.models import User
+from apps.posts.models import Comment, Publication
+from apps.users.serializers.user import UserInfoSerializer
+from apps.posts.serializers.comment import CommentInfoSerializer
+from apps.posts.serializers.publication import PublicationInfoSerializer
+from apps.users.services import follow as follow_sv
+from apps.users.services import user as user_sv
+from apps.posts.services import comment as comment_sv
+from apps.posts.services import like as like_sv
+from apps.posts.services import publication as publication_sv
+
+# Global
+from common.decorators import permission_required
+from common.functions import clean_spaces, extract_public_id, generate_random_code
+
+CaseT = dict[str, Callable[[], Any]]
+
+
+def _no_query(execute, sql, params, many, context):
+    raise CommandError(f"Unexpected query in a Python benchmark: {sql}")
+
+
+def python_cases() -> CaseT:
+    """Return the benchmarks of code running without the database."""
+    users = bench.sample_users(10)
+    publication = bench.sample_publications(1, users)[0]
+    comment = bench.sample_comments(1, users)[0]
+    comment.publication = publication
+    # Unsaved, so no uniqueness check queries the database.
+    new_comment = Comment(comment=" Nice   photo, where  was it taken? ", user=users[0])
+
+    user = users[0]
+    # Loaded by `ModelBackend` on the first check, cached on the user.
+    user._perm_cache = {"users.view_user", "posts.view_publication"}
+    request = HttpRequest()
+    request.user = user
+    view = permission_required("posts.view_publication")(lambda request: None)
+
+    text = "  A comment  with\tsome   irregular \n spacing, " * 5
+    image_url = "https://res.cloudinary.com/demo/image/upload/instaclone/avatars/v1.png"
+    # Alternated, so every update changes the field.
+    comments = itertools.cycle(["First comment.", "Second comment."])
+    names = itertools.cycle(["First", "Second"])
+
+    return {
+        "BaseModel.full_clean": lambda: new_comment.full_clean(
+            exclude=["publication", "user"]
+        ),
+        "BaseModel.update_fields": lambda: comment.update_fields(
+            comment=next(comments), user=users[1]
+        ),
+        "User.updated_fields": lambda: user.updated_fields(first_name=next(names)),
+        "clean_spaces": lambda: clean_spaces(text),
+        "generate_random_code": generate_random_code,
+        "extract_public_id": lambda: extract_public_id(image_url),
+        "UserInfoSerializer.to_representation": lambda: (
+            UserInfoSerializer().to_representation(user)
+        ),
+        "PublicationInfoSerializer.to_representation": lambda: (
+            PublicationInfoSerializer().to_representation(publication)
+        ),
+        "CommentInfoSerializer.to_representation": lambda: (
+            CommentInfoSerializer().to_representation(comment)
+        ),
+        "permission_required": lambda: view(request),
+        # Lazy services, their querysets built and compiled to SQL.
+        "comment.list_comments": lambda: (
+            comment_sv.list_comments(publication).query.sql_with_params()
+        ),
+        "publication.list_publications": lambda: (
+            publication_sv.list_publications(user.username).query.sql_with_params()
+        ),
+        "follow.following_users_ids": lambda: (
+            follow_sv.following_users_ids(user).query.sql_with_params()
+        ),
+        "follow.get_following": lambda: (
+            follow_sv.get_following(user=user).query.sql_with_params()
+        ),
+        "follow.get_followers": lambda: (
+            follow_sv.get_followers(user=user).query.sql_with_params()
+        ),
+    }
+
+
+def database_cases() -> CaseT:
+    """Return the benchmarks of services running queries, on the busiest rows."""
+    user = (
+        User.objects.annotate(count=Count("followers")).order_by("-count", "id").first()
+    )
+    follower = User.objects.filter(following__followed=user).first()
+    publication = (
+        Publication.objects.filter(user=user)
+        .annotate(count=Count("comments"))
+        .order_by("-count", "id")
+        .first()
+    )
+    comment = Comment.objects.filter(publication=publication).first()
+    if follower is None or comment is None:
+        raise CommandError("A followed user, with a commented publication, is needed.")
+
+    return {
+        "BaseModel.save": lambda: comment.save(user.id, update_fields=["comment"]),
+        "user.get_user": lambda: user_sv.get_user(user.username),
+        "follow.is_following": lambda: follow_sv.is_following(
+            follower=follower, followed=user
+        ),
+        "follow.get_follow_count": lambda: follow_sv.get_follow_count(user=user),
+        "like.count_likes": lambda: like_sv.count_likes(publication),
+        "publication.get_publications_feed": lambda: list(
+            publication_sv.get_publications_feed(follower)[:20]
+        ),
+    }
+
+
+class Command(BaseCommand):
+    """Microbenchmark the Python hot paths and services, against a baseline."""
+
+    help = (
+        "Time model helpers, text functions, serializers, permission checks and "
+        "the services' query building, with warmup and calibrated loops. With "
+        "--database, also services running their queries, in a rolled back "
+        "transaction. Results can be saved as a baseline, and later runs fail "
+        "on significant slowdowns past the tolerance (Welch's t-test)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20, help="Timed runs.")
+        parser.add_argument(
+            "--min-time",
+            type=float,
+            default=0.01,
+            help="Seconds a timed run lasts at least, calls are looped to it.",
+        )
+        parser.add_argument("--only", help="Benchmarks whose name contains this.")
+        parser.add_argument(
+            "--database", action="store_true", help="Also run database services."
+        )
+        parser.add_argument("--save", type=Path, help="Write the results there.")
+        parser.add_argument("--baseline", type=Path, help="Results compared to.")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.1,
+            help="Slowdown allowed on the baseline means, 0.1 for 10%%.",
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["baseline"]:
+            baseline = json.loads(options["baseline"].read_text())["results"]
+
+        self.stdout.write(f"{'Benchmark':<46}{'Mean µs':>11}{'± µs':>9}{'Change':>9}")
+        results, regressions = {}, []
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(_no_query))
+            self.run(python_cases(), results, baseline, regressions, **options)
+
+        if options["database"]:
+            with transaction.atomic():
+                self.run(database_cases(), results, baseline, regressions, **options)
+                transaction.set_rollback(True)
+
+        if options["save"]:
+            options["save"].parent.mkdir(parents=True, exist_ok=True)
+            options["save"].write_text(
+                json.dumps(
+                    {"created_at": now().isoformat(), "results": results}, indent=2
+                )
+            )
+            self.stdout.write(f"Results saved to {options['save']}.")
+
+        if baseline is not None:
+            if regressions:
+                raise CommandError(
+                    f"Significant regressions: {', '.join(regressions)}."
+                )
+            self.stdout.write("No significant regression on the baseline.")
+
+    def run(
+        self,
+        cases: CaseT,
+        results: dict[str, bench.TimingT],
+        previous: dict[str, bench.TimingT] | None,
+        regressions: list[str],
+        *,
+        repeat: int,
+        min_time: float,
+        only: str | None,
+        tolerance: float,
+        **options,
+    ) -> None:
+        for name, func in cases.items():
+            if only and only not in name:
+                continue
+
+            number = bench.calibrate(func, min_time)
+            timing = results[name] = bench.measure(func, number=number, repeat=repeat)
+            change = ""
+            if previous and name in previous:
+                relative, significant = bench.compare(previous[name], timing)
+                change = f"{relative:+.1%}{'' if significant else '?'}"
+                if significant and relative > tolerance:
+                    regressions.append(name)
+            self.stdout.write(
+                f"{name:<46}{timing['mean'] * 1e6:>11.2f}"
+                f"{timing['stdev'] * 1e6:>9.2f}{change:>9}"
+            )
@@ -0,0 +1,69 @@
+# Libs
+from django.conf import settings
+from django.test import Client, override_settings
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework_simplejwt.tokens import AccessToken
+
+# Apps
+from apps.api import bench
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    """Compare the request overhead of the lean API and full middleware."""
+
+    help = (
+        "Time API requests through the whole handler with the lean `/api/` "
+        "middleware profile and with the full one the admin uses."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--number", type=int, default=200, help="Requests per run.")
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs.")
+
+    def handle(self, *args, number: int, repeat: int, **options):
+        user = User.objects.filter(is_superuser=True).first()
+        if user is None:
+            raise CommandError("A superuser is required.")
+
+        token = str(AccessToken.for_user(user))
+        requests = {
+            "verify token": lambda client: client.post(
+                "/api/users/auth/jwt/verify/",
+                {"token": token},
+                content_type="application/json",
+            ),
+            "get user": lambda client: client.get(
+                f"/api/users/user/{user.username}/get/",
+                headers={"Authorization": f"Bearer {token}"},
+            ),
+        }
+
+        profiles = settings.MIDDLEWARE_PROFILES
+        chains = {
+            "lean": profiles,
+            "full": {**profiles, "/api/": profiles[""]},
+        }
+
+        self.stdout.write(
+            f"{'Request':<16}{'Lean µs':>10}{'Full µs':>10}{'Saved µs':>10}"
+        )
+        for name, request in requests.items():
+            timings = {}
+            for chain, middleware_profiles in chains.items():
+                with override_settings(MIDDLEWARE_PROFILES=middleware_profiles):
+                    # The handler loads the middleware on its first request.
+                    client = Client()
+                    if request(client).status_code != 200:
+                        raise CommandError(f"{name} failed with the {chain} chain.")
+
+                    timing = bench.measure(
+                        lambda: request(client), number=number, repeat=repeat
+                    )
+                    timings[chain] = timing["median"] * 1e6
+
+            self.stdout.write(
+                f"{name:<16}{timings['lean']:>10.1f}{timings['full']:>10.1f}"
+                f"{timings['full'] - timings['lean']:>10.1f}"
+            )
@@ -0,0 +1,57 @@
+# Libs
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework.renderers import JSONRenderer
+
+# Apps
+from apps.api import bench
+from apps.posts.serializers.comment import CommentInfoSerializer
+from apps.posts.serializers.publication import PublicationInfoSerializer
+from apps.users.serializers.follow import FollowerInfoSerializer
+from apps.users.serializers.user import UserSearchInfoSerializer
+
+# Global
+from common.compiled import compile_serializer
+
+
+class Command(BaseCommand):
+    """Compare DRF and compiled output serializers on large lists."""
+
+    help = "Benchmark compiled output serializers against DRF serializers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", type=int, default=1000, help="Items per list.")
+        parser.add_argument("--repeat", type=int, default=7, help="Timed runs.")
+
+    def handle(self, *args, size: int, repeat: int, **options):
+        users = bench.sample_users(max(size // 10, 1))
+        cases = [
+            (PublicationInfoSerializer, bench.sample_publications(size, users)),
+            (CommentInfoSerializer, bench.sample_comments(size, users)),
+            (FollowerInfoSerializer, bench.sample_users(size)),
+            (UserSearchInfoSerializer, bench.sample_users(size)),
+        ]
+
+        renderer = JSONRenderer()
+        self.stdout.write(
+            f"{'Serializer':<28}{'DRF ms':>10}{'Compiled ms':>13}{'x':>7}"
+        )
+        for serializer_class, instances in cases:
+            compiled = compile_serializer(serializer_class)
+            rows = bench.as_rows(instances, compiled.values_fields)
+
+            def drf():
+                return serializer_class(instances, many=True).data
+
+            def fast():
+                return compiled.many(rows)
+
+            if renderer.render(drf()) != renderer.render(fast()):
+                raise CommandError(f"{serializer_class.__name__} output differs.")
+
+            drf_time = bench.measure(drf, repeat=repeat)["median"] * 1000
+            fast_time = bench.measure(fast, repeat=repeat)["median"] * 1000
+            self.stdout.write(
+                f"{serializer_class.__name__:<28}{drf_time:>10.2f}"
+                f"{fast_time:>13.2f}{drf_time / fast_time:>7.1f}"
+            )
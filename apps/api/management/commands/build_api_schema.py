@@ -0,0 +1,22 @@
+# Libs
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Apps
+from apps.api.schema import write_schema
+
+
+class Command(BaseCommand):
+    """Generate the OpenAPI schema files the schema endpoint serves."""
+
+    help = (
+        "Generate the OpenAPI schema once, as YAML and JSON, plain and "
+        "compressed with every available coding, in API_SCHEMA_DIR. Run it on "
+        "build or deploy, serving processes read the files on their first "
+        "schema request."
+    )
+
+    def handle(self, *args, **options):
+        for path in write_schema():
+            self.stdout.write(f"{path.stat().st_size:>10,} bytes  {path}")
+        self.stdout.write(f"Schema written to {settings.API_SCHEMA_DIR}.")
@@ -0,0 +1,91 @@
+# Libs
+from django.db import transaction
+from django.db.models import Count
+from django.contrib.auth.models import Permission
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+# Apps
+from apps.api import bench
+from apps.api.urls import urlpatterns
+from apps.users.models import User
+from apps.posts.models import Publication
+
+# Global
+from common import tracing
+from common.decorators import get_query_budget
+
+
+class Command(BaseCommand):
+    """Check that API endpoints stay within their query budgets."""
+
+    help = (
+        "Request every GET endpoint of the API, as a user with all permissions "
+        "and on the users and publications with the most rows, and fail if one "
+        "runs more queries than its `query_budget`, or has none."
+    )
+
+    def handle(self, *args, **options):
+        publication = (
+            Publication.objects.annotate(count=Count("comments"))
+            .order_by("-count", "id")
+            .first()
+        )
+        user = (
+            User.objects.annotate(count=Count("followers"))
+            .order_by("-count", "id")
+            .first()
+        )
+        if publication is None:
+            raise CommandError("Publications are required.")
+
+        samples = {
+            "username": user.username,
+            "code": publication.code,
+            "view": "api:posts:publication:feed",
+        }
+        # A trace to look up, traces are kept in the serving process.
+        trace = tracing.Trace()
+        tracing.Span(trace, "check_query_budgets", "request")
+        tracing.traces.append(trace)
+        samples["trace_id"] = trace.trace_id
+
+        failures = []
+        self.stdout.write(f"{'Endpoint':<40}{'Queries':>8}{'Budget':>8}  Repeated")
+        with transaction.atomic():
+            # Permissions are checked, and cost queries, for regular users only.
+            client = APIClient()
+            requester = User.objects.create(
+                username="querybudget", email="querybudget@example.com", is_staff=True
+            )
+            requester.user_permissions.set(Permission.objects.all())
+            token = AccessToken.for_user(requester)
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+            # Unsafe endpoints are only checked when served, by the middleware.
+            for name, path, query, view in bench.get_requests(urlpatterns, samples):
+                response = client.get(path, QUERY_STRING=query)
+                if response.status_code != 200:
+                    raise CommandError(
+                        f"{name} failed with {response.status_code}: "
+                        f"{response.content[:200]!r}"
+                    )
+
+                queries = response.wsgi_request.queries
+                budget = get_query_budget(view)
+                repeated = " | ".join(
+                    f"{count}x {sql[:60]}" for sql, count in queries.duplicates.items()
+                )
+                self.stdout.write(
+                    f"{name:<40}{queries.count:>8}{budget if budget is not None else '-':>8}"
+                    f"  {repeated}"
+                )
+                if budget is None or queries.count > budget:
+                    failures.append(name)
+
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(f"Over or without budget: {', '.join(failures)}.")
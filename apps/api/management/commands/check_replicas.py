@@ -0,0 +1,106 @@
+# Core
+from contextlib import ExitStack
+
+# Libs
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.core.management.base import BaseCommand, CommandError
+
+# Apps
+from apps.users.models import User
+from apps.users.services import user as user_sv
+
+# Global
+from common import routers
+from common.db import is_cache_query
+from common.middleware import ReplicaPinMiddleware
+
+
+class Command(BaseCommand):
+    """Check that reads go to the replicas, and to the primary after writes."""
+
+    help = (
+        "Report the state of each replica and check the router: reads of safe "
+        "requests go to a replica, while unsafe requests, transactions and "
+        "users who just wrote read from the primary."
+    )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError("No replica in `[database.replicas]`.")
+
+        user = User.objects.order_by("id").first()
+        if user is None:
+            raise CommandError("A user is required.")
+
+        for alias in settings.DATABASE_REPLICAS:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(
+                    "SELECT pg_is_in_recovery(), "
+                    "now() - pg_last_xact_replay_timestamp()"
+                )
+                in_recovery, lag = cursor.fetchone()
+            state = f"standby, replayed {lag} ago" if in_recovery else "not a standby"
+            self.stdout.write(f"{alias:<40}{state}")
+
+        def view(request):
+            request.user = user
+            user_sv.get_user(user.username)
+            return HttpResponse(status=201 if request.method == "POST" else 200)
+
+        middleware = ReplicaPinMiddleware(view)
+        factory = RequestFactory()
+
+        def read(request) -> set[str]:
+            """Return the databases the request read from."""
+            databases = [DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS]
+            with ExitStack() as stack:
+                queries = {
+                    alias: stack.enter_context(
+                        CaptureQueriesContext(connections[alias])
+                    )
+                    for alias in databases
+                }
+                middleware(request)
+            # Pins in the database cache are read from the primary on purpose.
+            return {
+                alias
+                for alias in databases
+                if any(
+                    not is_cache_query(query["sql"])
+                    for query in queries[alias].captured_queries
+                )
+            }
+
+        def in_transaction():
+            with transaction.atomic():
+                return read(factory.get("/"))
+
+        routers.unpin(user)
+        cases = [
+            ("safe request", lambda: read(factory.get("/")), "replica"),
+            ("unsafe request", lambda: read(factory.post("/")), "primary"),
+            ("safe request after a write", lambda: read(factory.get("/")), "primary"),
+            ("transaction", in_transaction, "primary"),
+        ]
+
+        failures = []
+        for name, call, expected in cases:
+            databases = call()
+            if expected == "primary":
+                passed = databases == {DEFAULT_DB_ALIAS}
+            else:
+                passed = len(databases) == 1 and databases <= set(
+                    settings.DATABASE_REPLICAS
+                )
+            status = "ok" if passed else f"read from {', '.join(sorted(databases))}"
+            self.stdout.write(f"{name:<40}{status}")
+            if not passed:
+                failures.append(name)
+        routers.unpin(user)
+
+        if failures:
+            raise CommandError(f"Misrouted reads in: {', '.join(failures)}.")
@@ -0,0 +1,359 @@
+# Core
+import time
+import random
+import itertools
+from datetime import datetime, timedelta, timezone
+
+# Libs
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.db import connection, transaction
+from django.utils.timezone import now
+from django.core.management.base import BaseCommand, CommandError
+
+# Apps
+from apps.users.models import Follow, User
+from apps.users.services.user import DEFAULT_GROUPS
+from apps.posts.models import Comment, Like, Publication
+from apps.posts.models.publication import CODE_BLOCK_SIZE, CODE_LENGTH, CODE_SEQUENCE
+
+# Global
+from common.codes import CodeAllocator
+from common.db import copy_rows
+from common.functions import parse_date
+
+_FIRST_NAMES = ["Ana", "Ben", "Chloé", "Diego", "Emma", "Femi", "Hana", "Ivan", "Lea"]
+_LAST_NAMES = ["Silva", "Smith", "Müller", "García", "Okafor", "Tanaka", "Rossi"]
+_WORDS = (
+    "nice great love this photo wow so cool amazing where is that beautiful "
+    "light colors view summer trip friends again miss you best day ever"
+).split()
+
+_AUDIT_COLUMNS = ["created_at", "updated_at", "created_by_id", "updated_by_id"]
+
+
+def reserve_ids(model, count: int) -> int:
+    """
+    Return the first of `count` consecutive ids taken from a model's sequence.
+
+    The table must be locked, so no other insert takes a value in between.
+    """
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+            "nextval(pg_get_serial_sequence(%s, 'id')) + %s - 1)",
+            [table, table, count],
+        )
+        return cursor.fetchone()[0] - count + 1
+
+
+def power_law(count: int, exponent: float) -> list[float]:
+    """Return the weights of ranks 0 to `count - 1`, the first heaviest."""
+    return [(rank + 1) ** -exponent for rank in range(count)]
+
+
+class Command(BaseCommand):
+    """Bulk load a synthetic social graph, for load tests and benchmarks."""
+
+    help = (
+        "Generate users, follows, publications, likes and comments with "
+        "Postgres COPY. Followers follow a power law, user 0 of the prefix is "
+        "the most followed and the most liked. The same seed and --until "
+        "generate the same rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100_000)
+        parser.add_argument(
+            "--follows", type=float, default=20, help="Mean follows per user."
+        )
+        parser.add_argument(
+            "--publications", type=float, default=3, help="Mean per user."
+        )
+        parser.add_argument("--likes", type=float, default=10, help="Mean per user.")
+        parser.add_argument("--comments", type=float, default=2, help="Mean per user.")
+        parser.add_argument(
+            "--exponent",
+            type=float,
+            default=1.0,
+            help="Power-law exponent of user popularity, higher is more skewed.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--days", type=int, default=365, help="Days the activity spans."
+        )
+        parser.add_argument(
+            "--until",
+            type=parse_date,
+            help="Last day of activity, YYYY-MM-DD, today by default.",
+        )
+        parser.add_argument(
+            "--prefix",
+            default="load",
+            help="Username and email prefix of the generated users.",
+        )
+        parser.add_argument(
+            "--password",
+            help="Password of every generated user, unusable by default.",
+        )
+
+    def handle(self, *args, **options):
+        users_count = options["users"]
+        prefix = options["prefix"]
+        if users_count < 2:
+            raise CommandError("At least 2 users are required.")
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(f"Users prefixed {prefix!r} exist, use another prefix.")
+
+        self.rng = random.Random(options["seed"])
+        until = options["until"]
+        self.end = (
+            datetime.combine(until, datetime.max.time(), timezone.utc).timestamp()
+            if until
+            else now().timestamp()
+        )
+        self.start = self.end - timedelta(days=options["days"]).total_seconds()
+        popularity = power_law(users_count, options["exponent"])
+
+        with transaction.atomic():
+            # No insert may take ids from the ranges `reserve_ids` hands out.
+            with connection.cursor() as cursor:
+                tables = ", ".join(
+                    model._meta.db_table for model in (User, Publication)
+                )
+                cursor.execute(f"LOCK TABLE {tables} IN EXCLUSIVE MODE")
+
+            first_user = self.load_users(users_count, prefix, options["password"])
+            self.load_follows(
+                first_user,
+                users_count,
+                list(itertools.accumulate(popularity)),
+                options["follows"],
+            )
+            publications = self.load_publications(
+                first_user, users_count, options["publications"]
+            )
+            # Publications of popular users are liked and commented more.
+            publication_weights = list(
+                itertools.accumulate(popularity[author] for author, _ in publications)
+            )
+            self.load_likes(
+                first_user, publications, publication_weights, options["likes"]
+            )
+            self.load_comments(
+                first_user, publications, publication_weights, options["comments"]
+            )
+
+        with connection.cursor() as cursor:
+            models = (User, Follow, Publication, Like, Comment)
+            cursor.execute(
+                f"ANALYZE {', '.join(model._meta.db_table for model in models)}"
+            )
+
+    def between(self, start: float) -> float:
+        """Return a random timestamp from `start` to the end of the activity."""
+        return start + self.rng.random() * (self.end - start)
+
+    def per_user(self, mean: float) -> int:
+        """Return a random count, exponentially distributed around a mean."""
+        return int(self.rng.expovariate(1 / mean)) if mean else 0
+
+    def copy(self, model, columns: list[str], rows) -> None:
+        """Load rows into a model's table, reporting the throughput."""
+        start = time.perf_counter()
+        count = copy_rows(model._meta.db_table, columns, rows)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"{model._meta.db_table:<20} {count:>12,} rows {elapsed:>8.1f} s "
+            f"{count / max(elapsed, 1e-9):>12,.0f} rows/s"
+        )
+
+    def load_users(self, count: int, prefix: str, password: str | None) -> int:
+        """Load users, in the default groups, and return the first id."""
+        rng = self.rng
+        first = reserve_ids(User, count)
+        password = make_password(password)
+        self.joined = [self.between(self.start) for _ in range(count)]
+
+        def rows():
+            for i, joined in enumerate(self.joined):
+                at = _at(joined)
+                yield (
+                    first + i,
+                    password,
+                    False,
+                    f"{prefix}{i}",
+                    rng.choice(_FIRST_NAMES),
+                    rng.choice(_LAST_NAMES),
+                    f"{prefix}{i}@example.com",
+                    False,
+                    True,
+                    at,
+                    "",
+                    "",
+                    "",
+                    at,
+                )
+
+        self.copy(
+            User,
+            [
+                "id",
+                "password",
+                "is_superuser",
+                "username",
+                "first_name",
+                "last_name",
+                "email",
+                "is_staff",
+                "is_active",
+                "date_joined",
+                "website",
+                "description",
+                "avatar",
+                "updated_at",
+            ],
+            rows(),
+        )
+
+        groups = list(Group.objects.filter(name__in=DEFAULT_GROUPS).values_list("id"))
+        if not groups:
+            self.stderr.write("No default group exists, users get no permission.")
+        through = User.groups.through
+        self.copy(
+            through,
+            ["user_id", "group_id"],
+            ((first + i, group) for i in range(count) for (group,) in groups),
+        )
+        return first
+
+    def load_follows(
+        self, first_user: int, count: int, weights: list[float], mean: float
+    ) -> None:
+        """Load follows, the followed users drawn by popularity."""
+        rng = self.rng
+        population = range(count)
+
+        def rows():
+            for follower in population:
+                drawn = rng.choices(
+                    population, cum_weights=weights, k=min(self.per_user(mean), count)
+                )
+                for followed in sorted(set(drawn) - {follower}):
+                    at = _at(
+                        self.between(max(self.joined[follower], self.joined[followed]))
+                    )
+                    actor = first_user + follower
+                    yield actor, first_user + followed, at, at, actor, actor
+
+        self.copy(Follow, ["follower_id", "followed_id", *_AUDIT_COLUMNS], rows())
+
+    def load_publications(
+        self, first_user: int, count: int, mean: float
+    ) -> list[tuple[int, float]]:
+        """Load publications and return their author index and creation time."""
+        rng = self.rng
+        publications = [
+            (author, self.between(self.joined[author]))
+            for author in range(count)
+            for _ in range(self.per_user(mean))
+        ]
+        if not publications:
+            return publications
+
+        self.first_publication = reserve_ids(Publication, len(publications))
+        allocator = CodeAllocator(
+            sequence=CODE_SEQUENCE,
+            length=CODE_LENGTH,
+            block_size=CODE_BLOCK_SIZE,
+            key_setting="PUBLICATION_CODE_KEY",
+        )
+        codes = allocator.reserve(len(publications))
+
+        def rows():
+            for i, ((author, created), code) in enumerate(zip(publications, codes)):
+                at = _at(created)
+                actor = first_user + author
+                description = " ".join(rng.choices(_WORDS, k=rng.randint(0, 8)))
+                yield (
+                    self.first_publication + i,
+                    code,
+                    f"https://example.com/instaclone/publications/{code}.jpg",
+                    description.capitalize(),
+                    actor,
+                    at,
+                    at,
+                    actor,
+                    actor,
+                )
+
+        self.copy(
+            Publication,
+            ["id", "code", "image", "description", "user_id", *_AUDIT_COLUMNS],
+            rows(),
+        )
+        return publications
+
+    def load_likes(
+        self, first_user: int, publications: list, weights: list[float], mean: float
+    ) -> None:
+        """Load likes, the publications drawn by their author's popularity."""
+        if not publications:
+            return
+        rng = self.rng
+        population = range(len(publications))
+
+        def rows():
+            for user in range(len(self.joined)):
+                drawn = rng.choices(
+                    population,
+                    cum_weights=weights,
+                    k=min(self.per_user(mean), len(publications)),
+                )
+                for publication in sorted(set(drawn)):
+                    created = publications[publication][1]
+                    at = _at(self.between(max(created, self.joined[user])))
+                    actor = first_user + user
+                    yield self.first_publication + publication, actor, at, at, actor, actor
+
+        self.copy(Like, ["publication_id", "user_id", *_AUDIT_COLUMNS], rows())
+
+    def load_comments(
+        self, first_user: int, publications: list, weights: list[float], mean: float
+    ) -> None:
+        """Load comments, the publications drawn by their author's popularity."""
+        if not publications:
+            return
+        rng = self.rng
+        population = range(len(publications))
+
+        def rows():
+            for user in range(len(self.joined)):
+                drawn = rng.choices(
+                    population, cum_weights=weights, k=self.per_user(mean)
+                )
+                for publication in drawn:
+                    created = publications[publication][1]
+                    at = _at(self.between(max(created, self.joined[user])))
+                    actor = first_user + user
+                    text = " ".join(rng.choices(_WORDS, k=rng.randint(1, 12)))
+                    yield (
+                        text.capitalize(),
+                        self.first_publication + publication,
+                        actor,
+                        at,
+                        at,
+                        actor,
+                        actor,
+                    )
+
+        self.copy(
+            Comment,
+            ["comment", "publication_id", "user_id", *_AUDIT_COLUMNS],
+            rows(),
+        )
+
+
+def _at(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, timezone.utc)
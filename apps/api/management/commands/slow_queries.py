@@ -0,0 +1,68 @@
+# Core
+from pathlib import Path
+from collections import defaultdict
+
+# Libs
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Global
+from common.slow_queries import read_slow_queries
+
+
+class Command(BaseCommand):
+    """Dump the slowest query fingerprints recorded by the server."""
+
+    help = (
+        "Group the slow queries every server process recorded by fingerprint "
+        "and print those with the most total time, with their views, services "
+        "and latest plan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=10, help="Fingerprints shown.")
+        parser.add_argument(
+            "--plans", action="store_true", help="Print the latest plan of each."
+        )
+        parser.add_argument(
+            "--clear", action="store_true", help="Delete the recorded queries."
+        )
+
+    def handle(self, *args, top: int, plans: bool, clear: bool, **options):
+        if clear:
+            for path in Path(settings.SLOW_QUERY_DIR).glob("*.jsonl*"):
+                path.unlink(missing_ok=True)
+            self.stdout.write("Slow queries cleared.")
+            return
+
+        groups = defaultdict(list)
+        for entry in read_slow_queries():
+            groups[entry["fingerprint"]].append(entry)
+        if not groups:
+            self.stdout.write(f"No slow query in {settings.SLOW_QUERY_DIR}.")
+            return
+
+        offenders = sorted(
+            groups.values(),
+            key=lambda entries: sum(entry["duration"] for entry in entries),
+            reverse=True,
+        )
+        for rank, entries in enumerate(offenders[:top], start=1):
+            durations = [entry["duration"] * 1000 for entry in entries]
+            views = {entry["view"] for entry in entries if entry["view"]}
+            sources = {entry["source"] for entry in entries if entry["source"]}
+            self.stdout.write(
+                f"#{rank} {len(entries)} runs, total {sum(durations):.0f} ms, "
+                f"mean {sum(durations) / len(durations):.0f} ms, "
+                f"max {max(durations):.0f} ms"
+            )
+            self.stdout.write(f"   views: {', '.join(sorted(views)) or '-'}")
+            self.stdout.write(f"   sources: {', '.join(sorted(sources)) or '-'}")
+            self.stdout.write(f"   {entries[0]['fingerprint']}")
+
+            explained = [entry for entry in entries if "plan" in entry]
+            if plans and explained:
+                latest = max(explained, key=lambda entry: entry["timestamp"])
+                for line in latest["plan"].splitlines():
+                    self.stdout.write(f"      {line}")
+            self.stdout.write("")
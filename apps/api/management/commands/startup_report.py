@@ -0,0 +1,129 @@
+# Core
+import os
+import sys
+import json
+import time
+import statistics
+import subprocess
+from collections import defaultdict
+
+# Libs
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Run in a fresh interpreter, up to a worker ready to serve its first request.
+_STARTUP = """
+import json, time
+start = time.perf_counter()
+import django
+django.setup()
+setup = time.perf_counter()
+from django.core.{server} import get_{server}_application
+get_{server}_application()
+handler = time.perf_counter()
+from django.urls import Resolver404, resolve
+try:
+    resolve("/")
+except Resolver404:
+    pass
+urls = time.perf_counter()
+print(json.dumps({{
+    "django.setup": setup - start,
+    "handler": handler - setup,
+    "urls": urls - handler,
+}}))
+"""
+
+# Import times of a module: itself only, and with the modules it imported.
+ImportT = tuple[float, float]
+
+
+def import_times(output: str) -> tuple[dict[str, ImportT], set[str]]:
+    """
+    Return the `-X importtime` seconds of each module, and the modules the
+    startup code imported itself, not through another module.
+    """
+    times, top_level = {}, set()
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        own, cumulative, name = line.removeprefix("import time:").split("|")
+        module = name.strip()
+        times[module] = (int(own) / 1e6, int(cumulative) / 1e6)
+        if len(name) - len(name.lstrip()) == 1:
+            top_level.add(module)
+    return times, top_level
+
+
+class Command(BaseCommand):
+    """Report where a worker's startup time goes, module by module."""
+
+    help = (
+        "Start fresh interpreters up to a WSGI (or ASGI) handler with its URLs "
+        "loaded, like a worker before its first request, and report the "
+        "median time of each startup step, then the import time per package "
+        "and of the slowest top-level imports."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5, help="Startups timed.")
+        parser.add_argument("--top", type=int, default=15, help="Rows per table.")
+        parser.add_argument(
+            "--asgi", action="store_true", help="Start the ASGI handler instead."
+        )
+
+    def handle(self, *args, runs: int, top: int, asgi: bool, **options):
+        code = _STARTUP.format(server="asgi" if asgi else "wsgi")
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE}
+
+        steps = defaultdict(list)
+        modules = defaultdict(list)
+        top_level = set()
+        for _ in range(runs):
+            start = time.perf_counter()
+            process = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", code],
+                capture_output=True,
+                cwd=settings.BASE_DIR,
+                env=env,
+                text=True,
+            )
+            elapsed = time.perf_counter() - start
+            if process.returncode:
+                raise CommandError(f"The startup failed:\n{process.stderr[-2000:]}")
+
+            steps["total"].append(elapsed)
+            for step, seconds in json.loads(process.stdout.splitlines()[-1]).items():
+                steps[step].append(seconds)
+            times, imported = import_times(process.stderr)
+            for module, timing in times.items():
+                modules[module].append(timing)
+            top_level |= imported
+
+        own = {
+            module: statistics.median(t[0] for t in timings)
+            for module, timings in modules.items()
+        }
+        cumulative = {
+            module: statistics.median(t[1] for t in timings)
+            for module, timings in modules.items()
+        }
+
+        self.stdout.write(f"{'Step':<50}{'ms':>10}")
+        for step, timings in steps.items():
+            self.stdout.write(f"{step:<50}{statistics.median(timings) * 1000:>10.1f}")
+        self.stdout.write(
+            f"{'imports':<50}{sum(own.values()) * 1000:>10.1f}  {len(own)} modules"
+        )
+
+        packages = defaultdict(float)
+        for module, seconds in own.items():
+            packages[module.partition(".")[0]] += seconds
+        self.stdout.write(f"\n{'Package':<50}{'ms':>10}")
+        for package, seconds in sorted(packages.items(), key=lambda p: -p[1])[:top]:
+            self.stdout.write(f"{package:<50}{seconds * 1000:>10.1f}")
+
+        self.stdout.write(f"\n{'Top-level import, with its imports':<50}{'ms':>10}")
+        slowest = sorted(top_level, key=lambda module: -cumulative[module])
+        for module in slowest[:top]:
+            self.stdout.write(f"{module:<50}{cumulative[module] * 1000:>10.1f}")
@@ -0,0 +1,53 @@
+# Core
+from pathlib import Path
+
+# Libs
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Global
+from common.tracing import read_traces, waterfall
+
+
+class Command(BaseCommand):
+    """Show the traces the server exported to a file."""
+
+    help = (
+        "List the slowest traces of `TRACING_FILE`, written by every server "
+        "process with the file exporter, or print a trace as a waterfall."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("trace_id", nargs="?", help="Trace printed.")
+        parser.add_argument("--top", type=int, default=10, help="Traces listed.")
+        parser.add_argument(
+            "--clear", action="store_true", help="Delete the exported traces."
+        )
+
+    def handle(self, *args, trace_id: str | None, top: int, clear: bool, **options):
+        path = Path(settings.TRACING_FILE)
+        if clear:
+            path.unlink(missing_ok=True)
+            self.stdout.write("Traces cleared.")
+            return
+        if not path.exists():
+            self.stdout.write(f"No trace in {path}.")
+            return
+
+        traces = read_traces(str(path))
+        if trace_id:
+            trace = next(
+                (trace for trace in traces if trace.trace_id == trace_id), None
+            )
+            if trace is None:
+                raise CommandError(f"No trace {trace_id} in {path}.")
+            self.stdout.write(waterfall(trace), ending="")
+            return
+
+        slowest = sorted(traces, key=lambda trace: trace.root.duration_ms, reverse=True)
+        for trace in slowest[:top]:
+            info = trace.info()
+            self.stdout.write(
+                f"{info['trace_id']}  {info['duration_ms']:>8.1f} ms  "
+                f"{info['spans']:>4} spans  {info['name']}"
+            )
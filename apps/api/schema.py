@@ -0,0 +1,152 @@
+# Core
+import hashlib
+import logging
+import threading
+from pathlib import Path
+
+# Libs
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+
+from drf_spectacular import views
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.utils import extend_schema
+
+# Global
+from common.middleware import COMPRESSORS, choose_compressor
+
+logger = logging.getLogger(__name__)
+
+# Formats the schema is served in, by file suffix.
+RENDERERS = {"yaml": OpenApiYamlRenderer, "json": OpenApiJsonRenderer}
+
+
+class SchemaFile:
+    """A precomputed schema body, with its strong ETag."""
+
+    __slots__ = ("content", "etag")
+
+    def __init__(self, content: bytes):
+        self.content = content
+        self.etag = f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+
+
+def render_schema() -> dict[str, bytes]:
+    """Return the public schema rendered in every served format."""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=True)
+    return {
+        suffix: renderer().render(schema, renderer_context={})
+        for suffix, renderer in RENDERERS.items()
+    }
+
+
+def schema_path(suffix: str, encoding: str | None = None) -> Path:
+    """Return the file of a schema format, compressed with `encoding` if set."""
+    name = f"schema.{suffix}" + (f".{encoding}" if encoding else "")
+    return Path(settings.API_SCHEMA_DIR) / name
+
+
+def write_schema() -> list[Path]:
+    """Write the schema files, plain and compressed, and return their paths."""
+    Path(settings.API_SCHEMA_DIR).mkdir(parents=True, exist_ok=True)
+    written = []
+    for suffix, content in render_schema().items():
+        variants = {None: content}
+        for compressor in COMPRESSORS:
+            variants[compressor.encoding] = compressor().finish(content)
+        for encoding, data in variants.items():
+            path = schema_path(suffix, encoding)
+            # Renamed into place, so serving workers never read a partial file.
+            partial = path.with_name(f".{path.name}.tmp")
+            partial.write_bytes(data)
+            partial.replace(path)
+            written.append(path)
+    return written
+
+
+_lock = threading.Lock()
+_files: dict[tuple[str, str | None], SchemaFile | None] = {}
+
+
+def get_schema(suffix: str, encoding: str | None = None) -> SchemaFile | None:
+    """
+    Return a schema format, read once per process from `API_SCHEMA_DIR`.
+
+    Without the plain file, the schema is generated once in memory. Compressed
+    files may be missing, `None` is returned for them.
+    """
+    key = (suffix, encoding)
+    if key not in _files:
+        with _lock:
+            if key not in _files:
+                _files[key] = _load(suffix, encoding)
+    return _files[key]
+
+
+def _load(suffix: str, encoding: str | None) -> SchemaFile | None:
+    path = schema_path(suffix, encoding)
+    if path.exists():
+        return SchemaFile(path.read_bytes())
+    if encoding is not None:
+        return None
+
+    logger.warning(
+        "%s is missing, run `manage.py build_api_schema` on deploy.", path.name
+    )
+    return SchemaFile(render_schema()[suffix])
+
+
+class APISchemaView(views.SpectacularAPIView):
+    """
+    API schema view.
+
+    Serves the files `build_api_schema` wrote, precompressed and with a strong
+    ETag. The schema is generated on each request in debug mode only, or for
+    another language or version.
+    """
+
+    # Authenticating the request only.
+    query_budget = 1
+
+    @extend_schema(**views.SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        if settings.DEBUG or "lang" in request.GET or "version" in request.GET:
+            return super().get(request, *args, **kwargs)
+
+        suffix = request.accepted_renderer.format
+        compressor = choose_compressor(request.headers.get("Accept-Encoding", ""))
+        encoding = compressor and compressor.encoding
+        plain = get_schema(suffix)
+        schema_file = encoding and get_schema(suffix, encoding)
+        if not schema_file:
+            # Compressed on the fly by `CompressionMiddleware`.
+            encoding, schema_file = None, plain
+
+        # Like `CompressionMiddleware`, compressed bodies get a weak ETag.
+        etag = f"W/{plain.etag}" if encoding else plain.etag
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(
+                schema_file.content,
+                content_type=f"{request.accepted_media_type}; charset=utf-8",
+                headers={
+                    "Content-Disposition": (
+                        f'inline; filename="{self._get_filename(request, None)}"'
+                    )
+                },
+            )
+            if encoding:
+                response.headers["Content-Encoding"] = encoding
+        response.headers["ETag"] = etag
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
+
+
+class APISpecsView(views.SpectacularRedocView):
+    """API specifications view."""
+
+    url_name = "api:schema"
+    query_budget = 1
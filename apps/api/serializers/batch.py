@@ -0,0 +1,46 @@
+# Core
+import re
+
+# Libs
+from django.conf import settings
+
+from rest_framework import serializers as srz
+
+# Global
+from common.serializers import Serializer
+
+# Most sub-requests of a batch.
+MAX_BATCH_REQUESTS = 20
+
+
+class BatchItemSerializer(Serializer):
+    """A batched sub-request input serializer."""
+
+    path = srz.RegexField(
+        rf"^{re.escape(settings.API_URL)}[^?#]*$",
+        help_text="API path, e.g. `/api/users/user/<username>/get/`.",
+    )
+    query = srz.CharField(
+        help_text="Query string, without the `?`.",
+        required=False,
+        allow_blank=True,
+        default="",
+    )
+
+
+class BatchSerializer(Serializer):
+    """A batch of GET sub-requests input serializer."""
+
+    requests = srz.ListField(
+        child=BatchItemSerializer(),
+        allow_empty=False,
+        max_length=MAX_BATCH_REQUESTS,
+        help_text=f"Sub-requests, at most {MAX_BATCH_REQUESTS}.",
+    )
+
+
+class BatchResultInfoSerializer(Serializer):
+    """A batched sub-request result output serializer."""
+
+    status = srz.IntegerField(help_text="HTTP status code.")
+    body = srz.JSONField(help_text="Response body, as the endpoint returns it.")
@@ -0,0 +1,70 @@
+# Libs
+from rest_framework import serializers as srz
+
+# Global
+from common.serializers import Serializer
+
+
+class PoolStatsInfoSerializer(Serializer):
+    """A database connection pool stats output serializer."""
+
+    alias = srz.CharField(help_text="Database alias.")
+    pooled = srz.BooleanField(help_text="Are connections pooled?")
+    conn_max_age = srz.IntegerField(
+        help_text="Seconds a connection is kept open, when not pooled.",
+        required=False,
+        allow_null=True,
+    )
+    min_size = srz.IntegerField(help_text="Minimum pool size.", required=False)
+    max_size = srz.IntegerField(help_text="Maximum pool size.", required=False)
+    size = srz.IntegerField(help_text="Open connections.", required=False)
+    available = srz.IntegerField(help_text="Idle connections.", required=False)
+    in_use = srz.IntegerField(help_text="Connections in use.", required=False)
+    saturation = srz.FloatField(
+        help_text="Share of the maximum pool size in use.",
+        required=False,
+    )
+    requests_waiting = srz.IntegerField(
+        help_text="Requests waiting for a connection.",
+        required=False,
+    )
+    requests = srz.IntegerField(help_text="Connection requests.", required=False)
+    requests_queued = srz.IntegerField(
+        help_text="Requests that had to wait for a connection.",
+        required=False,
+    )
+    requests_wait_ms = srz.IntegerField(
+        help_text="Total time spent waiting for a connection.",
+        required=False,
+    )
+    requests_errors = srz.IntegerField(
+        help_text="Requests that timed out or failed.",
+        required=False,
+    )
+    connections = srz.IntegerField(help_text="Connections opened.", required=False)
+    connections_errors = srz.IntegerField(
+        help_text="Failed connection attempts.",
+        required=False,
+    )
+    connections_lost = srz.IntegerField(
+        help_text="Connections found broken by the health check.",
+        required=False,
+    )
+
+
+class ProfileInfoSerializer(Serializer):
+    """A view profile summary output serializer."""
+
+    view = srz.CharField(help_text="View name.")
+    requests = srz.IntegerField(help_text="Requests profiled.")
+    samples = srz.IntegerField(help_text="Stack samples taken.")
+
+
+class TraceInfoSerializer(Serializer):
+    """A trace summary output serializer."""
+
+    trace_id = srz.CharField(help_text="Trace ID, sent as `X-Trace-Id`.")
+    name = srz.CharField(help_text="Request method and path.")
+    start = srz.FloatField(help_text="Start, as a Unix timestamp.")
+    duration_ms = srz.FloatField(help_text="Request duration.")
+    spans = srz.IntegerField(help_text="Spans recorded.")
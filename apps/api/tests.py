@@ -0,0 +1,454 @@
+# Core
+import json
+import tempfile
+
+# Libs
+from django.urls import reverse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.test import override_settings
+from django.contrib.auth.models import Permission
+
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from drf_spectacular.views import SpectacularAPIView
+
+# Apps
+from apps.api import bench, schema
+from apps.api.apis import batch
+from apps.api.urls import urlpatterns
+from apps.api.serializers.batch import MAX_BATCH_REQUESTS
+from apps.users.models import User
+from apps.posts.services import like as like_sv
+
+# Global
+from common import tracing
+from common.decorators import get_query_budget
+from common.testing import assert_query_budget, seed_dataset
+
+
+class QueryBudgetTests(TestCase):
+    """Check that API endpoints stay within their query budgets."""
+
+    # Async views read from the replicas, test mirrors of the primary.
+    databases = "__all__"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset(users_count=50, seed=0)
+        # Permissions are checked, and cost queries, for regular users only.
+        cls.requester = User.objects.create(
+            username="querybudget", email="querybudget@example.com", is_staff=True
+        )
+        cls.requester.user_permissions.set(Permission.objects.all())
+
+    def setUp(self):
+        self.client = APIClient()
+        token = AccessToken.for_user(self.requester)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_get_endpoints(self):
+        samples = {
+            "username": self.dataset["hub"].username,
+            "code": self.dataset["publication"].code,
+            "view": "api:posts:publication:feed",
+        }
+        # A trace to look up, traces are kept in the serving process.
+        trace = tracing.Trace()
+        tracing.Span(trace, "test_get_endpoints", "request")
+        tracing.traces.append(trace)
+        samples["trace_id"] = trace.trace_id
+
+        # Unsafe endpoints are only checked when served, by the middleware.
+        for name, path, query, view in bench.get_requests(urlpatterns, samples):
+            with self.subTest(name):
+                response = self.client.get(path, QUERY_STRING=query)
+                self.assertEqual(response.status_code, 200, response.content[:200])
+
+                queries = response.wsgi_request.queries
+                budget = get_query_budget(view)
+                self.assertIsNotNone(budget, f"{name} has no query budget.")
+                self.assertLessEqual(
+                    queries.count,
+                    budget,
+                    f"{name} ran {queries.count} queries. "
+                    f"Repeated: {queries.duplicates}",
+                )
+
+    @assert_query_budget(8)
+    def test_profile(self):
+        username = self.dataset["hub"].username
+        path = reverse("api:users:user:profile", kwargs={"username": username})
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+
+    @assert_query_budget(5)
+    def test_feed(self):
+        response = self.client.get(reverse("api:posts:publication:feed"))
+        self.assertEqual(response.status_code, 200)
+
+
+class AsyncEndpointTests(TestCase):
+    """Check that async endpoints authenticate and answer as their sync twins."""
+
+    # Async views read from the replicas, test mirrors of the primary.
+    databases = "__all__"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset(users_count=20, seed=0)
+        cls.requester = User.objects.create(
+            username="async", email="async@example.com", is_staff=True
+        )
+        cls.requester.user_permissions.set(Permission.objects.all())
+
+    def setUp(self):
+        self.client = APIClient()
+        token = AccessToken.for_user(self.requester)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def async_requests(self):
+        """Yield the name, path and query of each async endpoint and its twin."""
+        samples = {
+            "username": self.dataset["hub"].username,
+            "code": self.dataset["publication"].code,
+        }
+        routes = {name: route for route, name, _view in bench.endpoints(urlpatterns)}
+        for name, route in routes.items():
+            if name.startswith("api:async:"):
+                twin = name.replace("api:async:", "api:", 1)
+                query = bench.QUERY_STRINGS.get(name, "")
+                yield name, bench.fill_route(route, samples), query
+                yield twin, bench.fill_route(routes[twin], samples), query
+
+    def test_payloads(self):
+        requests = list(self.async_requests())
+        self.assertTrue(requests)
+        for (name, path, query), (twin, twin_path, _query) in zip(
+            requests[::2], requests[1::2]
+        ):
+            with self.subTest(name):
+                response = self.client.get(path, QUERY_STRING=query)
+                self.assertEqual(response.status_code, 200, response.content[:200])
+                expected = self.client.get(twin_path, QUERY_STRING=query)
+                self.assertEqual(response.json(), expected.json())
+
+    def test_authentication(self):
+        for name, path, query in list(self.async_requests())[::2]:
+            with self.subTest(name):
+                response = APIClient().get(path, QUERY_STRING=query)
+                self.assertIn(response.status_code, (401, 403))
+
+                response = APIClient().get(
+                    path, QUERY_STRING=query, HTTP_AUTHORIZATION="Bearer invalid"
+                )
+                self.assertEqual(response.status_code, 401)
+                self.assertIn("WWW-Authenticate", response)
+
+
+class BatchTests(TestCase):
+    """Check that batched sub-requests run as the batch request's user."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset(users_count=20, seed=0)
+        cls.requester = User.objects.create(
+            username="batch", email="batch@example.com", is_staff=True
+        )
+        cls.requester.user_permissions.set(Permission.objects.all())
+        # A user who liked the publication the requester did not.
+        cls.liker = cls.dataset["user"]
+        cls.liker.user_permissions.set(Permission.objects.all())
+        cls.publication = cls.dataset["publication"]
+        liked = like_sv.is_publication_liked(
+            user=cls.liker, publication=cls.publication
+        )
+        if not liked["liked"]:
+            like_sv.add_like(user=cls.liker, publication=cls.publication)
+
+    def setUp(self):
+        self.client = APIClient()
+        token = AccessToken.for_user(self.requester)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def batch(self, *requests: dict, client: APIClient | None = None):
+        return (client or self.client).post(
+            reverse("api:batch"), {"requests": list(requests)}, format="json"
+        )
+
+    def test_statuses(self):
+        username = self.dataset["hub"].username
+        get_user = reverse("api:users:user:get", kwargs={"username": username})
+        response = self.batch(
+            {"path": get_user},
+            {"path": "/api/nothing/"},
+            {"path": reverse("api:async:users:user:search")},
+            {"path": reverse("api:batch")},
+        )
+        self.assertEqual(response.status_code, 200)
+        statuses = [item["status"] for item in response.json()]
+        self.assertEqual(statuses, [200, 404, 400, 400])
+        self.assertEqual(response.json()[0]["body"]["username"], username)
+
+    def test_max_requests(self):
+        path = reverse("api:posts:like:count", kwargs={"code": self.publication.code})
+        response = self.batch(*[{"path": path}] * MAX_BATCH_REQUESTS)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), MAX_BATCH_REQUESTS)
+
+        response = self.batch(*[{"path": path}] * (MAX_BATCH_REQUESTS + 1))
+        self.assertEqual(response.status_code, 400)
+
+    def test_api_paths_only(self):
+        for path in ["/admin/", "/metrics", "api/users/", "/api/users/?page=2"]:
+            with self.subTest(path):
+                self.assertEqual(self.batch({"path": path}).status_code, 400)
+
+    def test_user_not_switched(self):
+        liked = reverse("api:posts:like:liked", kwargs={"code": self.publication.code})
+        token = AccessToken.for_user(self.liker)
+        # Sub-requests have no headers, and tokens are not read from queries.
+        response = self.batch(
+            {
+                "path": liked,
+                "headers": {"Authorization": f"Bearer {token}"},
+                "query": f"access_token={token}",
+            }
+        )
+        self.assertEqual(response.json(), [{"status": 200, "body": {"liked": False}}])
+
+        liker = APIClient()
+        liker.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        response = self.batch({"path": liked}, client=liker)
+        self.assertEqual(response.json(), [{"status": 200, "body": {"liked": True}}])
+
+    def test_request_only_headers(self):
+        request = RequestFactory().post(
+            reverse("api:batch"),
+            data="{}",
+            content_type="application/json",
+            HTTP_AUTHORIZATION="Bearer token",
+            HTTP_IF_NONE_MATCH='"etag"',
+            HTTP_IF_MODIFIED_SINCE="Wed, 21 Oct 2015 07:28:00 GMT",
+            HTTP_ACCEPT_ENCODING="gzip",
+        )
+        request.user, request.auth = self.requester, None
+        sub = batch._sub_request(request, "/api/users/user/search/", "page=2")
+        for key in [
+            "CONTENT_LENGTH",
+            "CONTENT_TYPE",
+            "HTTP_ACCEPT_ENCODING",
+            "HTTP_IF_MODIFIED_SINCE",
+            "HTTP_IF_NONE_MATCH",
+        ]:
+            self.assertNotIn(key, sub.META)
+        self.assertEqual(sub.META["REQUEST_METHOD"], "GET")
+        self.assertEqual(sub.META["QUERY_STRING"], "page=2")
+        self.assertEqual(sub.GET["page"], "2")
+
+    def test_conditional_headers_ignored(self):
+        username = self.dataset["hub"].username
+        path = reverse("api:users:user:get", kwargs={"username": username})
+        etag = self.client.get(path)["ETag"]
+        response = self.client.post(
+            reverse("api:batch"),
+            {"requests": [{"path": path}]},
+            format="json",
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(response.json()[0]["status"], 200)
+
+    def test_anonymous(self):
+        path = reverse("api:posts:like:count", kwargs={"code": self.publication.code})
+        response = self.batch({"path": path}, client=APIClient())
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(response.json()[0]["status"], (401, 403))
+
+
+@override_settings(TRACING_RATE=1, TRACING_THRESHOLD=0)
+class TracingTests(TestCase):
+    """Check that traced requests record the services their views call."""
+
+    # Async views read from the replicas, test mirrors of the primary.
+    databases = "__all__"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset(users_count=20, seed=0)
+        cls.requester = User.objects.create(
+            username="tracing", email="tracing@example.com", is_staff=True
+        )
+        cls.requester.user_permissions.set(Permission.objects.all())
+        # Done on startup when tracing is enabled.
+        tracing.instrument_services()
+
+    def setUp(self):
+        self.client = APIClient()
+        token = AccessToken.for_user(self.requester)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def assertServiceSpans(self, path: str, services: list[str]):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200, response.content[:200])
+        trace = tracing.find_trace(response["X-Trace-Id"])
+        spans = [span.name for span in trace.spans if span.kind == "service"]
+        for service in services:
+            self.assertIn(service, spans)
+
+    def test_list_comments(self):
+        code = self.dataset["publication"].code
+        self.assertServiceSpans(
+            reverse("api:posts:comment:list", kwargs={"code": code}),
+            [
+                "apps.posts.services.publication:get_publication",
+                "apps.posts.services.comment:list_comments",
+            ],
+        )
+
+    def test_follow(self):
+        username = self.dataset["hub"].username
+        self.assertServiceSpans(
+            reverse("api:users:follow:get_followers", kwargs={"username": username}),
+            [
+                "apps.users.services.user:get_user",
+                "apps.users.services.follow:get_followers",
+            ],
+        )
+        self.assertServiceSpans(
+            reverse("api:async:users:follow:count", kwargs={"username": username}),
+            ["apps.users.services.user:aget_user"],
+        )
+
+
+class MetricsViewTests(TestCase):
+    """Check who `/metrics` is served to."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create(
+            username="staff", email="staff@example.com", is_staff=True
+        )
+        cls.user = User.objects.create(username="user", email="user@example.com")
+
+    def get(self, authorization: str = ""):
+        headers = {"Authorization": authorization} if authorization else {}
+        return self.client.get(reverse("metrics"), headers=headers)
+
+    @override_settings(METRICS_TOKEN="", METRICS_PUBLIC=False)
+    def test_staff(self):
+        self.assertEqual(self.get().status_code, 401)
+        self.assertEqual(self.get("Bearer invalid").status_code, 401)
+        token = AccessToken.for_user(self.user)
+        self.assertEqual(self.get(f"Bearer {token}").status_code, 401)
+
+        response = self.get(f"Bearer {AccessToken.for_user(self.staff)}")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"# TYPE http_requests_total counter", response.content)
+
+    @override_settings(METRICS_TOKEN="scraper", METRICS_PUBLIC=False)
+    def test_token(self):
+        self.assertEqual(self.get("Bearer scraper").status_code, 200)
+        self.assertEqual(self.get("Bearer other").status_code, 401)
+        token = AccessToken.for_user(self.staff)
+        self.assertEqual(self.get(f"Bearer {token}").status_code, 200)
+
+    @override_settings(METRICS_TOKEN="scraper", METRICS_PUBLIC=True)
+    def test_public(self):
+        self.assertEqual(self.get().status_code, 200)
+
+
+class SchemaViewTests(TestCase):
+    """Check that the schema is served from the built files, as generated."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        request = RequestFactory().get(reverse("api:schema"), {"format": "json"})
+        response = SpectacularAPIView.as_view()(request)
+        cls.generated = json.loads(response.render().content)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(DEBUG=False, API_SCHEMA_DIR=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        # Files are read once per process.
+        schema._files.clear()
+        self.addCleanup(schema._files.clear)
+
+    def get(self, query: dict | None = None, **headers):
+        return self.client.get(
+            reverse("api:schema"), {"format": "json", **(query or {})}, **headers
+        )
+
+    def test_files(self):
+        schema.write_schema()
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), self.generated)
+        self.assertNotIn("Content-Encoding", response)
+
+    def test_missing_files(self):
+        # Generated once in memory.
+        self.assertEqual(json.loads(self.get().content), self.generated)
+
+    def test_etag(self):
+        schema.write_schema()
+        response = self.get()
+        etag = response["ETag"]
+        self.assertFalse(etag.startswith("W/"))
+        self.assertEqual(self.get()["ETag"], etag)
+
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+        # Precompressed files are weak variants of the plain one.
+        response = self.get(HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["ETag"], f"W/{etag}")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        response = self.get(HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_generated(self):
+        schema.write_schema()
+        schema.schema_path("json").write_bytes(b'{"built": true}')
+        self.assertEqual(json.loads(self.get().content), {"built": True})
+
+        # Other languages and versions are generated on request.
+        for query in [{"lang": "en"}, {"version": "2.0"}]:
+            with self.subTest(**query):
+                response = self.get(query)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(json.loads(response.content)["openapi"], "3.0.3")
+                self.assertNotIn("ETag", response)
+
+
+class BenchRegressionsTests(SimpleTestCase):
+    """Check the comparison of benchmark results with a baseline."""
+
+    def result(self, p99: float, queries: float | None) -> bench.LatencyT:
+        return bench.latency([0.001] * 98 + [p99 / 1000] * 2, 1, None) | {
+            "queries": queries
+        }
+
+    def test_regressions(self):
+        baseline = {"feed": self.result(1, 4), "get": self.result(1, 3)}
+        results = {"feed": self.result(2, 4), "get": self.result(1, 5), "new": {}}
+        found = bench.regressions(results, baseline, tolerance=0.2)
+        self.assertEqual(len(found), 2)
+        self.assertTrue(found[0].startswith("feed p99"))
+        self.assertEqual(found[1], "get queries 3.0 -> 5.0")
+
+    def test_unknown_queries(self):
+        # A baseline saved from a server without DEBUG has no query counts.
+        for before, after in [(None, 5), (3, None), (None, None)]:
+            with self.subTest(before=before, after=after):
+                found = bench.regressions(
+                    {"get": self.result(1, after)},
+                    {"get": self.result(1, before)},
+                    tolerance=0.2,
+                )
+                self.assertEqual(found, [])
@@ -1,12 +1,17 @@
 from django.urls import include, path
 
 # Apps urls
+from apps.users.urls import async_urlpatterns as users_async_api
 from apps.users.urls import urlpatterns as users_api
 from apps.posts.urls.like import likes_patterns as like
 from apps.posts.urls.comment import comments_patterns as comment
 from apps.posts.urls.publication import publications_patterns as publication
+from apps.posts.urls.publication import (
+    async_publications_patterns as async_publication,
+)
 
-from apps.api.views import APISchemaView, APISpecsView
+from apps.api.apis import batch, diagnostics
+from apps.api.views import LazyView
 
 app_name = "api"
 
@@ -16,10 +21,45 @@ posts_api = [
     path("like/", include((like, app_name), namespace="like")),
 ]
 
+# Async variants of the read-heavy endpoints, on the same paths under `async/`.
+async_api = [
+    path("users/", include((users_async_api, app_name), namespace="users")),
+    path(
+        "posts/",
+        include(
+            (
+                [
+                    path(
+                        "publication/",
+                        include((async_publication, app_name), namespace="publication"),
+                    )
+                ],
+                app_name,
+            ),
+            namespace="posts",
+        ),
+    ),
+]
+
+diagnostics_api = [
+    path("database/", diagnostics.get_database_pools, name="database"),
+    path("profiles/", diagnostics.list_profiles, name="profiles"),
+    path("profiles/<str:view>/", diagnostics.get_profile, name="profile"),
+    path("traces/", diagnostics.list_traces, name="traces"),
+    path("traces/<str:trace_id>/", diagnostics.get_trace, name="trace"),
+]
+
 
 urlpatterns = [
-    path("schema/", APISchemaView.as_view(), name="schema"),
-    path("specs/", APISpecsView.as_view(), name="specs"),
+    # The schema tooling is imported on the first schema request.
+    path("schema/", LazyView("apps.api.schema.APISchemaView"), name="schema"),
+    path("specs/", LazyView("apps.api.schema.APISpecsView"), name="specs"),
     path("users/", include((users_api, app_name), namespace="users")),
     path("posts/", include((posts_api, app_name), namespace="posts")),
+    path("async/", include((async_api, app_name), namespace="async")),
+    path("batch/", batch.batch_requests, name="batch"),
+    path(
+        "diagnostics/",
+        include((diagnostics_api, app_name), namespace="diagnostics"),
+    ),
 ]
@@ -1,11 +1,72 @@
-from drf_spectacular import views
+# Core
+import hmac
 
+# Libs
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
+from django.views.decorators.http import require_GET
 
-class APISchemaView(views.SpectacularAPIView):
-    """API schema view."""
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
 
+# Global
+from common.decorators import get_query_budget
+from common.metrics import registry
 
-class APISpecsView(views.SpectacularRedocView):
-    """API specifications view."""
 
-    url_name = "api:schema"
+class LazyView:
+    """
+    A class-based view imported on its first request.
+
+    Keeps modules few requests need, like the schema tooling, out of worker
+    startup. It has no `view_class` until loaded, so URL resolving does not
+    import it either.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @cached_property
+    def view(self):
+        return import_string(self.path).as_view()
+
+    @property
+    def query_budget(self) -> int | None:
+        return get_query_budget(self.view)
+
+    def __call__(self, request, *args, **kwargs):
+        return self.view(request, *args, **kwargs)
+
+
+def _may_read_metrics(request) -> bool:
+    """Return whether a request sends `METRICS_TOKEN` or a staff user's JWT."""
+    authorization = request.headers.get("Authorization", "")
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        if hmac.compare_digest(authorization, expected):
+            return True
+
+    # `/metrics` runs no authentication middleware.
+    try:
+        authenticated = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return False
+    return authenticated is not None and authenticated[0].is_staff
+
+
+@require_GET
+def metrics(request) -> HttpResponse:
+    """
+    Return the metrics of every worker, in the Prometheus text format, to
+    scrapers sending `METRICS_TOKEN` and staff users, or anyone with
+    `METRICS_PUBLIC`.
+    """
+    if not settings.METRICS_PUBLIC and not _may_read_metrics(request):
+        return HttpResponse(status=401)
+
+    return HttpResponse(
+        registry.exposition(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -11,11 +11,16 @@ from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_sche
 # Apps
 from apps.posts.services import comment as sv
 from apps.posts.serializers import comment as srz
-from apps.posts.services.publication import get_publication
+from apps.posts.services import publication as publication_sv
 
 # Global
-from common.api import empty_response_spec
-from common.decorators import permission_required
+from common.api import (
+    empty_response_spec,
+    fields_param,
+    list_output,
+    normalize_param,
+)
+from common.decorators import conditional_get, permission_required, query_budget
 
 _comment_api_schema = partial(extend_schema, tags=["💬 Comments"])
 _comment_params = OpenApiParameter(
@@ -33,24 +38,29 @@ _comment_params = OpenApiParameter(
             name="code",
             description="Publication code.",
             location=OpenApiParameter.PATH,
-        )
+        ),
+        fields_param,
+        normalize_param,
     ],
     responses=OpenApiResponse(
         response=srz.CommentInfoSerializer(many=True),
         description="Comments successfully retrieved.",
     ),
 )
+@query_budget(6)
 @api_view(["GET"])
 @permission_required("posts.list_comment")
+@conditional_get(sv.get_comments_version)
 def list_comments(request, code: str) -> Response:
     """Return a comments' information."""
 
-    publication = get_publication(code)
-    output = srz.CommentInfoSerializer(
+    publication = publication_sv.get_publication(code, fields=["id"])
+    output = list_output(
+        request,
+        srz.CommentInfoSerializer,
         sv.list_comments(publication),
-        many=True,
     )
-    return Response(data=output.data, status=HTTP_200_OK)
+    return Response(data=output, status=HTTP_200_OK)
 
 
 # noinspection PyUnusedLocal
@@ -9,13 +9,13 @@ from rest_framework.decorators import api_view
 from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_schema
 
 # Apps
-from apps.posts.services.publication import get_publication
 from apps.posts.services import like as sv
+from apps.posts.services import publication as publication_sv
 from apps.posts.serializers import like as srz
 
 # Global
 from common.api import empty_response_spec
-from common.decorators import permission_required
+from common.decorators import permission_required, query_budget
 
 _like_api_schema = partial(extend_schema, tags=["🩷 Likes"])
 _like_params = OpenApiParameter(
@@ -34,11 +34,12 @@ _like_params = OpenApiParameter(
         description="Count likes per publication retrieved.",
     ),
 )
+@query_budget(5)
 @api_view(["GET"])
 @permission_required("posts.list_like")
 def count_likes(request, code: str) -> Response:
     """Return publications' likes."""
-    publication = get_publication(code)
+    publication = publication_sv.get_publication(code)
     output = srz.CountLikesInfoSerializer(sv.count_likes(publication))
     return Response(data=output.data, status=HTTP_200_OK)
 
@@ -52,11 +53,12 @@ def count_likes(request, code: str) -> Response:
         description="Is publication liked?.",
     ),
 )
+@query_budget(5)
 @api_view(["GET"])
 @permission_required("posts.view_like")
 def is_liked(request, code: str) -> Response:
     """Check if a user has already liked the publication."""
-    publication = get_publication(code)
+    publication = publication_sv.get_publication(code)
     output = srz.LikedInfoSerializer(
         sv.is_publication_liked(
             user=request.user,
@@ -75,7 +77,7 @@ def is_liked(request, code: str) -> Response:
 @permission_required("posts.create_like")
 def add_like(request, code: str) -> Response:
     """Like a publication."""
-    publication = get_publication(code)
+    publication = publication_sv.get_publication(code)
     sv.add_like(user=request.user, publication=publication)
     return Response(status=HTTP_200_OK)
 
@@ -90,6 +92,6 @@ def add_like(request, code: str) -> Response:
 @permission_required("posts.change_like")
 def remove_like(request, code: str) -> Response:
     """Remove a like from a publication."""
-    publication = get_publication(code)
+    publication = publication_sv.get_publication(code)
     sv.remove_like(user=request.user, publication=publication)
     return Response(status=HTTP_200_OK)
@@ -5,6 +5,7 @@ from functools import partial
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
 from django.core.paginator import Paginator, EmptyPage
+from django.core.validators import ValidationError
 from rest_framework.status import HTTP_200_OK, HTTP_201_CREATED, HTTP_204_NO_CONTENT
 
 from drf_spectacular.types import OpenApiTypes
@@ -15,9 +16,24 @@ from apps.posts.services import publication as sv
 from apps.posts.serializers import publication as srz
 
 # Global
-from common.api import empty_response_spec
-from common.decorators import permission_required
+from common.api import (
+    alist_output,
+    empty_response_spec,
+    fields_param,
+    list_output,
+    normalize_param,
+    output_serializer,
+)
+from common.decorators import (
+    async_api_view,
+    conditional_get,
+    permission_required,
+    query_budget,
+)
+
 
+# Publications per page of the feed.
+FEED_PAGE_SIZE = 4
 
 _publication_api_schema = partial(extend_schema, tags=["📸 Publications"])
 _publication_params = OpenApiParameter(
@@ -30,38 +46,44 @@ _publication_params = OpenApiParameter(
 # noinspection PyUnusedLocal
 @_publication_api_schema(
     summary="Get publication",
-    parameters=[_publication_params],
+    parameters=[_publication_params, fields_param],
     responses=OpenApiResponse(
         response=srz.PublicationInfoSerializer,
         description="Publication successfully retrieved.",
     ),
 )
+@query_budget(5)
 @api_view(["GET"])
 @permission_required("posts.view_publication")
+@conditional_get(sv.get_publication_version)
 def get_publication(request, code: str) -> Response:
     """Get a single publication."""
-    output = srz.PublicationInfoSerializer(sv.get_publication(code))
-    return Response(data=output.data, status=HTTP_200_OK)
+    compiled = output_serializer(request, srz.PublicationInfoSerializer)
+    publication = sv.get_publication(code, fields=compiled.values_fields)
+    return Response(data=compiled.one(publication), status=HTTP_200_OK)
 
 
 # noinspection PyUnusedLocal
 @_publication_api_schema(
     summary="List publications",
-    parameters=[_publication_params],
+    parameters=[_publication_params, fields_param, normalize_param],
     responses=OpenApiResponse(
         response=srz.PublicationInfoSerializer(many=True),
         description="Publications successfully retrieved.",
     ),
 )
+@query_budget(5)
 @api_view(["GET"])
 @permission_required("posts.list_publication")
+@conditional_get(sv.get_publications_version)
 def list_publications(request, username: str) -> Response:
     """Return a publications' information."""
-    output = srz.PublicationInfoSerializer(
+    output = list_output(
+        request,
+        srz.PublicationInfoSerializer,
         sv.list_publications(username),
-        many=True,
     )
-    return Response(data=output.data, status=HTTP_200_OK)
+    return Response(data=output, status=HTTP_200_OK)
 
 
 # noinspection PyUnusedLocal
@@ -74,12 +96,15 @@ def list_publications(request, username: str) -> Response:
             type=OpenApiTypes.INT,
             required=True,
         ),
+        fields_param,
+        normalize_param,
     ],
     responses=OpenApiResponse(
         response=srz.PublicationInfoSerializer(many=True),
         description="Publications feed successfully retrieved.",
     ),
 )
+@query_budget(5)
 @api_view(["GET"])
 @permission_required("posts.list_publication")
 def get_publications_feed(request) -> Response:
@@ -91,17 +116,17 @@ def get_publications_feed(request) -> Response:
 
     # Paginator
     publications = sv.get_publications_feed(user=request.user)
-    paginator = Paginator(publications, per_page=4)
+    paginator = Paginator(publications, per_page=FEED_PAGE_SIZE)
     page_number = request.query_params.get("page", 1)
 
     try:
-        page = paginator.page(page_number)
+        publications = paginator.page(page_number).object_list
     except EmptyPage:
-        # Return an empty array if the requested page is out of range.
-        return Response(data=[], status=HTTP_200_OK)
+        # Return no items if the requested page is out of range.
+        publications = []
 
-    output = srz.PublicationInfoSerializer(page, many=True)
-    return Response(data=output.data, status=HTTP_200_OK)
+    output = list_output(request, srz.PublicationInfoSerializer, publications)
+    return Response(data=output, status=HTTP_200_OK)
 
 
 @_publication_api_schema(
@@ -161,3 +186,54 @@ def delete_publication(request, code: str) -> Response:
     publication = sv.get_publication(code)
     sv.delete_publication(publication=publication, request_user=request.user)
     return Response(status=HTTP_204_NO_CONTENT)
+
+
+# ==== Async variants, for ASGI servers ====
+@query_budget(5)
+@async_api_view(["GET"])
+@permission_required("posts.view_publication")
+@conditional_get(sv.aget_publication_version)
+async def aget_publication(request, code: str) -> Response:
+    """Get a single publication, like `get_publication`."""
+    compiled = output_serializer(request, srz.PublicationInfoSerializer)
+    publication = await sv.aget_publication(code, fields=compiled.values_fields)
+    return Response(data=compiled.one(publication), status=HTTP_200_OK)
+
+
+@query_budget(5)
+@async_api_view(["GET"])
+@permission_required("posts.list_publication")
+@conditional_get(sv.aget_publications_version)
+async def alist_publications(request, username: str) -> Response:
+    """Return a publications' information, like `list_publications`."""
+    output = await alist_output(
+        request,
+        srz.PublicationInfoSerializer,
+        sv.list_publications(username),
+    )
+    return Response(data=output, status=HTTP_200_OK)
+
+
+@query_budget(5)
+@async_api_view(["GET"])
+@permission_required("posts.list_publication")
+async def aget_publications_feed(request) -> Response:
+    """
+    Retrieve the publication feed for the user, like `get_publications_feed`.
+
+    Pages out of range are empty, found without counting the feed.
+    """
+    try:
+        page_number = int(request.query_params.get("page", 1))
+    except ValueError:
+        raise ValidationError({"page": "Must be an integer."})
+
+    start = (page_number - 1) * FEED_PAGE_SIZE
+    publications = await sv.aget_publications_feed(user=request.user)
+    if start >= 0:
+        publications = publications[start : start + FEED_PAGE_SIZE]
+    else:
+        publications = publications.none()
+
+    output = await alist_output(request, srz.PublicationInfoSerializer, publications)
+    return Response(data=output, status=HTTP_200_OK)
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+# Block starts step by 32 and never exceed the 62**6 six-character code space.
+CODE_SEQUENCE_SQL = """
+CREATE SEQUENCE posts_publication_code_seq
+    AS bigint
+    INCREMENT BY 32
+    MINVALUE 0
+    MAXVALUE 56800235552
+    START WITH 0;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0002_alter_comment_publication_alter_comment_user_and_more"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=CODE_SEQUENCE_SQL,
+            reverse_sql="DROP SEQUENCE posts_publication_code_seq;",
+        ),
+    ]
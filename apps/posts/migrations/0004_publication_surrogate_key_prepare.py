@@ -0,0 +1,52 @@
+from django.db import migrations
+
+# Step 1/4 of moving `Publication` to an integer primary key.
+#
+# Only catalog changes: the new columns are nullable with no default on
+# existing rows, so no table is rewritten. Triggers keep the new like and
+# comment references in sync with writes made while the backfill runs.
+PREPARE_SQL = """
+ALTER TABLE posts_publication ADD COLUMN id bigint;
+CREATE SEQUENCE posts_publication_id_seq AS bigint OWNED BY posts_publication.id;
+ALTER TABLE posts_publication
+    ALTER COLUMN id SET DEFAULT nextval('posts_publication_id_seq');
+
+ALTER TABLE posts_like ADD COLUMN publication_ref bigint;
+ALTER TABLE posts_comment ADD COLUMN publication_ref bigint;
+
+CREATE FUNCTION posts_publication_ref_sync() RETURNS trigger AS $$
+BEGIN
+    SELECT id INTO NEW.publication_ref
+    FROM posts_publication
+    WHERE code = NEW.publication_id;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER posts_like_publication_ref_sync
+    BEFORE INSERT OR UPDATE OF publication_id ON posts_like
+    FOR EACH ROW EXECUTE FUNCTION posts_publication_ref_sync();
+CREATE TRIGGER posts_comment_publication_ref_sync
+    BEFORE INSERT OR UPDATE OF publication_id ON posts_comment
+    FOR EACH ROW EXECUTE FUNCTION posts_publication_ref_sync();
+"""
+
+PREPARE_REVERSE_SQL = """
+DROP TRIGGER posts_comment_publication_ref_sync ON posts_comment;
+DROP TRIGGER posts_like_publication_ref_sync ON posts_like;
+DROP FUNCTION posts_publication_ref_sync();
+ALTER TABLE posts_comment DROP COLUMN publication_ref;
+ALTER TABLE posts_like DROP COLUMN publication_ref;
+ALTER TABLE posts_publication DROP COLUMN id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0003_publication_code_sequence"),
+    ]
+
+    operations = [
+        migrations.RunSQL(sql=PREPARE_SQL, reverse_sql=PREPARE_REVERSE_SQL),
+    ]
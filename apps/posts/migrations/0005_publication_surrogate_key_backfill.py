@@ -0,0 +1,116 @@
+from django.db import migrations, transaction
+
+# Step 2/4 of moving `Publication` to an integer primary key.
+#
+# Runs outside a transaction: every batch commits on its own and indexes are
+# built concurrently, so reads and writes keep flowing while it runs.
+BATCH_SIZE = 5000
+
+
+def _backfill_publications(connection) -> None:
+    """Assign ids to existing publications in code order."""
+    last_code = ""
+    while True:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cur:
+            cur.execute(
+                "SELECT code FROM posts_publication "
+                "WHERE code > %s ORDER BY code LIMIT %s",
+                [last_code, BATCH_SIZE],
+            )
+            codes = [row[0] for row in cur.fetchall()]
+            if not codes:
+                return
+
+            cur.execute(
+                "UPDATE posts_publication "
+                "SET id = nextval('posts_publication_id_seq') "
+                "WHERE code = ANY(%s) AND id IS NULL",
+                [codes],
+            )
+            last_code = codes[-1]
+
+
+def _backfill_references(connection, table: str) -> None:
+    """Point existing like/comment rows at the publication ids."""
+    with connection.cursor() as cur:
+        cur.execute(f"SELECT min(id), max(id) FROM {table}")
+        low, high = cur.fetchone()
+
+    if low is None:
+        return
+
+    for start in range(low, high + 1, BATCH_SIZE):
+        with transaction.atomic(using=connection.alias), connection.cursor() as cur:
+            cur.execute(
+                f"UPDATE {table} AS t SET publication_ref = p.id "
+                "FROM posts_publication AS p "
+                "WHERE t.id >= %s AND t.id < %s "
+                "AND t.publication_ref IS NULL AND p.code = t.publication_id",
+                [start, start + BATCH_SIZE],
+            )
+
+
+def backfill(apps, schema_editor):
+    """Backfill the surrogate key and the references to it."""
+    connection = schema_editor.connection
+    _backfill_publications(connection)
+    _backfill_references(connection, "posts_like")
+    _backfill_references(connection, "posts_comment")
+
+
+# Validated NOT NULL checks let the swap set NOT NULL without a table scan.
+NOT_NULL_SQL = """
+ALTER TABLE posts_publication ADD CONSTRAINT posts_publication_id_not_null_check
+    CHECK (id IS NOT NULL) NOT VALID;
+ALTER TABLE posts_publication VALIDATE CONSTRAINT posts_publication_id_not_null_check;
+ALTER TABLE posts_like ADD CONSTRAINT posts_like_publication_ref_not_null_check
+    CHECK (publication_ref IS NOT NULL) NOT VALID;
+ALTER TABLE posts_like VALIDATE CONSTRAINT posts_like_publication_ref_not_null_check;
+ALTER TABLE posts_comment ADD CONSTRAINT posts_comment_publication_ref_not_null_check
+    CHECK (publication_ref IS NOT NULL) NOT VALID;
+ALTER TABLE posts_comment
+    VALIDATE CONSTRAINT posts_comment_publication_ref_not_null_check;
+"""
+
+NOT_NULL_REVERSE_SQL = """
+ALTER TABLE posts_publication DROP CONSTRAINT posts_publication_id_not_null_check;
+ALTER TABLE posts_like DROP CONSTRAINT posts_like_publication_ref_not_null_check;
+ALTER TABLE posts_comment
+    DROP CONSTRAINT posts_comment_publication_ref_not_null_check;
+"""
+
+INDEXES = {
+    "posts_publication_id_key": "UNIQUE INDEX ON posts_publication (id)",
+    "posts_publication_code_key": "UNIQUE INDEX ON posts_publication (code)",
+    "posts_like_publication_ref_idx": "INDEX ON posts_like (publication_ref)",
+    "posts_like_publication_ref_user_key": (
+        "UNIQUE INDEX ON posts_like (publication_ref, user_id)"
+    ),
+    "posts_comment_publication_ref_idx": "INDEX ON posts_comment (publication_ref)",
+}
+
+
+def _create_index_sql(name: str, definition: str) -> str:
+    kind, target = definition.split(" ON ")
+    return f"CREATE {kind} CONCURRENTLY IF NOT EXISTS {name} ON {target};"
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("posts", "0004_publication_surrogate_key_prepare"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.RunSQL(sql=NOT_NULL_SQL, reverse_sql=NOT_NULL_REVERSE_SQL),
+        *(
+            migrations.RunSQL(
+                sql=_create_index_sql(name, definition),
+                reverse_sql=f"DROP INDEX CONCURRENTLY IF EXISTS {name};",
+            )
+            for name, definition in INDEXES.items()
+        ),
+    ]
@@ -0,0 +1,100 @@
+import django.core.validators
+from django.db import migrations, models
+
+# Step 3/4 of moving `Publication` to an integer primary key.
+#
+# A short metadata-only swap: every index it needs was built concurrently
+# and every NOT NULL is backed by an already validated check. Foreign keys
+# are added as NOT VALID and validated by the next migration.
+SWAP_SQL = """
+DROP TRIGGER posts_comment_publication_ref_sync ON posts_comment;
+DROP TRIGGER posts_like_publication_ref_sync ON posts_like;
+DROP FUNCTION posts_publication_ref_sync();
+
+-- Likes: replace the code reference, keeping one like per user.
+ALTER TABLE posts_like DROP COLUMN publication_id;
+ALTER TABLE posts_like RENAME COLUMN publication_ref TO publication_id;
+ALTER TABLE posts_like ALTER COLUMN publication_id SET NOT NULL;
+ALTER TABLE posts_like DROP CONSTRAINT posts_like_publication_ref_not_null_check;
+ALTER INDEX posts_like_publication_ref_idx RENAME TO posts_like_publication_id_idx;
+ALTER TABLE posts_like
+    ADD CONSTRAINT posts_like_unique_user_publication_like_check
+    UNIQUE USING INDEX posts_like_publication_ref_user_key;
+
+-- Comments: replace the code reference.
+ALTER TABLE posts_comment DROP COLUMN publication_id;
+ALTER TABLE posts_comment RENAME COLUMN publication_ref TO publication_id;
+ALTER TABLE posts_comment ALTER COLUMN publication_id SET NOT NULL;
+ALTER TABLE posts_comment
+    DROP CONSTRAINT posts_comment_publication_ref_not_null_check;
+ALTER INDEX posts_comment_publication_ref_idx
+    RENAME TO posts_comment_publication_id_idx;
+
+-- Publications: `id` becomes the primary key, `code` stays unique.
+ALTER TABLE posts_publication DROP CONSTRAINT posts_publication_pkey;
+ALTER TABLE posts_publication ALTER COLUMN id SET NOT NULL;
+ALTER TABLE posts_publication DROP CONSTRAINT posts_publication_id_not_null_check;
+ALTER TABLE posts_publication
+    ADD CONSTRAINT posts_publication_pkey
+    PRIMARY KEY USING INDEX posts_publication_id_key;
+ALTER TABLE posts_publication
+    ADD CONSTRAINT posts_publication_code_key
+    UNIQUE USING INDEX posts_publication_code_key;
+
+-- Match the identity column Django creates for `BigAutoField`.
+ALTER TABLE posts_publication ALTER COLUMN id DROP DEFAULT;
+DROP SEQUENCE posts_publication_id_seq;
+ALTER TABLE posts_publication ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY;
+SELECT setval(
+    pg_get_serial_sequence('posts_publication', 'id'),
+    coalesce(max(id), 0) + 1,
+    false
+) FROM posts_publication;
+
+ALTER TABLE posts_like
+    ADD CONSTRAINT posts_like_publication_id_fk_posts_publication_id
+    FOREIGN KEY (publication_id) REFERENCES posts_publication (id)
+    DEFERRABLE INITIALLY DEFERRED NOT VALID;
+ALTER TABLE posts_comment
+    ADD CONSTRAINT posts_comment_publication_id_fk_posts_publication_id
+    FOREIGN KEY (publication_id) REFERENCES posts_publication (id)
+    DEFERRABLE INITIALLY DEFERRED NOT VALID;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0005_publication_surrogate_key_backfill"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunSQL(sql=SWAP_SQL)],
+            state_operations=[
+                migrations.AddField(
+                    model_name="publication",
+                    name="id",
+                    field=models.BigAutoField(
+                        auto_created=True,
+                        default=None,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                    preserve_default=False,
+                ),
+                migrations.AlterField(
+                    model_name="publication",
+                    name="code",
+                    field=models.CharField(
+                        max_length=6,
+                        unique=True,
+                        validators=[
+                            django.core.validators.RegexValidator("^[0-9A-Za-z]{6}$")
+                        ],
+                    ),
+                ),
+            ],
+        ),
+    ]
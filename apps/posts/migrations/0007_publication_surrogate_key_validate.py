@@ -0,0 +1,22 @@
+from django.db import migrations
+
+# Step 4/4 of moving `Publication` to an integer primary key.
+#
+# Validating takes a lock that still allows reads and writes on both tables.
+VALIDATE_SQL = """
+ALTER TABLE posts_like
+    VALIDATE CONSTRAINT posts_like_publication_id_fk_posts_publication_id;
+ALTER TABLE posts_comment
+    VALIDATE CONSTRAINT posts_comment_publication_id_fk_posts_publication_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0006_publication_surrogate_key_swap"),
+    ]
+
+    operations = [
+        migrations.RunSQL(sql=VALIDATE_SQL, reverse_sql=migrations.RunSQL.noop),
+    ]
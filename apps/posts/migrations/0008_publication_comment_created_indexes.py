@@ -0,0 +1,28 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes are built concurrently, so writes are not blocked meanwhile.
+    atomic = False
+
+    dependencies = [
+        ("posts", "0007_publication_surrogate_key_validate"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="publication",
+            index=models.Index(
+                fields=["user", "-created_at"],
+                name="posts_pub_user_created_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="comment",
+            index=models.Index(
+                fields=["publication", "created_at"],
+                name="posts_comment_pub_created_idx",
+            ),
+        ),
+    ]
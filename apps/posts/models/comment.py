@@ -37,6 +37,13 @@ class Comment(BaseModel):
             ("view_comment", "View comment"),
             ("change_comment", "Change comment"),
         ]
+        indexes = [
+            # Comments are listed per publication, oldest first.
+            models.Index(
+                fields=["publication", "created_at"],
+                name="posts_comment_pub_created_idx",
+            ),
+        ]
 
     def clean(self):
         """Clean comment fields."""
@@ -14,7 +14,6 @@ class Like(BaseModel):
 
     publication = models.ForeignKey(
         Publication,
-        to_field="code",
         related_name="likes",
         on_delete=models.CASCADE,
     )
@@ -11,13 +11,14 @@ from common.functions import clean_spaces
 
 
 CODE_LENGTH = 6
+CODE_SEQUENCE = "posts_publication_code_seq"
+CODE_BLOCK_SIZE = 32
 
 
 class Publication(BaseModel):
     """A publication model."""
 
     code = models.CharField(
-        primary_key=True,
         unique=True,
         validators=[
             RegexValidator(f"^[0-9A-Za-z]{{{CODE_LENGTH}}}$"),
@@ -47,6 +48,13 @@ class Publication(BaseModel):
             ("view_publication", "View publication"),
             ("change_publication", "Change publication"),
         ]
+        indexes = [
+            # Profile grids and feeds list a user's latest publications first.
+            models.Index(
+                fields=["user", "-created_at"],
+                name="posts_pub_user_created_idx",
+            ),
+        ]
         constraints = [
             models.CheckConstraint(
                 name="%(app_label)s_%(class)s_code_valid",
@@ -16,9 +16,10 @@ class AddCommentSerializer(Serializer):
         min_length=1,
         max_length=250,
     )
-    publication = srz.PrimaryKeyRelatedField(
+    publication = srz.SlugRelatedField(
+        slug_field="code",
         queryset=Publication.objects.all(),
-        help_text="Publication ID",
+        help_text="Publication code.",
     )
 
 
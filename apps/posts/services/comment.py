@@ -1,13 +1,17 @@
 # Core
 from typing import TypedDict
 
-from django.db.models import QuerySet
+from django.db.models import Count, Max, QuerySet
 from django.shortcuts import get_object_or_404
 
 # Apps
 from apps.users.models import User
 from apps.posts.models import Publication, Comment
 
+# Global
+from common.decorators import VersionT
+from common.routers import read_replica
+
 
 class TComment(TypedDict):
     """Comment fields."""
@@ -39,12 +43,25 @@ def remove_comment(*, comment: Comment) -> None:
     comment.delete()
 
 
+@read_replica
 def get_comment(comment: int) -> Comment:
     """Return a comment."""
 
     return get_object_or_404(Comment, pk=comment)
 
 
+@read_replica
+def get_comments_version(code: str) -> VersionT:
+    """Return the version of the list of comments of a publication."""
+    version = Comment.objects.filter(publication__code=code).aggregate(
+        count=Count("id"),
+        updated_at=Max("updated_at"),
+        user_updated_at=Max("user__updated_at"),
+    )
+    return {"tag": tuple(version.values())}
+
+
+@read_replica
 def list_comments(publication: Publication) -> QuerySet[Comment]:
     """Return a list of comments of a publication."""
 
@@ -52,6 +69,7 @@ def list_comments(publication: Publication) -> QuerySet[Comment]:
         Comment.objects.filter(publication=publication)
         .only("id", "created_at", "comment", "user")
         .select_related("user")
+        .order_by("created_at")
     )
 
     return comments
@@ -7,6 +7,9 @@ from django.core.exceptions import ValidationError
 from apps.users.models import User
 from apps.posts.models import Like, Publication
 
+# Global
+from common.routers import read_replica
+
 
 class CountLikes(TypedDict):
     count: int
@@ -41,12 +44,14 @@ def remove_like(*, user: User, publication: Publication) -> None:
     like.delete()
 
 
+@read_replica
 def count_likes(publication: Publication) -> CountLikes:
     """Count likes from publication."""
     count = Like.objects.filter(publication=publication).count()
     return {"count": count}
 
 
+@read_replica
 def is_publication_liked(*, user: User, publication: Publication) -> Liked:
     """Check if a user has already liked the publication."""
     liked = Like.objects.filter(user=user, publication=publication).exists()
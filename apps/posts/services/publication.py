@@ -1,23 +1,35 @@
 # Core
-from typing import TypedDict, Required, NotRequired, List
+from typing import TypedDict, Required, NotRequired, List, Sequence
 
 # Libs
-import cloudinary.uploader
-
-from django.db import transaction
-from django.db.models import QuerySet
-from django.shortcuts import get_object_or_404
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max, QuerySet
+from django.shortcuts import aget_object_or_404, get_object_or_404
 from django.core.validators import ValidationError
 
 # Apps
 from apps.users.models import User
 from apps.posts.models import Publication
+from apps.posts.models.publication import CODE_BLOCK_SIZE, CODE_LENGTH, CODE_SEQUENCE
 
 # Functions
 from apps.users.services.follow import following_users_ids
 
 # Global
 from common import functions as fn
+from common.codes import CodeAllocator
+from common.decorators import VersionT
+from common.routers import read_replica
+
+_code_allocator = CodeAllocator(
+    sequence=CODE_SEQUENCE,
+    length=CODE_LENGTH,
+    block_size=CODE_BLOCK_SIZE,
+    key_setting="PUBLICATION_CODE_KEY",
+)
+
+# Only codes generated randomly before the allocator existed can be taken.
+_CODE_ATTEMPTS = 3
 
 
 # ==== Local ====
@@ -43,7 +55,7 @@ def _remove_pub_image(image_url: str) -> None:
     public_id = fn.extract_public_id(image_url)
     with transaction.atomic():
         try:
-            cloudinary.uploader.destroy(public_id)
+            fn.cloudinary_uploader().destroy(public_id)
         except Exception as error:
             raise ValidationError({"image": str(error)})
 
@@ -59,25 +71,122 @@ def _validate_pub_context(user: User, pub: Publication) -> None:
         raise ValidationError(msg)
 
 
+def _insert_publication(pub: Publication, user_id: int) -> None:
+    """Insert a new publication, moving past codes taken by legacy rows."""
+    for _ in range(_CODE_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                pub.save(user_id, force_insert=True)
+            return
+        except IntegrityError:
+            if not Publication.objects.filter(code=pub.code).exists():
+                raise
+            pub.code = _code_allocator.allocate()
+
+    raise ValidationError({"code": "Could not allocate a publication code."})
+
+
 # ==== Services ====
+@read_replica
 def get_publications_feed(user: User) -> QuerySet[Publication]:
     """Retrieve the publication feed for the user."""
 
     users_ids = following_users_ids(user)
-    publications = (
-        Publication.objects.filter(user__in=[user.id, *users_ids])
+    return _publications_feed([user.id, *users_ids])
+
+
+@read_replica
+async def aget_publications_feed(user: User) -> QuerySet[Publication]:
+    """Return `get_publications_feed`, with the async ORM."""
+    users_ids = [user_id async for user_id in following_users_ids(user)]
+    return _publications_feed([user.id, *users_ids])
+
+
+def _publications_feed(users_ids: list[int]) -> QuerySet[Publication]:
+    return (
+        Publication.objects.filter(user__in=users_ids)
         .select_related("user")
         .order_by("-created_at")
     )
 
+
+def _publications_loading(fields: Sequence[str]) -> QuerySet[Publication]:
+    publications = Publication.objects.all()
+    if fields:
+        publications = publications.only(*fields)
+        # Without arguments, `select_related` would follow every foreign key.
+        if related := {field.split("__")[0] for field in fields if "__" in field}:
+            publications = publications.select_related(*related)
     return publications
 
 
-def get_publication(code: str) -> Publication:
-    """Return a publication."""
-    return get_object_or_404(Publication, pk=code)
+@read_replica
+def get_publication(code: str, *, fields: Sequence[str] = ()) -> Publication:
+    """Return a publication, loading only the given `fields` when provided."""
+    return get_object_or_404(_publications_loading(fields), code=code)
+
+
+@read_replica
+async def aget_publication(code: str, *, fields: Sequence[str] = ()) -> Publication:
+    """Return a publication like `get_publication`, with the async ORM."""
+    return await aget_object_or_404(_publications_loading(fields), code=code)
+
+
+def _publication_version(timestamps: tuple | None) -> VersionT | None:
+    if timestamps is None:
+        return None
+
+    return {"tag": timestamps, "last_modified": max(timestamps)}
+
+
+@read_replica
+def get_publication_version(code: str) -> VersionT | None:
+    """Return the version of a publication and its author, if it exists."""
+    timestamps = (
+        Publication.objects.filter(code=code)
+        .values_list("updated_at", "user__updated_at")
+        .first()
+    )
+    return _publication_version(timestamps)
+
+
+@read_replica
+async def aget_publication_version(code: str) -> VersionT | None:
+    """Return `get_publication_version`, with the async ORM."""
+    timestamps = (
+        await Publication.objects.filter(code=code)
+        .values_list("updated_at", "user__updated_at")
+        .afirst()
+    )
+    return _publication_version(timestamps)
+
+
+_PUBLICATIONS_VERSION = {
+    "count": Count("id"),
+    "updated_at": Max("updated_at"),
+    "user_updated_at": Max("user__updated_at"),
+}
+
+
+@read_replica
+def get_publications_version(username: str) -> VersionT:
+    """Return the version of the list of publications of a user."""
+    version = Publication.objects.filter(user__username=username).aggregate(
+        **_PUBLICATIONS_VERSION
+    )
+    return {"tag": tuple(version.values())}
+
+
+@read_replica
+async def aget_publications_version(username: str) -> VersionT:
+    """Return `get_publications_version`, with the async ORM."""
+    version = await Publication.objects.filter(user__username=username).aaggregate(
+        **_PUBLICATIONS_VERSION
+    )
+    return {"tag": tuple(version.values())}
 
 
+@read_replica
 def list_publications(username: str) -> List[Publication]:
     """Return a list of publications."""
     pubs = (
@@ -105,7 +214,7 @@ def create_publication(*, request_user: User, fields: _PubContextT) -> Publicati
     with transaction.atomic():
         # Create preliminar instance.
         publication = Publication(
-            code=fn.generate_random_code(),
+            code=_code_allocator.allocate(),
             description=fields.get("description", ""),
             user=user,
             image="",
@@ -121,8 +230,9 @@ def create_publication(*, request_user: User, fields: _PubContextT) -> Publicati
             raise ValidationError({"image": error})
 
         publication.image = secure_url
-        publication.full_clean()
-        publication.save(user.id)
+        # Allocated codes are unique by construction, skip the existence query.
+        publication.full_clean(validate_unique=False)
+        _insert_publication(publication, user.id)
 
     return publication
 
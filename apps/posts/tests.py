@@ -1 +1,376 @@
-# Create your tests here.
+# Core
+from unittest import mock
+
+# Libs
+from django.urls import reverse
+from django.utils.timezone import now
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.core.validators import ValidationError
+from django.contrib.auth.models import Permission
+
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+# Apps
+from apps.users.models import User
+from apps.posts.models import Publication
+from apps.posts.services import comment as comment_sv
+from apps.posts.services import like as like_sv
+from apps.posts.services import publication as publication_sv
+
+# Global
+from common.testing import QueryPlanTestCase, seed_dataset
+
+
+class PublicationQueryPlanTests(QueryPlanTestCase):
+    """Check that the publication services keep using indexes."""
+
+    def test_get_publications_feed(self):
+        with self.assertNoSeqScan():
+            list(publication_sv.get_publications_feed(self.dataset["user"])[:4])
+
+    def test_get_publication(self):
+        with self.assertNoSeqScan():
+            publication_sv.get_publication(self.dataset["publication"].code)
+
+    def test_get_publication_version(self):
+        with self.assertNoSeqScan():
+            publication_sv.get_publication_version(self.dataset["publication"].code)
+
+    def test_get_publications_version(self):
+        with self.assertNoSeqScan():
+            publication_sv.get_publications_version(self.dataset["member"].username)
+
+    def test_list_publications(self):
+        with self.assertNoSeqScan():
+            list(publication_sv.list_publications(self.dataset["member"].username))
+
+
+class CommentQueryPlanTests(QueryPlanTestCase):
+    """Check that the comment services keep using indexes."""
+
+    def test_add_comment(self):
+        fields = {
+            "comment": "Plan",
+            "publication": self.dataset["publication"],
+            "user": self.dataset["user"],
+        }
+        with self.assertNoSeqScan():
+            comment_sv.add_comment(fields=fields)
+
+    def test_get_comment(self):
+        with self.assertNoSeqScan():
+            comment_sv.get_comment(self.dataset["comment"].id)
+
+    def test_get_comments_version(self):
+        with self.assertNoSeqScan():
+            comment_sv.get_comments_version(self.dataset["publication"].code)
+
+    def test_list_comments(self):
+        with self.assertNoSeqScan():
+            list(comment_sv.list_comments(self.dataset["publication"]))
+
+    def test_remove_comment(self):
+        with self.assertNoSeqScan():
+            comment_sv.remove_comment(comment=self.dataset["comment"])
+
+
+class LikeQueryPlanTests(QueryPlanTestCase):
+    """Check that the like services keep using indexes."""
+
+    def test_count_likes(self):
+        with self.assertNoSeqScan():
+            like_sv.count_likes(self.dataset["publication"])
+
+    def test_is_publication_liked(self):
+        with self.assertNoSeqScan():
+            like_sv.is_publication_liked(
+                user=self.dataset["user"], publication=self.dataset["publication"]
+            )
+
+    def test_add_like(self):
+        with self.assertNoSeqScan():
+            like_sv.add_like(
+                user=self.dataset["hub"], publication=self.dataset["publication"]
+            )
+
+    def test_remove_like(self):
+        user, publication = self.dataset["hub"], self.dataset["publication"]
+        like_sv.add_like(user=user, publication=publication)
+        with self.assertNoSeqScan():
+            like_sv.remove_like(user=user, publication=publication)
+
+
+class ConditionalGetTests(TestCase):
+    """Check the ETags and `304` responses of conditional GET endpoints."""
+
+    # Async views read from the replicas, test mirrors of the primary.
+    databases = "__all__"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset(users_count=20, seed=0)
+        cls.requester = User.objects.create(
+            username="conditional", email="conditional@example.com", is_staff=True
+        )
+        cls.requester.user_permissions.set(Permission.objects.all())
+
+    def setUp(self):
+        self.client = APIClient()
+        token = AccessToken.for_user(self.requester)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.publication = self.dataset["publication"]
+
+    def assertConditional(self, path: str, fields: str, write):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertEqual(self.client.get(path)["ETag"], etag)
+
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+        response = self.client.get(path, {"fields": fields}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+        write()
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def touch_publication(self):
+        Publication.objects.filter(pk=self.publication.pk).update(updated_at=now())
+
+    def test_list_comments(self):
+        code = self.publication.code
+
+        def write():
+            comment_sv.add_comment(
+                fields={
+                    "comment": "New",
+                    "publication": self.publication,
+                    "user": self.dataset["user"],
+                }
+            )
+
+        path = reverse("api:posts:comment:list", kwargs={"code": code})
+        self.assertConditional(path, "id", write)
+
+    def test_get_publication(self):
+        code = self.publication.code
+        path = reverse("api:posts:publication:get", kwargs={"code": code})
+        self.assertConditional(path, "code", self.touch_publication)
+
+    def test_async_get_publication(self):
+        code = self.publication.code
+        path = reverse("api:async:posts:publication:get", kwargs={"code": code})
+        self.assertConditional(path, "code", self.touch_publication)
+
+    def test_async_list_publications(self):
+        username = self.publication.user.username
+        path = reverse(
+            "api:async:posts:publication:list", kwargs={"username": username}
+        )
+        self.assertConditional(path, "code", self.touch_publication)
+
+
+class SparseFieldsTests(TestCase):
+    """Check that `?fields=` selects the fields returned and the columns read."""
+
+    # Async views read from the replicas, test mirrors of the primary.
+    databases = "__all__"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset(users_count=20, seed=0)
+        cls.requester = User.objects.create(
+            username="fields", email="fields@example.com", is_staff=True
+        )
+        cls.requester.user_permissions.set(Permission.objects.all())
+
+    def setUp(self):
+        self.client = APIClient()
+        token = AccessToken.for_user(self.requester)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.publication = self.dataset["publication"]
+
+    def get(self, name: str, fields: str | None = None, **kwargs):
+        query = {"fields": fields} if fields is not None else {}
+        return self.client.get(reverse(name, kwargs=kwargs), query)
+
+    def test_get_publication(self):
+        code = self.publication.code
+        for name in ["api:posts:publication:get", "api:async:posts:publication:get"]:
+            with self.subTest(name):
+                full = self.get(name, code=code).json()
+                response = self.get(name, "code,user.username", code=code)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    response.json(),
+                    {"code": code, "user": {"username": full["user"]["username"]}},
+                )
+
+                response = self.get(name, "description,user.*", code=code)
+                self.assertEqual(
+                    response.json(),
+                    {"description": full["description"], "user": full["user"]},
+                )
+
+    def test_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(
+                "api:posts:publication:get", "code", code=self.publication.code
+            )
+        self.assertEqual(response.json(), {"code": self.publication.code})
+        # The publication is read last, after the user and version.
+        select = queries.captured_queries[-1]["sql"]
+        self.assertTrue(
+            select.startswith(
+                'SELECT "posts_publication"."id", "posts_publication"."code" FROM'
+            ),
+            select,
+        )
+        self.assertNotIn('"users_user"', select)
+
+    def test_list(self):
+        username = self.publication.user.username
+        for name in [
+            "api:posts:publication:list",
+            "api:async:posts:publication:list",
+        ]:
+            with self.subTest(name):
+                full = self.get(name, username=username).json()
+                response = self.get(name, "code", username=username)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    response.json(), [{"code": item["code"]} for item in full]
+                )
+
+    def test_unknown_field(self):
+        code = self.publication.code
+        for name in ["api:posts:publication:get", "api:async:posts:publication:get"]:
+            for fields in ["code,nope", "user.nope", "code.nope"]:
+                with self.subTest(name, fields=fields):
+                    response = self.get(name, fields, code=code)
+                    self.assertEqual(response.status_code, 400)
+                    self.assertEqual(
+                        response.json()["errors"]["fields"],
+                        f"Unknown field `{fields.split(',')[-1]}`.",
+                    )
+
+
+class NormalizeTests(TestCase):
+    """Check that `?normalize=` lists each author once, in a `users` map."""
+
+    # Async views read from the replicas, test mirrors of the primary.
+    databases = "__all__"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset(users_count=20, seed=0)
+        # A follower of several users, so the feed has several authors.
+        cls.requester = cls.dataset["user"]
+        cls.requester.user_permissions.set(Permission.objects.all())
+
+    def setUp(self):
+        self.client = APIClient()
+        token = AccessToken.for_user(self.requester)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def assertNormalized(self, path: str, key: str, fields: str = ""):
+        full = self.client.get(path).json()
+        query = {"normalize": "true"} | ({"fields": fields} if fields else {})
+        response = self.client.get(path, query)
+        self.assertEqual(response.status_code, 200)
+        normalized = response.json()
+        self.assertEqual(set(normalized), {"results", "users"})
+
+        # Items in the same order, to compare with the nested ones.
+        full.sort(key=lambda item: item[key])
+        results = sorted(normalized["results"], key=lambda item: item[key])
+        self.assertTrue(results)
+        self.assertEqual(len(results), len(full))
+        authors = {}
+        for item, result in zip(full, results):
+            user = item.pop("user")
+            result = dict(result)
+            user_id = str(result.pop("user_id"))
+            self.assertEqual(user_id, str(user["id"]))
+            self.assertEqual(result, {k: item[k] for k in result})
+            authors[user_id] = user
+        self.assertEqual(normalized["users"].keys(), authors.keys())
+        return normalized, authors
+
+    def test_feed(self):
+        for name in ["api:posts:publication:feed", "api:async:posts:publication:feed"]:
+            with self.subTest(name):
+                normalized, authors = self.assertNormalized(reverse(name), "code")
+                self.assertGreater(len(authors), 1)
+                self.assertEqual(normalized["users"], authors)
+
+    def test_list_publications(self):
+        username = self.dataset["member"].username
+        for name in [
+            "api:posts:publication:list",
+            "api:async:posts:publication:list",
+        ]:
+            with self.subTest(name):
+                path = reverse(name, kwargs={"username": username})
+                normalized, authors = self.assertNormalized(path, "code")
+                self.assertEqual(len(normalized["users"]), 1)
+                self.assertEqual(normalized["users"], authors)
+
+    def test_list_comments(self):
+        code = self.dataset["comment"].publication.code
+        path = reverse("api:posts:comment:list", kwargs={"code": code})
+        normalized, authors = self.assertNormalized(path, "id")
+        self.assertEqual(normalized["users"], authors)
+
+    def test_fields(self):
+        path = reverse("api:posts:publication:feed")
+        normalized, authors = self.assertNormalized(
+            path, "code", fields="code,user.username"
+        )
+        self.assertEqual(
+            normalized["users"],
+            {key: {"username": user["username"]} for key, user in authors.items()},
+        )
+        self.assertEqual(set(normalized["results"][0]), {"code", "user_id"})
+
+        # Without the author, there are no users to list.
+        response = self.client.get(path, {"normalize": "true", "fields": "code"})
+        self.assertEqual(response.json()["users"], {})
+        self.assertEqual(set(response.json()["results"][0]), {"code"})
+
+
+class PublicationCodeTests(TestCase):
+    """Check that a taken code is replaced by a newly allocated one."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset(users_count=20, seed=0)
+
+    def publication(self) -> Publication:
+        user = self.dataset["user"]
+        # A legacy publication already has the code.
+        code = self.dataset["publication"].code
+        return Publication(code=code, image="https://example.com/new.png", user=user)
+
+    def test_taken_code(self):
+        publication = self.publication()
+        publication_sv._insert_publication(publication, publication.user.id)
+        self.assertNotEqual(publication.code, self.dataset["publication"].code)
+        self.assertTrue(Publication.objects.filter(code=publication.code).exists())
+
+    def test_attempts(self):
+        publication = self.publication()
+        allocator = publication_sv._code_allocator
+        with mock.patch.object(allocator, "allocate", return_value=publication.code):
+            with self.assertRaises(ValidationError):
+                publication_sv._insert_publication(publication, publication.user.id)
+        self.assertEqual(Publication.objects.filter(code=publication.code).count(), 1)
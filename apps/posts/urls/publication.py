@@ -26,3 +26,10 @@ publications_patterns = [
         ),
     ),
 ]
+
+# Async variants of the read endpoints, for ASGI servers.
+async_publications_patterns = [
+    path("get_feed/", api.aget_publications_feed, name="feed"),
+    path("<str:code>/get/", api.aget_publication, name="get"),
+    path("<str:username>/list/", api.alist_publications, name="list"),
+]
@@ -9,13 +9,18 @@ from rest_framework.decorators import api_view
 from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_schema
 
 # Apps
-from apps.users.services.user import get_user
 from apps.users.services import follow as sv
+from apps.users.services import user as user_sv
 from apps.users.serializers import follow as srz
 
 # Global
-from common.api import empty_response_spec
-from common.decorators import permission_required
+from common.api import empty_response_spec, fields_param, output_serializer
+from common.decorators import (
+    async_api_view,
+    conditional_get,
+    permission_required,
+    query_budget,
+)
 
 _follow_api_schema = partial(extend_schema, tags=["🤝 Followers"])
 _follow_params = OpenApiParameter(
@@ -34,12 +39,13 @@ _follow_params = OpenApiParameter(
         description="Are you following the user?",
     ),
 )
+@query_budget(5)
 @api_view(["GET"])
 @permission_required("users.view_follow")
 def is_following(request, username: str) -> Response:
     """Check if one user is following another."""
 
-    followed = get_user(username)
+    followed = user_sv.get_user(username)
     output = srz.IsFollowingInfoSerializer(
         sv.is_following(
             follower=request.user,
@@ -52,43 +58,45 @@ def is_following(request, username: str) -> Response:
 # noinspection PyUnusedLocal
 @_follow_api_schema(
     summary="Get following",
+    parameters=[fields_param],
     responses=OpenApiResponse(
         response=srz.FollowerInfoSerializer(many=True),
         description="Following users successfully retrieved.",
     ),
 )
+@query_budget(5)
 @api_view(["GET"])
 @permission_required("users.list_follow")
 def get_following(request, username: str) -> Response:
     """Return a list of users the given user follows."""
 
-    user = get_user(username)
-    output = srz.FollowerInfoSerializer(
+    user = user_sv.get_user(username)
+    output = output_serializer(request, srz.FollowerInfoSerializer).many(
         sv.get_following(user=user),
-        many=True,
     )
-    return Response(data=output.data, status=HTTP_200_OK)
+    return Response(data=output, status=HTTP_200_OK)
 
 
 # noinspection PyUnusedLocal
 @_follow_api_schema(
     summary="Get followers",
+    parameters=[fields_param],
     responses=OpenApiResponse(
         response=srz.FollowerInfoSerializer(many=True),
         description="Followers successfully retrieved.",
     ),
 )
+@query_budget(5)
 @api_view(["GET"])
 @permission_required("users.list_follow")
 def get_followers(request, username: str) -> Response:
     """Return a list of followers of a user."""
 
-    user = get_user(username)
-    output = srz.FollowerInfoSerializer(
+    user = user_sv.get_user(username)
+    output = output_serializer(request, srz.FollowerInfoSerializer).many(
         sv.get_followers(user=user),
-        many=True,
     )
-    return Response(data=output.data, status=HTTP_200_OK)
+    return Response(data=output, status=HTTP_200_OK)
 
 
 # noinspection PyUnusedLocal
@@ -100,33 +108,36 @@ def get_followers(request, username: str) -> Response:
         description="Count data successfully retrieved.",
     ),
 )
+@query_budget(7)
 @api_view(["GET"])
 @permission_required("users.list_follow")
+@conditional_get(sv.get_follow_count_version)
 def get_follow_count(request, username: str) -> Response:
     """Return the count of followers and followed users."""
 
-    user = get_user(username)
+    user = user_sv.get_user(username)
     output = srz.FollowCountInfoSerializer(sv.get_follow_count(user=user))
     return Response(data=output.data, status=HTTP_200_OK)
 
 
 @_follow_api_schema(
     summary="Not following",
+    parameters=[fields_param],
     responses=OpenApiResponse(
         response=srz.FollowerInfoSerializer(many=True),
         description="Not following users successfully retrieved.",
     ),
 )
+@query_budget(4)
 @api_view(["GET"])
 @permission_required("users.list_follow")
 def get_not_following(request) -> Response:
     """Retrieve the publication feed for the user."""
 
-    output = srz.FollowerInfoSerializer(
+    output = output_serializer(request, srz.FollowerInfoSerializer).many(
         sv.get_recommended_users(user=request.user),
-        many=True,
     )
-    return Response(data=output.data, status=HTTP_200_OK)
+    return Response(data=output, status=HTTP_200_OK)
 
 
 @_follow_api_schema(
@@ -139,7 +150,7 @@ def get_not_following(request) -> Response:
 def add_follow(request, username: str) -> Response:
     """Add a follow between a follower and a followed user."""
 
-    followed = get_user(username)
+    followed = user_sv.get_user(username)
     sv.add_follow(follower=request.user, followed=followed)
     return Response(status=HTTP_200_OK)
 
@@ -154,6 +165,42 @@ def add_follow(request, username: str) -> Response:
 def unfollow(request, username: str) -> Response:
     """Unfollow a user."""
 
-    followed = get_user(username)
+    followed = user_sv.get_user(username)
     sv.unfollow(follower=request.user, followed=followed)
     return Response(status=HTTP_200_OK)
+
+
+# ==== Async variants, for ASGI servers ====
+@query_budget(5)
+@async_api_view(["GET"])
+@permission_required("users.list_follow")
+async def aget_following(request, username: str) -> Response:
+    """Return a list of users the given user follows, like `get_following`."""
+    user = await user_sv.aget_user(username)
+    output = await output_serializer(request, srz.FollowerInfoSerializer).amany(
+        sv.get_following(user=user),
+    )
+    return Response(data=output, status=HTTP_200_OK)
+
+
+@query_budget(5)
+@async_api_view(["GET"])
+@permission_required("users.list_follow")
+async def aget_followers(request, username: str) -> Response:
+    """Return a list of followers of a user, like `get_followers`."""
+    user = await user_sv.aget_user(username)
+    output = await output_serializer(request, srz.FollowerInfoSerializer).amany(
+        sv.get_followers(user=user),
+    )
+    return Response(data=output, status=HTTP_200_OK)
+
+
+@query_budget(7)
+@async_api_view(["GET"])
+@permission_required("users.list_follow")
+@conditional_get(sv.aget_follow_count_version)
+async def aget_follow_count(request, username: str) -> Response:
+    """Return the count of followers and followed users, like `get_follow_count`."""
+    user = await user_sv.aget_user(username)
+    output = srz.FollowCountInfoSerializer(await sv.aget_follow_count(user=user))
+    return Response(data=output.data, status=HTTP_200_OK)
@@ -14,14 +14,28 @@ from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_sche
 
 # Apps
 from apps.users.services import user as sv
+from apps.users.services import follow as follow_sv
 from apps.users.serializers import user as srz
+from apps.users.serializers.profile import UserProfileInfoSerializer
+from apps.posts.services import publication as publication_sv
+from apps.posts.serializers.publication import PublicationInfoSerializer
 
 # Global
-from common.decorators import permission_required
+from common.compiled import compile_serializer
+from common.concurrency import run_concurrently
+from common.decorators import (
+    async_api_view,
+    conditional_get,
+    permission_required,
+    query_budget,
+)
 
 # Commons
-from common.api import empty_response_spec
+from common.api import empty_response_spec, fields_param, output_serializer
+
 
+# Latest publications on a profile page.
+PROFILE_PUBLICATIONS = 12
 
 _user_api_schema = partial(extend_schema, tags=["👥 Users"])
 _username_params = OpenApiParameter(
@@ -54,39 +68,85 @@ def process_user_query_params(query_params: QueryDict) -> _UserSearchT:
 # noinspection PyUnusedLocal
 @_user_api_schema(
     summary="Get user",
-    parameters=[_username_params],
+    parameters=[_username_params, fields_param],
     responses=OpenApiResponse(
         response=srz.UserInfoSerializer,
         description="User successfully retrieved.",
     ),
 )
+@query_budget(5)
 @api_view(["GET"])
 @permission_required("users.view_user")
+@conditional_get(sv.get_user_version)
 def get_user(request, username: str) -> Response:
     """Return a user's information."""
+    compiled = output_serializer(request, srz.UserInfoSerializer)
+    user = sv.get_user(username, fields=compiled.values_fields)
+    return Response(data=compiled.one(user), status=HTTP_200_OK)
+
+
+# noinspection PyUnusedLocal
+@_user_api_schema(
+    summary="Get profile",
+    parameters=[_username_params],
+    responses=OpenApiResponse(
+        response=UserProfileInfoSerializer,
+        description="Profile successfully retrieved.",
+    ),
+)
+@query_budget(8)
+@api_view(["GET"])
+@permission_required(["users.view_user", "users.view_follow", "posts.list_publication"])
+def get_profile(request, username: str) -> Response:
+    """
+    Return what a profile page shows: the user, their follow counts, whether
+    the requesting user follows them and their latest publications.
+
+    The user is loaded once, then the other parts are queried at once.
+    """
     user = sv.get_user(username)
-    output = srz.UserInfoSerializer(user)
-    return Response(data=output.data, status=HTTP_200_OK)
+    publications = publication_sv.list_publications(username)
+    following_count, followers_count, following, publications = run_concurrently(
+        partial(follow_sv.get_following_count, user=user),
+        partial(follow_sv.get_followers_count, user=user),
+        partial(follow_sv.is_following, follower=request.user, followed=user),
+        partial(
+            compile_serializer(PublicationInfoSerializer).many,
+            publications[:PROFILE_PUBLICATIONS],
+        ),
+    )
+    output = {
+        "user": compile_serializer(srz.UserInfoSerializer).one(user),
+        "counts": {
+            "following_count": following_count,
+            "followers_count": followers_count,
+        },
+        "is_following": following["is_following"],
+        "publications": publications,
+    }
+    return Response(data=output, status=HTTP_200_OK)
 
 
 @_user_api_schema(
     summary="Search users",
     parameters=[
         OpenApiParameter("search", description="Search user parameter"),
+        fields_param,
     ],
     responses=OpenApiResponse(
         response=srz.UserSearchInfoSerializer(many=True),
         description="Users successfully retrieved.",
     ),
 )
+@query_budget(4)
 @api_view(["GET"])
 @permission_required("users.view_user")
 def search_user(request) -> Response:
     """Search users by a term, matching it with username, firstname, or lastname."""
     params = process_user_query_params(request.query_params)
     users = sv.search_user(search_term=params["search"])
-    output = srz.UserSearchInfoSerializer(users, many=True)
-    return Response(data=output.data, status=HTTP_200_OK)
+    output = output_serializer(request, srz.UserSearchInfoSerializer).many(users)
+    return Response(data=output, status=HTTP_200_OK)
 
 
 @_user_api_schema(
@@ -178,3 +238,15 @@ def remove_avatar(request, username: str) -> Response:
     data = sv.remove_avatar(user=user)
     output = srz.UserInfoSerializer(data)
     return Response(data=output.data, status=HTTP_200_OK)
+
+
+# ==== Async variants, for ASGI servers ====
+@query_budget(4)
+@async_api_view(["GET"])
+@permission_required("users.view_user")
+async def asearch_user(request) -> Response:
+    """Search users by a term, like `search_user`."""
+    params = process_user_query_params(request.query_params)
+    users = sv.search_user(search_term=params["search"])
+    output = await output_serializer(request, srz.UserSearchInfoSerializer).amany(users)
+    return Response(data=output, status=HTTP_200_OK)
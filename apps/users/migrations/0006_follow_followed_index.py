@@ -0,0 +1,21 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # The index is built concurrently, so writes are not blocked meanwhile.
+    atomic = False
+
+    dependencies = [
+        ("users", "0005_alter_user_email"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="follow",
+            index=models.Index(
+                fields=["followed", "follower"],
+                name="users_follow_followed_idx",
+            ),
+        ),
+    ]
@@ -35,6 +35,14 @@ class Follow(BaseModel):
             ("view_follow", "View follow"),
             ("change_follow", "Change follow"),
         ]
+        indexes = [
+            # Followers are looked up by the followed user, the unique
+            # constraint covers the opposite direction.
+            models.Index(
+                fields=["followed", "follower"],
+                name="users_follow_followed_idx",
+            ),
+        ]
         constraints = [
             # A user cannot follow the same person more than once.
             models.UniqueConstraint(
@@ -0,0 +1,24 @@
+# Libs
+from rest_framework import serializers as srz
+
+# Apps
+from apps.users.serializers.user import UserInfoSerializer
+from apps.users.serializers.follow import FollowCountInfoSerializer
+from apps.posts.serializers.publication import PublicationInfoSerializer
+
+# Global
+from common.serializers import Serializer
+
+
+class UserProfileInfoSerializer(Serializer):
+    """A user profile page info output serializer."""
+
+    user = UserInfoSerializer(help_text="User information.")
+    counts = FollowCountInfoSerializer(help_text="Follow counts.")
+    is_following = srz.BooleanField(
+        help_text="Is the requesting user following this one?",
+    )
+    publications = PublicationInfoSerializer(
+        many=True,
+        help_text="Latest publications of the user.",
+    )
@@ -2,12 +2,16 @@
 from typing import TypedDict, List
 
 # Libs
-from django.db.models import QuerySet
+from django.db.models import Count, Max, Q, QuerySet, Subquery
 from django.core.exceptions import ValidationError
 
 # Apps
 from apps.users.models import User, Follow
 
+# Global
+from common.decorators import VersionT
+from common.routers import read_replica
+
 
 class IsFollowingT(TypedDict):
     is_following: int
@@ -18,6 +22,7 @@ class FollowCountT(TypedDict):
     followers_count: int
 
 
+@read_replica
 def following_users_ids(user: User) -> List[int]:
     """Following users ids."""
 
@@ -29,6 +34,7 @@ def following_users_ids(user: User) -> List[int]:
     return users_ids
 
 
+@read_replica
 def is_following(*, follower: User, followed: User) -> IsFollowingT:
     """Check if one user is following another."""
 
@@ -69,16 +75,66 @@ def unfollow(*, follower: User, followed: User) -> None:
     follow_instance.delete()
 
 
+@read_replica
 def get_follow_count(*, user: User) -> FollowCountT:
     """Return the count of followers and followed users."""
     counts = {
-        "following_count": get_following(user=user).count(),
-        "followers_count": get_followers(user=user).count(),
+        "following_count": get_following_count(user=user),
+        "followers_count": get_followers_count(user=user),
     }
 
     return counts
 
 
+# Follows are unique per pair, counting them avoids joining the users.
+@read_replica
+def get_following_count(*, user: User) -> int:
+    """Return the count of users a user follows."""
+    return Follow.objects.filter(follower=user).count()
+
+
+@read_replica
+def get_followers_count(*, user: User) -> int:
+    """Return the count of followers of a user."""
+    return Follow.objects.filter(followed=user).count()
+
+
+@read_replica
+async def aget_follow_count(*, user: User) -> FollowCountT:
+    """Return the counts of `get_follow_count`, with the async ORM."""
+    return {
+        "following_count": await Follow.objects.filter(follower=user).acount(),
+        "followers_count": await Follow.objects.filter(followed=user).acount(),
+    }
+
+
+def _follow_count_versions(username: str) -> QuerySet[Follow]:
+    # Matching the user id, not joined usernames, lets both indexes be used.
+    user_id = User.objects.filter(username=username).values("id")
+    return Follow.objects.filter(
+        Q(follower=Subquery(user_id)) | Q(followed=Subquery(user_id))
+    )
+
+
+@read_replica
+def get_follow_count_version(username: str) -> VersionT:
+    """Return the version of the follow counts of a user."""
+    version = _follow_count_versions(username).aggregate(
+        count=Count("id"), updated_at=Max("updated_at")
+    )
+    return {"tag": tuple(version.values())}
+
+
+@read_replica
+async def aget_follow_count_version(username: str) -> VersionT:
+    """Return `get_follow_count_version`, with the async ORM."""
+    version = await _follow_count_versions(username).aaggregate(
+        count=Count("id"), updated_at=Max("updated_at")
+    )
+    return {"tag": tuple(version.values())}
+
+
+@read_replica
 def get_following(*, user: User) -> QuerySet[User]:
     """Return a list of users the given user follows."""
 
@@ -86,6 +142,7 @@ def get_following(*, user: User) -> QuerySet[User]:
     return following_users
 
 
+@read_replica
 def get_followers(*, user: User) -> QuerySet[User]:
     """Get the followers of a user."""
 
@@ -93,6 +150,7 @@ def get_followers(*, user: User) -> QuerySet[User]:
     return followers
 
 
+@read_replica
 def get_recommended_users(user: User) -> QuerySet[User]:
     """Retrieve the publication feed for the user."""
 
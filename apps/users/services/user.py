@@ -1,8 +1,11 @@
+# Core
+from typing import Sequence
+
 # Libs
 from django.db.models import Q
 from django.db import transaction
 from django.contrib.auth.models import Group
-from django.shortcuts import get_object_or_404
+from django.shortcuts import aget_object_or_404, get_object_or_404
 from django.core.exceptions import ValidationError
 from django.contrib.auth.hashers import make_password
 
@@ -11,8 +14,9 @@ from django.contrib.auth.hashers import make_password
 from apps.users.models import User
 
 # Global
-import cloudinary.uploader
 from common import functions as fn
+from common.decorators import VersionT
+from common.routers import read_replica
 
 
 DEFAULT_GROUPS = ["Users", "Posts", "Comments", "Followers"]
@@ -28,11 +32,35 @@ def _check_password_match(fields: dict) -> None:
 
 
 # ==== Users ====
-def get_user(username: str) -> User:
-    """Return a user."""
-    return get_object_or_404(User, username=username)
+@read_replica
+def get_user(username: str, *, fields: Sequence[str] = ()) -> User:
+    """Return a user, loading only the given `fields` when provided."""
+    users = User.objects.only(*fields) if fields else User.objects.all()
+    return get_object_or_404(users, username=username)
+
+
+@read_replica
+async def aget_user(username: str, *, fields: Sequence[str] = ()) -> User:
+    """Return a user like `get_user`, with the async ORM."""
+    users = User.objects.only(*fields) if fields else User.objects.all()
+    return await aget_object_or_404(users, username=username)
+
+
+@read_replica
+def get_user_version(username: str) -> VersionT | None:
+    """Return the version of a user, if it exists."""
+    updated_at = (
+        User.objects.filter(username=username)
+        .values_list("updated_at", flat=True)
+        .first()
+    )
+    if updated_at is None:
+        return None
+
+    return {"tag": (updated_at,), "last_modified": updated_at}
 
 
+@read_replica
 def search_user(*, search_term: str) -> list[User]:
     """Search a user."""
     users = (
@@ -109,7 +137,7 @@ def remove_avatar(*, user: User) -> User:
 
     with transaction.atomic():
         try:
-            cloudinary.uploader.destroy(public_id)
+            fn.cloudinary_uploader().destroy(public_id)
         except Exception as error:
             raise ValidationError({"avatar": str(error)})
 
@@ -0,0 +1,138 @@
+# Core
+from unittest import mock
+
+# Libs
+from django.urls import reverse
+from django.test import TransactionTestCase
+from django.contrib.auth.models import Permission
+
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+# Apps
+from apps.users.apis.user import PROFILE_PUBLICATIONS, get_profile
+from apps.users.services import follow as follow_sv
+from apps.users.services import user as user_sv
+
+# Global
+from common import concurrency
+from common.decorators import get_query_budget
+from common.testing import QueryPlanTestCase, seed_dataset
+
+
+class UserQueryPlanTests(QueryPlanTestCase):
+    """Check that the user services keep using indexes."""
+
+    def test_get_user(self):
+        with self.assertNoSeqScan():
+            user_sv.get_user(self.dataset["user"].username)
+
+    def test_get_user_version(self):
+        with self.assertNoSeqScan():
+            user_sv.get_user_version(self.dataset["user"].username)
+
+    def test_search_user(self):
+        # `icontains` needs a trigram index, which Postgres lacks by default.
+        with self.assertNoSeqScan(allowed={"users_user"}):
+            list(user_sv.search_user(search_term="user1"))
+
+    def test_update_user(self):
+        user = self.dataset["user"]
+        with self.assertNoSeqScan():
+            user_sv.update_user(user=user, request_user=user, first_name="Plan")
+
+
+class FollowQueryPlanTests(QueryPlanTestCase):
+    """Check that the follow services keep using indexes."""
+
+    def test_following_users_ids(self):
+        with self.assertNoSeqScan():
+            list(follow_sv.following_users_ids(self.dataset["user"]))
+
+    def test_is_following(self):
+        with self.assertNoSeqScan():
+            follow_sv.is_following(
+                follower=self.dataset["user"], followed=self.dataset["hub"]
+            )
+
+    def test_add_follow(self):
+        with self.assertNoSeqScan():
+            follow_sv.add_follow(
+                follower=self.dataset["hub"], followed=self.dataset["user"]
+            )
+
+    def test_unfollow(self):
+        follower, followed = self.dataset["hub"], self.dataset["user"]
+        follow_sv.add_follow(follower=follower, followed=followed)
+        with self.assertNoSeqScan():
+            follow_sv.unfollow(follower=follower, followed=followed)
+
+    def test_get_follow_count(self):
+        with self.assertNoSeqScan():
+            follow_sv.get_follow_count(user=self.dataset["member"])
+
+    def test_get_follow_count_version(self):
+        with self.assertNoSeqScan():
+            follow_sv.get_follow_count_version(self.dataset["member"].username)
+
+    def test_get_following(self):
+        with self.assertNoSeqScan():
+            list(follow_sv.get_following(user=self.dataset["user"]))
+
+    def test_get_followers(self):
+        with self.assertNoSeqScan():
+            list(follow_sv.get_followers(user=self.dataset["member"]))
+
+    def test_get_recommended_users(self):
+        # Any four users will do, the scan stops as soon as it finds them.
+        with self.assertNoSeqScan(allowed={"users_user"}):
+            list(follow_sv.get_recommended_users(self.dataset["user"]))
+
+
+class ProfileTests(TransactionTestCase):
+    """Check the profile's parts, queried at once in the thread pool."""
+
+    # Committed, the data is seen by the pool threads' connections, and by
+    # the replicas, test mirrors of the primary.
+    databases = "__all__"
+
+    def setUp(self):
+        self.dataset = seed_dataset(users_count=20, seed=0)
+        self.requester = self.dataset["user"]
+        self.requester.user_permissions.set(Permission.objects.all())
+        self.client = APIClient()
+        token = AccessToken.for_user(self.requester)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_get_profile(self):
+        hub = self.dataset["hub"]
+        following = follow_sv.is_following(follower=self.requester, followed=hub)
+        if not following["is_following"]:
+            follow_sv.add_follow(follower=self.requester, followed=hub)
+        path = reverse("api:users:user:profile", kwargs={"username": hub.username})
+        with mock.patch.object(concurrency, "_run", wraps=concurrency._run) as run:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200, response.content[:200])
+        # The four parts ran in the pool.
+        self.assertEqual(run.call_count, 4)
+
+        profile = response.json()
+        self.assertEqual(profile["user"]["username"], hub.username)
+        self.assertEqual(
+            profile["counts"],
+            {
+                "following_count": follow_sv.get_following_count(user=hub),
+                "followers_count": follow_sv.get_followers_count(user=hub),
+            },
+        )
+        self.assertIs(profile["is_following"], True)
+        publications = self.client.get(
+            reverse("api:posts:publication:list", kwargs={"username": hub.username})
+        ).json()
+        self.assertTrue(profile["publications"])
+        self.assertEqual(profile["publications"], publications[:PROFILE_PUBLICATIONS])
+
+        # Queries of the pool threads are counted with the request's.
+        queries = response.wsgi_request.queries
+        self.assertGreaterEqual(queries.count, 5)
+        self.assertLessEqual(queries.count, get_query_budget(get_profile))
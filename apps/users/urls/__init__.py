@@ -3,8 +3,8 @@ from django.urls import path, include
 
 # Apps
 from apps.users.urls.auth import auth_patterns
-from apps.users.urls.user import users_patterns
-from apps.users.urls.follow import followers_patterns
+from apps.users.urls.user import async_users_patterns, users_patterns
+from apps.users.urls.follow import async_followers_patterns, followers_patterns
 
 app_name = "users"
 
@@ -14,3 +14,11 @@ urlpatterns = [
     path("user/", include((users_patterns, app_name), namespace="user")),
     path("follow/", include((followers_patterns, app_name), namespace="follow")),
 ]
+
+async_urlpatterns = [
+    path("user/", include((async_users_patterns, app_name), namespace="user")),
+    path(
+        "follow/",
+        include((async_followers_patterns, app_name), namespace="follow"),
+    ),
+]
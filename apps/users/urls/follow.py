@@ -22,3 +22,17 @@ followers_patterns = [
         ),
     ),
 ]
+
+# Async variants of the read endpoints, for ASGI servers.
+async_followers_patterns = [
+    path(
+        "<str:username>/",
+        include(
+            [
+                path("count/", api.aget_follow_count, name="count"),
+                path("get_followers/", api.aget_followers, name="get_followers"),
+                path("get_following/", api.aget_following, name="get_following"),
+            ]
+        ),
+    ),
+]
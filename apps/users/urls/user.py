@@ -12,6 +12,7 @@ users_patterns = [
         include(
             [
                 path("get/", api.get_user, name="get"),
+                path("profile/", api.get_profile, name="profile"),
                 path("update/", api.update_user, name="update"),
                 path("upload_avatar/", api.upload_avatar, name="upload_avatar"),
                 path("remove_avatar/", api.remove_avatar, name="remove_avatar"),
@@ -19,3 +20,8 @@ users_patterns = [
         ),
     ),
 ]
+
+# Async variants of the read endpoints, for ASGI servers.
+async_users_patterns = [
+    path("search/", api.asearch_user, name="search"),
+]
@@ -1,11 +1,31 @@
 from django.core import exceptions
 from django.http import Http404, HttpResponse
-from drf_spectacular.utils import OpenApiResponse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, OpenApiResponse
 
 from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
-from rest_framework.serializers import as_serializer_error
+from rest_framework.serializers import Serializer, as_serializer_error
 from rest_framework.views import exception_handler
 
+from common.compiled import CompiledSerializer, compile_serializer
+
+fields_param = OpenApiParameter(
+    name="fields",
+    description=(
+        "Comma-separated fields to return, e.g. `code,user.username`. Nested "
+        "fields are selected with a dotted path, `user.*` selects them all."
+    ),
+)
+
+normalize_param = OpenApiParameter(
+    name="normalize",
+    type=OpenApiTypes.BOOL,
+    description=(
+        "Return `{results, users}` instead of a list: items reference their "
+        "author by `user_id` and each distinct author is listed once in `users`."
+    ),
+)
+
 
 def api_exception_http(exc, context) -> HttpResponse:
     """
@@ -35,3 +55,47 @@ def empty_response_spec(description: str) -> OpenApiResponse:
         description = f"{description}."
     description = f"{description} No response body."
     return OpenApiResponse(description=description)
+
+
+def parse_fields(query_params, serializer_class) -> frozenset[str] | None:
+    """Return the fields requested by the `fields` query parameter, if any."""
+    value = query_params.get("fields")
+    if not value:
+        return None
+
+    fields = set()
+    for path in value.split(","):
+        path = path.strip().removesuffix(".*")
+        if not path:
+            continue
+
+        serializer = serializer_class()
+        for name in path.split("."):
+            if not isinstance(serializer, Serializer) or name not in serializer.fields:
+                raise ValidationError({"fields": f"Unknown field `{path}`."})
+            serializer = serializer.fields[name]
+        fields.add(path)
+
+    return frozenset(fields) or None
+
+
+def output_serializer(request, serializer_class) -> CompiledSerializer:
+    """Return the compiled output serializer for the fields the client asks."""
+    fields = parse_fields(request.query_params, serializer_class)
+    return compile_serializer(serializer_class, fields)
+
+
+def list_output(request, serializer_class, rows) -> list[dict] | dict:
+    """Return a list output, normalized by user when the client asks for it."""
+    compiled = output_serializer(request, serializer_class)
+    if request.query_params.get("normalize", "").lower() in ("1", "true"):
+        return compiled.normalized(rows, relation="user")
+    return compiled.many(rows)
+
+
+async def alist_output(request, serializer_class, rows) -> list[dict] | dict:
+    """Return the `list_output` of a queryset, with the async ORM."""
+    compiled = output_serializer(request, serializer_class)
+    if request.query_params.get("normalize", "").lower() in ("1", "true"):
+        return await compiled.anormalized(rows, relation="user")
+    return await compiled.amany(rows)
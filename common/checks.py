@@ -0,0 +1,27 @@
+# Libs
+from django.conf import settings
+from django.core.cache import caches
+from django.core.checks import Error
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def check_shared_cache(app_configs, **kwargs) -> list[Error]:
+    """Fail with replicas unless the cache is shared by the processes."""
+    if not settings.DATABASE_REPLICAS:
+        return []
+
+    cache = caches["default"]
+    if not isinstance(cache, (LocMemCache, DummyCache)):
+        return []
+    return [
+        Error(
+            f"`{type(cache).__name__}` is not shared by the processes of a "
+            "deployment, so a user's reads after a write may go to a replica "
+            "from another process.",
+            hint='Set `backend = "database"` or `"redis"` in the [cache] '
+            "section of env.toml.",
+            obj="CACHES",
+            id="api.E001",
+        )
+    ]
@@ -0,0 +1,126 @@
+# Core
+import os
+import string
+import hashlib
+import itertools
+import threading
+from typing import Iterator
+
+# Libs
+from django.conf import settings
+from django.db import connection
+from django.core.exceptions import ImproperlyConfigured
+
+BASE62 = string.digits + string.ascii_uppercase + string.ascii_lowercase
+
+
+class CodeAllocator:
+    """
+    Allocate unique fixed-length base62 codes from a database sequence.
+
+    Sequence values are mapped through a keyed Feistel permutation of the
+    code space, so codes look random yet never collide and need no existence
+    check. The sequence increments by `block_size`, which lets every worker
+    hand out a whole block of codes per database round trip.
+
+    The permutation is keyed by the `key_setting` setting. Codes already
+    issued came from its value: a new key maps sequence values to other
+    codes, which collide with them.
+    """
+
+    def __init__(
+        self,
+        *,
+        sequence: str,
+        length: int,
+        block_size: int,
+        key_setting: str,
+        rounds=4,
+    ):
+        self.sequence = sequence
+        self.key_setting = key_setting
+        self.length = length
+        self.block_size = block_size
+        self.space = len(BASE62) ** length
+
+        bits = (self.space - 1).bit_length()
+        self._half = (bits + 1) // 2
+        self._mask = (1 << self._half) - 1
+        self._rounds = rounds
+        self._keys = None
+
+        self._lock = threading.Lock()
+        self._pid = None
+        self._next = self._end = 0
+
+    def allocate(self) -> str:
+        """Return the next unused code."""
+        with self._lock:
+            # A forked worker must not reuse the block inherited from its parent.
+            if self._pid != os.getpid() or self._next >= self._end:
+                self._next = self._reserve_block()
+                self._end = self._next + self.block_size
+                self._pid = os.getpid()
+
+            value = self._next
+            self._next += 1
+
+        return self.encode(value)
+
+    def reserve(self, count: int) -> Iterator[str]:
+        """Return `count` unused codes, reserving their blocks in one round trip."""
+        blocks = -(-count // self.block_size)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(%s) FROM generate_series(1, %s)",
+                [self.sequence, blocks],
+            )
+            starts = [row[0] for row in cursor.fetchall()]
+
+        values = (start + i for start in starts for i in range(self.block_size))
+        return map(self.encode, itertools.islice(values, count))
+
+    def _reserve_block(self) -> int:
+        """Return the first value of a freshly reserved block."""
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT nextval(%s)", [self.sequence])
+            return cursor.fetchone()[0]
+
+    def encode(self, value: int) -> str:
+        """Return the code assigned to a sequence value."""
+        if not 0 <= value < self.space:
+            raise ValueError(f"Sequence value {value} is out of the code space.")
+
+        # Cycle-walk until the permuted value falls back into the code space.
+        number = self._feistel(value)
+        while number >= self.space:
+            number = self._feistel(number)
+
+        chars = []
+        for _ in range(self.length):
+            number, index = divmod(number, len(BASE62))
+            chars.append(BASE62[index])
+        return "".join(reversed(chars))
+
+    def _feistel(self, value: int) -> int:
+        """Apply one keyed Feistel permutation over the code bits."""
+        if self._keys is None:
+            key = getattr(settings, self.key_setting, "")
+            if not key:
+                raise ImproperlyConfigured(f"{self.key_setting} is not set.")
+            secret = hashlib.sha256(key.encode()).digest()
+            self._keys = [
+                hashlib.blake2b(bytes([i]), key=secret, digest_size=16).digest()
+                for i in range(self._rounds)
+            ]
+
+        size = (self._half + 7) // 8
+        left, right = value >> self._half, value & self._mask
+        for key in self._keys:
+            digest = hashlib.blake2b(
+                right.to_bytes(size, "big"),
+                key=key,
+                digest_size=size,
+            ).digest()
+            left, right = right, left ^ (int.from_bytes(digest, "big") & self._mask)
+        return (left << self._half) | right
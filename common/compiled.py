@@ -0,0 +1,216 @@
+# Core
+from functools import lru_cache
+from typing import Any, Callable, Iterable
+
+# Libs
+from django.db.models import QuerySet
+from django.core.exceptions import ImproperlyConfigured
+
+from rest_framework import serializers
+
+# Global
+from common import metrics
+
+# Fields whose representation is a plain builtin conversion.
+_CONVERTERS = (
+    (serializers.BooleanField, "bool"),
+    (serializers.IntegerField, "int"),
+    (serializers.CharField, "str"),
+)
+
+Row = dict[str, Any]
+
+# A selection maps field names to the selection of their nested fields, with
+# `None` standing for every field.
+Selection = dict[str, "Selection | None"]
+
+
+def field_selection(fields: Iterable[str]) -> Selection:
+    """Return the selection described by dotted field paths, e.g. `user.id`."""
+    selection: Selection = {}
+    for path in fields:
+        node = selection
+        *parents, name = path.split(".")
+        for parent in parents:
+            if node.setdefault(parent, {}) is None:
+                # The whole parent is already selected.
+                break
+            node = node[parent]
+        else:
+            node[name] = None
+    return selection
+
+
+class CompiledSerializer:
+    """
+    An output serializer compiled into a plain dict-building function.
+
+    Built from the declared fields of a DRF serializer, it reads the rows
+    returned by `QuerySet.values()` and produces the same representation the
+    serializer would, without DRF's per-field `to_representation` dispatch.
+    When `fields` (dotted paths, e.g. `user.username`) are given, only those
+    are represented and only their columns are listed in `values_fields`.
+    """
+
+    def __init__(
+        self,
+        serializer_class: type[serializers.Serializer],
+        fields: frozenset[str] | None = None,
+    ):
+        self.serializer_class = serializer_class
+        self.fields = fields
+        self.values_fields: list[str] = []
+        self._serializer = serializer_class()
+        self._selection = None if fields is None else field_selection(fields)
+        self._namespace: dict[str, Any] = {}
+        self._normalizers: dict[str, tuple[str, Callable, Callable]] = {}
+
+        body = self._compile(self._serializer, "", selection=self._selection)
+        self.to_representation = self._define("to_representation", body)
+
+    def one(self, instance) -> dict:
+        """Return the representation of a model instance."""
+        row = {}
+        for key in self.values_fields:
+            value = instance
+            for attr in key.split("__"):
+                if value is None:
+                    break
+                value = getattr(value, attr)
+            row[key] = value
+
+        return self.to_representation(row)
+
+    def many(self, rows: QuerySet | Iterable[Row]) -> list[dict]:
+        """Return the representation of every row (or queryset item)."""
+        if isinstance(rows, QuerySet):
+            rows = rows.values(*self.values_fields)
+
+        to_representation = self.to_representation
+        return [to_representation(row) for row in rows]
+
+    async def amany(self, rows: QuerySet) -> list[dict]:
+        """Return the representation of every queryset item, with the async ORM."""
+        return self.many([row async for row in rows.values(*self.values_fields)])
+
+    async def anormalized(self, rows: QuerySet, *, relation: str) -> dict:
+        """Return `normalized` rows of a queryset, with the async ORM."""
+        values = [row async for row in rows.values(*self.values_fields)]
+        return self.normalized(values, relation=relation)
+
+    def normalized(self, rows: QuerySet | Iterable[Row], *, relation: str) -> dict:
+        """
+        Return the rows with a nested `relation` replaced by its id.
+
+        Each distinct related object is represented once, in a top-level map
+        keyed by id and named after the relation, e.g. `{"results": [...],
+        "users": {"1": {...}}}` for `relation="user"`.
+        """
+        if isinstance(rows, QuerySet):
+            rows = rows.values(*self.values_fields)
+
+        if self._selection is not None and relation not in self._selection:
+            # The relation was not selected, there is nothing to deduplicate.
+            return {"results": self.many(rows), f"{relation}s": {}}
+
+        if relation not in self._normalizers:
+            self._normalizers[relation] = self._compile_normalizer(relation)
+        key, item, related = self._normalizers[relation]
+
+        results, objects = [], {}
+        for row in rows:
+            results.append(item(row))
+            related_id = row[key]
+            if related_id is not None and str(related_id) not in objects:
+                objects[str(related_id)] = related(row)
+
+        return {"results": results, f"{relation}s": objects}
+
+    def _compile_normalizer(self, relation: str) -> tuple[str, Callable, Callable]:
+        """Return the relation key and functions building an item and object."""
+        field = self._serializer.fields.get(relation)
+        if not isinstance(field, serializers.Serializer):
+            msg = f"{self.serializer_class.__name__} has no nested `{relation}`."
+            raise ImproperlyConfigured(msg)
+
+        key = "__".join(field.source_attrs)
+        selection = self._selection
+        item = self._compile(
+            self._serializer, "", ids={relation: key}, selection=selection
+        )
+        related = self._compile(
+            field, f"{key}__", selection=selection and selection[relation]
+        )
+        return (
+            key,
+            self._define(f"{relation}_item", item),
+            self._define(relation, related),
+        )
+
+    def _define(self, name: str, body: str) -> Callable[[Row], dict]:
+        """Return a function of a row evaluating the `body` expression."""
+        source = f"def {name}(row):\n    return {body}\n"
+        filename = f"<{self.serializer_class.__name__}.{name}>"
+        exec(compile(source, filename, "exec"), self._namespace)
+        return self._namespace[name]
+
+    def _compile(self, serializer, prefix: str, ids=None, selection=None) -> str:
+        """
+        Return a dict display expression for a (possibly nested) serializer.
+
+        Nested serializers named in `ids` are replaced by a `<name>_id` key
+        holding the given row value. Fields missing from a `selection` are
+        left out.
+        """
+        items = []
+        for name, field in serializer.fields.items():
+            if field.write_only or (selection is not None and name not in selection):
+                continue
+
+            if ids and name in ids:
+                items.append(f'"{name}_id": row["{ids[name]}"]')
+                continue
+
+            if field.source == "*" or isinstance(field, serializers.ListSerializer):
+                msg = f"Field `{name}` of {self.serializer_class.__name__} "
+                raise ImproperlyConfigured(f"{msg}cannot be compiled.")
+
+            key = prefix + "__".join(field.source_attrs)
+            if key not in self.values_fields:
+                self.values_fields.append(key)
+
+            if isinstance(field, serializers.Serializer):
+                # The relation itself yields its id, which is None for no object.
+                nested = self._compile(
+                    field, f"{key}__", selection=selection and selection[name]
+                )
+                value = f'None if row["{key}"] is None else {nested}'
+            else:
+                value = self._convert(field, f'row["{key}"]')
+
+            items.append(f'"{name}": {value}')
+
+        return "{" + ", ".join(items) + "}"
+
+    def _convert(self, field, value: str) -> str:
+        """Return an expression representing a single field value."""
+        for field_class, converter in _CONVERTERS:
+            if isinstance(field, field_class):
+                break
+        else:
+            converter = f"_field_{len(self._namespace)}"
+            self._namespace[converter] = field.to_representation
+
+        return f"(None if (v := {value}) is None else {converter}(v))"
+
+
+@lru_cache(maxsize=512)
+def compile_serializer(
+    serializer_class: type[serializers.Serializer],
+    fields: frozenset[str] | None = None,
+) -> CompiledSerializer:
+    """Return the (cached) compiled version of an output serializer."""
+    return CompiledSerializer(serializer_class, fields)
+
+
+metrics.count_lru_cache("compiled_serializer", compile_serializer)
@@ -0,0 +1,68 @@
+# Core
+import threading
+from contextvars import copy_context
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+# Libs
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+
+# Global
+from common import routers
+
+_lock = threading.Lock()
+_executor: ThreadPoolExecutor | None = None
+_pool_thread = threading.local()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.QUERY_THREADS, thread_name_prefix="query"
+                )
+    return _executor
+
+
+def _run(func: Callable[[], Any]) -> Any:
+    # Pool threads serve no request, so their connections are recycled here
+    # as the request signals do for request threads.
+    close_old_connections()
+    _pool_thread.active = True
+    try:
+        return func()
+    finally:
+        _pool_thread.active = False
+        close_old_connections()
+
+
+def run_concurrently(*funcs: Callable[[], Any]) -> list[Any]:
+    """
+    Run independent functions at once and return their results, in order.
+
+    The functions run in a thread pool bounded by `QUERY_THREADS`, each thread
+    querying over its own connection, so the caller waits for the slowest
+    function, not their sum. They run in a copy of the caller's context, so
+    replica routing, query recording and tracing apply. The first exception
+    raised is raised again, once all functions are done.
+
+    Calls from the functions themselves run in sequence, so a full pool never
+    waits on itself. Calls in a transaction, e.g. in tests, run in sequence
+    too, so the functions see its writes, which other connections do not.
+    """
+    nested = getattr(_pool_thread, "active", False)
+    if len(funcs) < 2 or nested or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return [func() for func in funcs]
+
+    executor = _get_executor()
+    # The functions read from the caller's database, the pin looked up once.
+    with routers.fixed_read_database():
+        futures = [executor.submit(copy_context().run, _run, func) for func in funcs]
+    errors = [future.exception() for future in futures]
+    for error in errors:
+        if error is not None:
+            raise error
+    return [future.result() for future in futures]
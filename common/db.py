@@ -0,0 +1,234 @@
+# Core
+import re
+import time
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+from typing import Iterable, NotRequired, TypedDict
+
+# Libs
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_IN_LIST = re.compile(r"\bIN \((?:%s, )*%s\)")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+# The `QueryRecorder` of the running request, if any.
+_recorder = ContextVar("query_recorder", default=None)
+
+
+class PoolStatsT(TypedDict):
+    """A database connection pool statistics type."""
+
+    alias: str
+    pooled: bool
+    # Persistent connections, without a pool.
+    conn_max_age: NotRequired[int | None]
+    # Connection pool, counters are since the process started.
+    min_size: NotRequired[int]
+    max_size: NotRequired[int]
+    size: NotRequired[int]
+    available: NotRequired[int]
+    in_use: NotRequired[int]
+    saturation: NotRequired[float]
+    requests_waiting: NotRequired[int]
+    requests: NotRequired[int]
+    requests_queued: NotRequired[int]
+    requests_wait_ms: NotRequired[int]
+    requests_errors: NotRequired[int]
+    connections: NotRequired[int]
+    connections_errors: NotRequired[int]
+    connections_lost: NotRequired[int]
+
+
+def pool_stats(alias: str = DEFAULT_DB_ALIAS) -> PoolStatsT:
+    """
+    Return the connection pool statistics of a database, for this process.
+
+    `saturation` is the share of the pool's maximum size in use: when it
+    stays at 1 with requests waiting, the pool is too small for the load.
+    """
+    wrapper = connections[alias]
+    pool = getattr(wrapper, "pool", None)
+    if pool is None:
+        return {
+            "alias": alias,
+            "pooled": False,
+            "conn_max_age": wrapper.settings_dict["CONN_MAX_AGE"],
+        }
+
+    # Counters that never changed are missing.
+    stats = pool.get_stats()
+    in_use = stats["pool_size"] - stats["pool_available"]
+    return {
+        "alias": alias,
+        "pooled": True,
+        "min_size": stats["pool_min"],
+        "max_size": stats["pool_max"],
+        "size": stats["pool_size"],
+        "available": stats["pool_available"],
+        "in_use": in_use,
+        "saturation": in_use / stats["pool_max"],
+        "requests_waiting": stats["requests_waiting"],
+        "requests": stats.get("requests_num", 0),
+        "requests_queued": stats.get("requests_queued", 0),
+        "requests_wait_ms": stats.get("requests_wait_ms", 0),
+        "requests_errors": stats.get("requests_errors", 0),
+        "connections": stats.get("connections_num", 0),
+        "connections_errors": stats.get("connections_errors", 0),
+        "connections_lost": stats.get("connections_lost", 0),
+    }
+
+
+def fingerprint(sql: str) -> str:
+    """Return a statement with its literals and `IN` lists collapsed."""
+    return _LITERAL.sub("?", _IN_LIST.sub("IN (...)", sql))
+
+
+def _copy_text(value) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+class _CopyFile:
+    """Rows read as a file in the `COPY` text format, for psycopg2."""
+
+    def __init__(self, rows: Iterable[tuple]):
+        self._lines = ("\t".join(map(_copy_text, row)) + "\n" for row in rows)
+        self._buffer = ""
+
+    def read(self, size: int = -1) -> str:
+        chunks, length = [self._buffer], len(self._buffer)
+        for line in self._lines:
+            chunks.append(line)
+            length += len(line)
+            if 0 <= size <= length:
+                break
+        data = "".join(chunks)
+        if size < 0:
+            self._buffer = ""
+            return data
+        self._buffer = data[size:]
+        return data[:size]
+
+
+def copy_rows(
+    table: str,
+    columns: list[str],
+    rows: Iterable[tuple],
+    using: str = DEFAULT_DB_ALIAS,
+) -> int:
+    """
+    Bulk load rows into a table with `COPY ... FROM STDIN`, return their count.
+
+    Rows are streamed, so they can be generated lazily. Much faster than
+    `bulk_create`, but models' `save()`, signals and defaults are skipped.
+    """
+    count = 0
+
+    def counted():
+        nonlocal count
+        for row in rows:
+            count += 1
+            yield row
+
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+    with connections[using].cursor() as cursor:
+        # psycopg 3, else psycopg2.
+        if hasattr(cursor.cursor, "copy"):
+            with cursor.cursor.copy(sql) as copy:
+                for row in counted():
+                    copy.write_row(row)
+        else:
+            cursor.cursor.copy_expert(sql, _CopyFile(counted()))
+    return count
+
+
+def is_cache_query(sql: str) -> bool:
+    """Return whether `sql` runs on the table of the database cache."""
+    cache = settings.CACHES["default"]
+    if cache["BACKEND"] != "django.core.cache.backends.db.DatabaseCache":
+        return False
+    return f'"{cache["LOCATION"]}"' in sql
+
+
+def record_query(execute, sql, params, many, context):
+    """Run a statement, counted by the active `QueryRecorder`, if any."""
+    recorder = _recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_query_recorder(sender=None, *, connection, **kwargs):
+    """Add `record_query` to a connection, on `connection_created`."""
+    # First, so `execute_wrapper` blocks still pop their own wrapper.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+class QueryRecorder:
+    """
+    Count the statements run, their time and fingerprints.
+
+    A fingerprint run more than once in a request is usually an N+1 query:
+    a relation loaded row by row instead of joined or prefetched. Recorders
+    nest, the statements of an inner one count in the outer one too. Queries
+    run at once by `run_concurrently` are recorded under a lock. Statements
+    of a database cache, e.g. the replica pin lookup, are not the view's and
+    are left out.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self._parent = None
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        if self._parent is not None:
+            execute = partial(self._parent, execute)
+
+        if is_cache_query(sql):
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            key = fingerprint(sql)
+            with self._lock:
+                self.duration += duration
+                self.count += 1
+                self.fingerprints[key] += 1
+
+    @property
+    def duplicates(self) -> dict[str, int]:
+        """Return the fingerprints run more than once, with their count."""
+        return {sql: count for sql, count in self.fingerprints.items() if count > 1}
+
+    @contextmanager
+    def record(self):
+        """Record the statements run in this context, sync or async."""
+        for alias in connections:
+            install_query_recorder(connection=connections[alias])
+
+        self._parent = _recorder.get()
+        token = _recorder.set(self)
+        try:
+            yield self
+        finally:
+            _recorder.reset(token)
@@ -1,4 +1,37 @@
+# Core
+import hashlib
+from datetime import datetime
+from functools import wraps
+from inspect import iscoroutinefunction
+from typing import Callable, NotRequired, TypedDict
+
+# Libs
 from django.contrib.auth import decorators
+from django.contrib.auth.models import AnonymousUser
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from rest_framework.exceptions import (
+    AuthenticationFailed,
+    MethodNotAllowed,
+    NotAuthenticated,
+)
+from rest_framework.response import Response
+
+# Global
+from common import metrics, routers
+from common.api import api_exception_http
+from common.authentication import AsyncJWTAuthentication
+from common.renderers import JSONRenderer
+
+
+class VersionT(TypedDict):
+    """A resource version type."""
+
+    tag: tuple
+    # Only for resources whose modification time covers every change, lists
+    # lose rows without updating any timestamp.
+    last_modified: NotRequired[datetime]
 
 
 def permission_required(perm, raise_exception=True):
@@ -7,3 +40,174 @@ def permission_required(perm, raise_exception=True):
         perm,
         raise_exception=raise_exception,
     )
+
+
+def query_budget(max_queries: int):
+    """
+    Declare the most queries a view runs, checked by `QueryBudgetMiddleware`.
+
+    Must be placed above `api_view`, on the view URLs resolve to. Class-based
+    views declare a `query_budget` attribute instead.
+    """
+
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+
+    return decorator
+
+
+def read_only(view):
+    """
+    Declare an unsafe-method view that writes nothing, e.g. a POST for its
+    body only, so `ReplicaPinMiddleware` does not pin its user to the primary.
+    Must be placed above `api_view`, like `query_budget`.
+    """
+    view.read_only = True
+    return view
+
+
+def get_query_budget(view) -> int | None:
+    """Return the query budget of a resolved view, set on it or its class."""
+    view_class = getattr(view, "view_class", None)
+    return getattr(view, "query_budget", getattr(view_class, "query_budget", None))
+
+
+def _conditional_response(request, version: VersionT):
+    """Return the validators of a resource version, and a `304` if they match."""
+    key = repr(
+        (
+            version["tag"],
+            request.get_full_path(),
+            request.accepted_renderer.format,
+        )
+    )
+    etag = f'W/"{hashlib.blake2b(key.encode(), digest_size=12).hexdigest()}"'
+    last_modified = version.get("last_modified")
+    timestamp = last_modified and int(last_modified.timestamp())
+
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=timestamp,
+    )
+    if "If-None-Match" in request.headers or "If-Modified-Since" in request.headers:
+        hit = response is not None and response.status_code == 304
+        metrics.CACHE_REQUESTS.inc(
+            cache="conditional_get", result="hit" if hit else "miss"
+        )
+    return etag, timestamp, response
+
+
+def _set_validators(response, etag: str, timestamp: int | None):
+    if response.status_code in (200, 304):
+        response.headers["ETag"] = etag
+        if timestamp:
+            response.headers["Last-Modified"] = http_date(timestamp)
+    return response
+
+
+def conditional_get(version_func: Callable[..., VersionT | None]):
+    """
+    Answer conditional GET requests from a cheap version of the resource.
+
+    `version_func` receives the view's URL keyword arguments and returns the
+    resource version, or `None` to let the view handle a missing resource.
+    The version tag, query string and response format make a weak ETag, so a
+    request with a matching `If-None-Match` gets a `304` without running the
+    view. Must be placed below `api_view` and permission checks. Async views
+    take an async `version_func`.
+    """
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method not in ("GET", "HEAD"):
+                    return await view(request, *args, **kwargs)
+
+                version = await version_func(**kwargs)
+                if version is None:
+                    return await view(request, *args, **kwargs)
+
+                etag, timestamp, response = _conditional_response(request, version)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return _set_validators(response, etag, timestamp)
+
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+
+            version = version_func(**kwargs)
+            if version is None:
+                return view(request, *args, **kwargs)
+
+            etag, timestamp, response = _conditional_response(request, version)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            return _set_validators(response, etag, timestamp)
+
+        return wrapper
+
+    return decorator
+
+
+def async_api_view(http_method_names: list[str]):
+    """
+    Turn an async function into an API view, as `api_view` does sync ones.
+
+    DRF runs views synchronously, so the view stays a plain Django one: the
+    request is authenticated with `AsyncJWTAuthentication` and given the
+    `user`, `auser`, `query_params` and `accepted_renderer` DRF views rely on.
+    The `Response` returned, or the exception raised, is rendered as JSON
+    like the API does, through `api_exception_http`.
+    """
+    authentication = AsyncJWTAuthentication()
+    renderer = JSONRenderer()
+    allowed = [method.upper() for method in http_method_names]
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            request.accepted_renderer = renderer
+            request.accepted_media_type = renderer.media_type
+            request.query_params = request.GET
+            try:
+                if request.method not in allowed:
+                    raise MethodNotAllowed(request.method)
+
+                authenticated = await authentication.aauthenticate(request)
+                user = authenticated[0] if authenticated else AnonymousUser()
+                request.user = user
+
+                async def auser():
+                    return user
+
+                request.auser = auser
+                # Sync services of the view read from the database found off
+                # the event loop, as the async ones do.
+                async with routers.afixed_read_database():
+                    response = await view(request, *args, **kwargs)
+            except Exception as exc:
+                if isinstance(exc, (AuthenticationFailed, NotAuthenticated)):
+                    exc.auth_header = authentication.authenticate_header(request)
+                response = api_exception_http(exc, {"request": request})
+                if response is None:
+                    raise
+
+            if isinstance(response, Response):
+                response.accepted_renderer = renderer
+                response.accepted_media_type = renderer.media_type
+                response.renderer_context = {"request": request, "response": response}
+                response.render()
+            return response
+
+        wrapper.http_method_names = [method.lower() for method in allowed]
+        return wrapper
+
+    return decorator
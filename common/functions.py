@@ -1,18 +1,41 @@
 # Core
-import random
+import time
 import string
+import secrets
 from datetime import datetime, date
+from functools import cache
 
 # Libs
-import cloudinary.uploader
+from django.conf import settings
 
+# Global
+from common import metrics, tracing
 
+
+@cache
+def cloudinary_uploader():
+    """Return `cloudinary.uploader`, imported and configured on first use."""
+    import cloudinary
+    import cloudinary.uploader
+
+    cloudinary.config(**settings.CLOUDINARY)
+    return cloudinary.uploader
+
+
+@tracing.traced("upload")
 def upload_to_cloudinary(*, file, folder="avatars"):
+    start = time.perf_counter()
     try:
-        result = cloudinary.uploader.upload(file, folder=f"instaclone/{folder}")
+        result = cloudinary_uploader().upload(file, folder=f"instaclone/{folder}")
+        status = "ok"
         return result.get("secure_url"), None
     except Exception as e:
+        status = "error"
         return None, str(e)
+    finally:
+        metrics.UPLOAD_DURATION.observe(
+            time.perf_counter() - start, folder=folder, status=status
+        )
 
 
 def extract_public_id(image_url: str) -> str:
@@ -35,4 +58,4 @@ def clean_spaces(content: str) -> str:
 def generate_random_code(length=6) -> str:
     """Return a random code."""
     characters = string.ascii_letters + string.digits
-    return "".join(random.choice(characters) for _ in range(length))
+    return "".join(secrets.choice(characters) for _ in range(length))
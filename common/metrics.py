@@ -0,0 +1,292 @@
+# Core
+import os
+import json
+import time
+import atexit
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+
+# Libs
+from django.conf import settings
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Metric:
+    """A metric family, its series are keyed by their label values."""
+
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        registry.register(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self, key: tuple, value) -> list[tuple[str, dict, float]]:
+        """Return the exposed samples of a series."""
+        return [(self.name, dict(zip(self.labelnames, key)), value)]
+
+
+class Counter(Metric):
+    """A value that only goes up, summed over processes."""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with registry.lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """A value that goes up and down, summed over running processes."""
+
+    type = "gauge"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with registry.lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        with registry.lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    """Observations counted in buckets, with their sum, summed over processes."""
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with registry.lock:
+            # Counts per bucket, then the sum of observations.
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a block, in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self, key, value):
+        labels = dict(zip(self.labelnames, key))
+        samples, cumulative = [], 0
+        for bound, count in zip((*self.buckets, "+Inf"), value[:-1]):
+            cumulative += count
+            samples.append(
+                (f"{self.name}_bucket", {**labels, "le": str(bound)}, cumulative)
+            )
+        samples.append((f"{self.name}_sum", labels, value[-1]))
+        samples.append((f"{self.name}_count", labels, cumulative))
+        return samples
+
+
+def _merge(metric: Metric, total, value):
+    if total is None:
+        return value
+    if isinstance(metric, Histogram):
+        return [a + b for a, b in zip(total, value)]
+    return total + value
+
+
+def _is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Registry:
+    """
+    The metrics of this process, shared with the other workers through files.
+
+    Updates only touch memory. With `METRICS_DIR` set, each process writes
+    its values to `<pid>-<start>.json` there, at most every
+    `METRICS_FLUSH_INTERVAL` seconds and on exit, and exposition sums the
+    files of every worker. The start time keeps a worker reusing a stopped
+    one's pid from overwriting its counters. Gauges of stopped processes are
+    left out, their counters are kept: a file's process runs if its pid does
+    and no later file has that pid. The directory must be emptied when the
+    server starts.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.metrics: dict[str, Metric] = {}
+        self.collectors = []
+        self._flushed_at = 0.0
+        self._pid = None
+        self._file_name = ""
+
+    def register(self, metric: Metric) -> None:
+        self.metrics[metric.name] = metric
+
+    def add_collector(self, collector) -> None:
+        """Call `collector()` before each snapshot, to update metrics."""
+        self.collectors.append(collector)
+
+    def snapshot(self) -> dict:
+        """Return the values of this process, by metric and series."""
+        for collector in self.collectors:
+            collector()
+        with self.lock:
+            return {
+                name: [[list(key), value] for key, value in metric._values.items()]
+                for name, metric in self.metrics.items()
+            }
+
+    def flush(self) -> None:
+        """Write this process's values for the other workers to read."""
+        directory = settings.METRICS_DIR
+        if not directory:
+            return
+        with self._flush_lock:
+            # A forked worker starts its own file.
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._file_name = f"{self._pid}-{time.time_ns()}.json"
+            path = Path(directory) / self._file_name
+            temporary = path.with_suffix(".tmp")
+            temporary.write_text(json.dumps(self.snapshot()))
+            temporary.replace(path)
+            self._flushed_at = time.monotonic()
+
+    def maybe_flush(self) -> None:
+        """Flush, unless this process did it less than an interval ago."""
+        if time.monotonic() - self._flushed_at >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def collect(self) -> dict[str, dict[tuple, object]]:
+        """Return the values of every worker, summed by metric and series."""
+        snapshots = [(True, self.snapshot())]
+        if settings.METRICS_DIR:
+            self.flush()
+            files = {}
+            for path in Path(settings.METRICS_DIR).glob("*.json"):
+                pid, start = map(int, path.stem.split("-"))
+                files[path] = pid, start
+
+            latest = {}
+            for pid, start in files.values():
+                latest[pid] = max(latest.get(pid, start), start)
+            for path, (pid, start) in files.items():
+                if path.name == self._file_name:
+                    continue
+                try:
+                    snapshot = json.loads(path.read_text())
+                except (OSError, ValueError):
+                    # Removed or being replaced.
+                    continue
+                alive = start == latest[pid] and _is_running(pid)
+                snapshots.append((alive, snapshot))
+
+        totals = {name: {} for name in self.metrics}
+        for alive, snapshot in snapshots:
+            for name, series in snapshot.items():
+                metric = self.metrics.get(name)
+                if metric is None or (isinstance(metric, Gauge) and not alive):
+                    continue
+                for key, value in series:
+                    key = tuple(key)
+                    totals[name][key] = _merge(metric, totals[name].get(key), value)
+        return totals
+
+    def exposition(self) -> str:
+        """Return every worker's metrics in the Prometheus text format."""
+        lines = []
+        for name, series in self.collect().items():
+            metric = self.metrics[name]
+            lines.append(f"# HELP {name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            for key, value in sorted(series.items()):
+                for sample, labels, number in metric.samples(key, value):
+                    text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                    lines.append(
+                        f"{sample}{{{text}}} {number}" if text else f"{sample} {number}"
+                    )
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+atexit.register(registry.flush)
+
+
+def count_lru_cache(name: str, function) -> None:
+    """Expose the hits and misses of an `lru_cache` as `cache_requests_total`."""
+
+    def collect():
+        info = function.cache_info()
+        with registry.lock:
+            CACHE_REQUESTS._values[(name, "hit")] = info.hits
+            CACHE_REQUESTS._values[(name, "miss")] = info.misses
+
+    registry.add_collector(collect)
+
+
+REQUESTS = Counter(
+    "http_requests_total",
+    "Requests answered, by view, method and status.",
+    ["view", "method", "status"],
+)
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time to answer requests, by view and method.",
+    ["view", "method"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests being answered.",
+)
+REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds",
+    "Time spent on database queries per request, by view.",
+    ["view"],
+)
+DB_QUERIES = Counter(
+    "db_queries_total",
+    "Database queries run by requests, by view.",
+    ["view"],
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups, by cache and result (hit or miss).",
+    ["cache", "result"],
+)
+UPLOAD_DURATION = Histogram(
+    "upload_duration_seconds",
+    "Time to upload files to Cloudinary, by folder and status.",
+    ["folder", "status"],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
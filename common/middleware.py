@@ -0,0 +1,637 @@
+# Core
+import time
+import random
+import asyncio
+import logging
+import threading
+import zlib
+
+# Libs
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.core.handlers.base import BaseHandler
+from django.core.handlers.exception import convert_exception_to_response
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.module_loading import import_string
+
+# Global
+from common import metrics, routers, tracing
+from common.profiling import Sampler, profiles
+from common.db import QueryRecorder
+from common.decorators import get_query_budget
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Levels favour speed: API payloads are compressed on every request.
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3
+
+_COMPRESSIBLE_TYPES = {
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "image/svg+xml",
+}
+
+
+class GzipCompressor:
+    """A gzip stream compressor."""
+
+    encoding = "gzip"
+
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + 15)
+
+    def write(self, data: bytes) -> bytes:
+        """Return `data` compressed and flushed, decodable right away."""
+        return self._compressor.compress(data) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self, data=b"") -> bytes:
+        """Return `data` compressed and the end of the stream."""
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class BrotliCompressor:
+    """A brotli stream compressor."""
+
+    encoding = "br"
+
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def write(self, data: bytes) -> bytes:
+        """Return `data` compressed and flushed, decodable right away."""
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data=b"") -> bytes:
+        """Return `data` compressed and the end of the stream."""
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+class ZstdCompressor:
+    """A zstandard stream compressor."""
+
+    encoding = "zstd"
+
+    def __init__(self):
+        compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+        self._compressor = compressor.compressobj()
+
+    def write(self, data: bytes) -> bytes:
+        """Return `data` compressed and flushed, decodable right away."""
+        return self._compressor.compress(data) + self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self, data=b"") -> bytes:
+        """Return `data` compressed and the end of the stream."""
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+# Available compressors, in order of preference.
+COMPRESSORS = [
+    compressor
+    for compressor, module in (
+        (ZstdCompressor, zstandard),
+        (BrotliCompressor, brotli),
+        (GzipCompressor, zlib),
+    )
+    if module is not None
+]
+
+
+def accepted_encodings(header: str) -> dict[str, float]:
+    """Return the quality of each content coding of an `Accept-Encoding`."""
+    qualities = {}
+    for item in header.split(","):
+        coding, *params = item.strip().lower().split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            qualities[coding] = quality
+    return qualities
+
+
+def choose_compressor(header: str):
+    """Return the preferred compressor the client accepts, if any."""
+    qualities = accepted_encodings(header)
+    default = qualities.get("*", 0.0)
+
+    best, best_quality = None, 0.0
+    for compressor in COMPRESSORS:
+        quality = qualities.get(compressor.encoding, default)
+        if quality > best_quality:
+            best, best_quality = compressor, quality
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    """Return whether a media type is worth compressing."""
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type.startswith("text/") or media_type in _COMPRESSIBLE_TYPES:
+        return True
+    return media_type.endswith(("+json", "+xml"))
+
+
+def _compress_stream(compressor, chunks):
+    for chunk in chunks:
+        if data := compressor.write(chunk):
+            yield data
+    yield compressor.finish()
+
+
+async def _acompress_stream(compressor, chunks):
+    async for chunk in chunks:
+        if data := compressor.write(chunk):
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compress responses with zstd, brotli or gzip, as the client accepts.
+
+    Like `GZipMiddleware`, but it prefers the faster and denser codings when
+    their packages are installed. Only text-like media larger than
+    `COMPRESSION_MIN_SIZE` bytes is compressed, already encoded responses and
+    media (images, video, archives) pass through. Streaming responses are
+    compressed chunk by chunk, each flushed so clients can decode it at once.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.min_size = settings.COMPRESSION_MIN_SIZE
+
+    def process_response(self, request, response):
+        if response.has_header("Content-Encoding"):
+            return response
+        if not is_compressible(response.get("Content-Type", "")):
+            return response
+
+        # The body depends on Accept-Encoding from now on, even if not compressed.
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+
+        compressor_class = choose_compressor(
+            request.META.get("HTTP_ACCEPT_ENCODING", "")
+        )
+        if compressor_class is None:
+            return response
+
+        compressor = compressor_class()
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = _acompress_stream(
+                    compressor, response.streaming_content
+                )
+            else:
+                response.streaming_content = _compress_stream(
+                    compressor, response.streaming_content
+                )
+            del response.headers["Content-Length"]
+        else:
+            response.content = compressor.finish(response.content)
+            response.headers["Content-Length"] = str(len(response.content))
+
+        # The compressed body is not byte-identical to the uncompressed one.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+
+        response.headers["Content-Encoding"] = compressor.encoding
+        return response
+
+
+class _Profile:
+    """A middleware chain with the hooks its middleware define."""
+
+    def __init__(self, paths: list[str], get_response, is_async: bool):
+        # Reuse Django's sync/async adaptation of middleware and hooks.
+        adapter = BaseHandler()
+        self.view_middleware = []
+        self.template_response_middleware = []
+        self.exception_middleware = []
+
+        handler, handler_is_async = get_response, is_async
+        for path in reversed(paths):
+            middleware = import_string(path)
+            if not getattr(middleware, "async_capable", False):
+                middleware_is_async = False
+            elif not getattr(middleware, "sync_capable", True):
+                middleware_is_async = True
+            else:
+                middleware_is_async = is_async
+
+            adapted = adapter.adapt_method_mode(
+                middleware_is_async, handler, handler_is_async, name=path
+            )
+            try:
+                instance = middleware(adapted)
+            except MiddlewareNotUsed:
+                continue
+
+            # Hooks run from `PrefixProfileMiddleware`'s own, which are sync.
+            if hasattr(instance, "process_view"):
+                self.view_middleware.insert(
+                    0, adapter.adapt_method_mode(False, instance.process_view)
+                )
+            if hasattr(instance, "process_template_response"):
+                self.template_response_middleware.append(
+                    adapter.adapt_method_mode(False, instance.process_template_response)
+                )
+            if hasattr(instance, "process_exception"):
+                self.exception_middleware.append(
+                    adapter.adapt_method_mode(False, instance.process_exception)
+                )
+
+            handler = convert_exception_to_response(instance)
+            handler_is_async = middleware_is_async
+
+        self.handler = adapter.adapt_method_mode(is_async, handler, handler_is_async)
+
+
+class PrefixProfileMiddleware:
+    """
+    Run a different middleware chain depending on the URL prefix.
+
+    `MIDDLEWARE_PROFILES` maps URL prefixes to middleware lists, the longest
+    prefix matching the request path wins, with `""` as the fallback. This
+    lets the JWT-only API skip sessions, CSRF and messages, while the admin
+    keeps them. Placed last in `MIDDLEWARE`, it also relays the view,
+    exception and template response hooks of the chosen chain.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+        profiles = settings.MIDDLEWARE_PROFILES
+        if "" not in profiles:
+            raise ImproperlyConfigured('MIDDLEWARE_PROFILES needs a "" profile.')
+
+        self.profiles = {
+            prefix: _Profile(profiles[prefix], get_response, self.is_async)
+            for prefix in sorted(profiles, key=len, reverse=True)
+        }
+
+    def __call__(self, request):
+        profile = self.get_profile(request)
+        request.middleware_profile = profile
+        return profile.handler(request)
+
+    def get_profile(self, request) -> _Profile:
+        """Return the profile of the longest prefix matching the request."""
+        path = request.path_info
+        return next(
+            profile
+            for prefix, profile in self.profiles.items()
+            if path.startswith(prefix)
+        )
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        for process_view in request.middleware_profile.view_middleware:
+            response = process_view(request, view_func, view_args, view_kwargs)
+            if response is not None:
+                return response
+
+    def process_template_response(self, request, response):
+        for process in request.middleware_profile.template_response_middleware:
+            response = process(request, response)
+        return response
+
+    def process_exception(self, request, exception):
+        for process_exception in request.middleware_profile.exception_middleware:
+            response = process_exception(request, exception)
+            if response is not None:
+                return response
+
+
+class ReplicaPinMiddleware:
+    """
+    Give the replica router the request it reads for.
+
+    Reads of a request go to a single replica, chosen here. After a
+    successful unsafe request, the user's reads go to the primary for
+    `REPLICA_PIN_SECONDS`, longer than the replicas lag, so they see their
+    own writes. Pins live in the default cache, which must be shared by the
+    processes of a deployment: set in the `[cache]` section of `env.toml`,
+    checked by `common.checks.check_shared_cache`.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        tokens = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            self.finish(tokens)
+        self.pin(request, response)
+        return response
+
+    async def __acall__(self, request):
+        tokens = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.finish(tokens)
+        if request.method not in routers.SAFE_METHODS:
+            # The user may be lazy, loaded from the session.
+            await sync_to_async(self.pin)(request, response)
+        return response
+
+    def start(self, request) -> tuple:
+        return (
+            routers.current_request.set(request),
+            routers.request_replica.set(routers.choose_replica()),
+        )
+
+    def finish(self, tokens: tuple) -> None:
+        request_token, replica_token = tokens
+        routers.current_request.reset(request_token)
+        routers.request_replica.reset(replica_token)
+
+    def pin(self, request, response) -> None:
+        if request.method in routers.SAFE_METHODS or response.status_code >= 400:
+            return
+        match = request.resolver_match
+        if match and getattr(match.func, "read_only", False):
+            return
+        user = getattr(request, "user", None)
+        if settings.DATABASE_REPLICAS and user and user.is_authenticated:
+            routers.pin_to_primary(user)
+
+
+class QueryBudgetMiddleware:
+    """
+    Record the queries of each request and check the view's budget.
+
+    The count, time and repeated fingerprints of the statements are kept on
+    `request.queries` and, when `DEBUG` is on, sent in `X-Query-*` headers.
+    Views running more queries than their `query_budget` are logged.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        with QueryRecorder().record() as queries:
+            response = self.get_response(request)
+        return self.report(request, response, queries)
+
+    async def __acall__(self, request):
+        with QueryRecorder().record() as queries:
+            response = await self.get_response(request)
+        return self.report(request, response, queries)
+
+    def report(self, request, response, queries: QueryRecorder):
+        request.queries = queries
+        match = request.resolver_match
+        budget = match and get_query_budget(match.func)
+        if budget is not None and queries.count > budget:
+            logger.warning(
+                "%s ran %d queries, over its budget of %d. Repeated: %s",
+                match.view_name,
+                queries.count,
+                budget,
+                queries.duplicates,
+            )
+
+        if settings.DEBUG:
+            repeated = sum(count - 1 for count in queries.duplicates.values())
+            response.headers["X-Query-Count"] = str(queries.count)
+            response.headers["X-Query-Time"] = f"{queries.duration * 1000:.1f}ms"
+            response.headers["X-Query-Duplicates"] = str(repeated)
+            if budget is not None:
+                response.headers["X-Query-Budget"] = str(budget)
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Count requests with their latency, database time and those in flight.
+
+    Requests are labelled by view name rather than path, so the series stay
+    few. Placed first in `MIDDLEWARE`, the latency covers the whole chain.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    # Methods labelled as such, others are counted as "other".
+    methods = {"GET", "HEAD", "OPTIONS", "POST", "PUT", "PATCH", "DELETE"}
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        metrics.REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.REQUESTS_IN_FLIGHT.dec()
+        self.observe(request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        metrics.REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.REQUESTS_IN_FLIGHT.dec()
+        self.observe(request, response, time.perf_counter() - start)
+        return response
+
+    def observe(self, request, response, duration: float) -> None:
+        match = request.resolver_match
+        view = match.view_name if match else "unmatched"
+        method = request.method if request.method in self.methods else "other"
+
+        metrics.REQUESTS.inc(view=view, method=method, status=response.status_code)
+        metrics.REQUEST_DURATION.observe(duration, view=view, method=method)
+        if queries := getattr(request, "queries", None):
+            metrics.REQUEST_DB_DURATION.observe(queries.duration, view=view)
+            metrics.DB_QUERIES.inc(queries.count, view=view)
+        metrics.registry.maybe_flush()
+
+
+class ProfilingMiddleware:
+    """
+    Sample the stacks of requests into per-view profiles.
+
+    A `PROFILING_RATE` share of requests is profiled, and with a
+    `PROFILING_THRESHOLD` every request is sampled but only kept when slower.
+    Stacks are sampled every `PROFILING_INTERVAL` seconds from a background
+    thread: of the thread running a sync request, of the task running an
+    async one, where it runs or waits. Not loaded when both are off, so it
+    costs nothing then.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.rate = settings.PROFILING_RATE
+        self.threshold = settings.PROFILING_THRESHOLD
+        if not self.rate and not self.threshold:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sampler = Sampler(settings.PROFILING_INTERVAL)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        chosen = random.random() < self.rate
+        if not chosen and not self.threshold:
+            return self.get_response(request)
+
+        key = self.sampler.start(threading.get_ident())
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            stacks = self.sampler.stop(key)
+        self.finish(request, chosen, start, stacks)
+        return response
+
+    async def __acall__(self, request):
+        chosen = random.random() < self.rate
+        if not chosen and not self.threshold:
+            return await self.get_response(request)
+
+        key = self.sampler.start(threading.get_ident(), asyncio.current_task())
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            stacks = self.sampler.stop(key)
+        self.finish(request, chosen, start, stacks)
+        return response
+
+    def finish(self, request, chosen: bool, start: float, stacks) -> None:
+        slow = self.threshold and time.perf_counter() - start >= self.threshold
+        if (chosen or slow) and stacks:
+            match = request.resolver_match
+            profiles.add(match.view_name if match else "unmatched", stacks)
+
+
+class TracingMiddleware:
+    """
+    Trace a `TRACING_RATE` share of requests, see `common.tracing`.
+
+    The request gets the root span and its view a child one, from
+    `process_view` until its response is rendered, services, queries and
+    uploads nest under it. Traces kept are sent with an `X-Trace-Id` header.
+    Not loaded when the rate is 0, so it costs nothing then.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.rate = settings.TRACING_RATE
+        if not self.rate:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if random.random() >= self.rate:
+            return self.get_response(request)
+
+        root, token = self.start(request)
+        response = self.get_response(request)
+        self.finish(request, response, root, token)
+        return response
+
+    async def __acall__(self, request):
+        if random.random() >= self.rate:
+            return await self.get_response(request)
+
+        root, token = self.start(request)
+        response = await self.get_response(request)
+        self.finish(request, response, root, token)
+        return response
+
+    def start(self, request) -> tuple:
+        return tracing.start_trace(
+            f"{request.method} {request.path}",
+            method=request.method,
+            path=request.path,
+        )
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        tracing.start_span(match.view_name or match._func_path, "view")
+
+    def finish(self, request, response, root, token) -> None:
+        match = request.resolver_match
+        root.attributes["view"] = match.view_name if match else "unmatched"
+        root.attributes["status"] = response.status_code
+        if tracing.finish_trace(root, token):
+            response.headers["X-Trace-Id"] = root.trace.trace_id
@@ -0,0 +1,149 @@
+# Core
+import sys
+import time
+import itertools
+import threading
+from collections import Counter
+from typing import TypedDict
+
+# Stacks kept per view, the rarer ones are dropped past it.
+MAX_STACKS = 5000
+
+
+class ProfileT(TypedDict):
+    """A view profile summary type."""
+
+    view: str
+    requests: int
+    samples: int
+
+
+def _name(frame) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_qualname}"
+
+
+def collapse(frame) -> str:
+    """Return a stack as `module:function` names from the root, `;` separated."""
+    names = []
+    while frame is not None:
+        names.append(_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def collapse_task(task, frame) -> str | None:
+    """
+    Return an asyncio task's stack from its coroutine: when it runs, the
+    frames of its thread from `frame`, else the coroutines it awaits. None
+    when it ran something else as `frame` was taken.
+    """
+    coroutine = task.get_coro()
+    if coroutine.cr_running:
+        names = []
+        while frame is not None:
+            names.append(_name(frame))
+            if frame is coroutine.cr_frame:
+                return ";".join(reversed(names))
+            frame = frame.f_back
+        return None
+
+    names = []
+    # Down to the future or generator it waits on.
+    while frame := getattr(coroutine, "cr_frame", None):
+        names.append(_name(frame))
+        coroutine = coroutine.cr_await
+    return ";".join(names) or None
+
+
+class Sampler:
+    """
+    Sample the stacks of registered threads, or asyncio tasks, from a
+    background thread.
+
+    The thread starts with the first registration and sleeps while nothing
+    is registered, so an idle sampler costs nothing.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._stacks: dict[int, tuple[int, object, Counter]] = {}
+        self._keys = itertools.count()
+        self._lock = threading.Lock()
+        self._active = threading.Event()
+        self._thread = None
+
+    def start(self, thread_id: int, task=None) -> int:
+        """Start sampling a thread, or a task it runs, return the key to stop."""
+        key = next(self._keys)
+        with self._lock:
+            self._stacks[key] = (thread_id, task, Counter())
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="profiling-sampler", daemon=True
+                )
+                self._thread.start()
+        self._active.set()
+        return key
+
+    def stop(self, key: int) -> Counter:
+        """Stop sampling and return the collapsed stacks."""
+        with self._lock:
+            _thread_id, _task, stacks = self._stacks.pop(key)
+            if not self._stacks:
+                self._active.clear()
+        return stacks
+
+    def _run(self):
+        while True:
+            self._active.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, task, stacks in self._stacks.values():
+                    frame = frames.get(thread_id)
+                    if task is not None:
+                        stack = collapse_task(task, frame)
+                    else:
+                        stack = frame and collapse(frame)
+                    if stack:
+                        stacks[stack] += 1
+            # Frames hold their locals alive.
+            del frames
+
+
+class Profiles:
+    """The collapsed stacks sampled per view, in this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stacks: dict[str, Counter] = {}
+        self._requests = Counter()
+
+    def add(self, view: str, stacks: Counter) -> None:
+        with self._lock:
+            self._requests[view] += 1
+            profile = self._stacks.setdefault(view, Counter())
+            profile.update(stacks)
+            if len(profile) > MAX_STACKS:
+                self._stacks[view] = Counter(dict(profile.most_common(MAX_STACKS)))
+
+    def summary(self) -> list[ProfileT]:
+        """Return the profiled views, with their requests and samples."""
+        with self._lock:
+            return [
+                {
+                    "view": view,
+                    "requests": self._requests[view],
+                    "samples": stacks.total(),
+                }
+                for view, stacks in sorted(self._stacks.items())
+            ]
+
+    def collapsed(self, view: str) -> str:
+        """Return a view's stacks in the collapsed format flamegraph tools read."""
+        with self._lock:
+            stacks = self._stacks.get(view, Counter()).most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+
+profiles = Profiles()
@@ -0,0 +1,183 @@
+# Core
+import random
+from inspect import iscoroutinefunction
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+# Libs
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import QuerySet
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# The request being handled and the replica its reads go to.
+current_request = ContextVar("current_request", default=None)
+request_replica = ContextVar("request_replica", default=None)
+# The database of the `read_replica` service running.
+_read_database = ContextVar("read_database", default=None)
+
+
+def _pin_key(user_id) -> str:
+    return f"replica-pin:{user_id}"
+
+
+def pin_to_primary(user) -> None:
+    """Send `user`'s reads to the primary for `REPLICA_PIN_SECONDS`."""
+    cache.set(_pin_key(user.pk), True, settings.REPLICA_PIN_SECONDS)
+
+
+def unpin(user) -> None:
+    """Let `user`'s reads go to the replicas again."""
+    cache.delete(_pin_key(user.pk))
+
+
+def is_pinned(user) -> bool:
+    """Return whether `user` wrote recently and must read from the primary."""
+    return bool(user and user.is_authenticated and cache.get(_pin_key(user.pk)))
+
+
+def choose_replica() -> str:
+    """Return a random replica, or the primary when there is none."""
+    return random.choice(settings.DATABASE_REPLICAS or [DEFAULT_DB_ALIAS])
+
+
+def read_database() -> str:
+    """
+    Return the database read-only services use now.
+
+    Reads stay on the primary inside transactions, during unsafe requests and
+    for users pinned after a write, so a user always sees their own writes.
+    Otherwise a request reads from a single replica, chosen when it starts,
+    so that its version checks and bodies agree.
+    """
+    if not settings.DATABASE_REPLICAS:
+        return DEFAULT_DB_ALIAS
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return DEFAULT_DB_ALIAS
+
+    request = current_request.get()
+    if request is None:
+        return choose_replica()
+    if request.method not in SAFE_METHODS:
+        return DEFAULT_DB_ALIAS
+    if _request_pinned(request):
+        return DEFAULT_DB_ALIAS
+    return request_replica.get() or choose_replica()
+
+
+async def aread_database() -> str:
+    """Return `read_database`, looking the pin up off the event loop."""
+    if not settings.DATABASE_REPLICAS:
+        return DEFAULT_DB_ALIAS
+    return await sync_to_async(read_database)()
+
+
+@contextmanager
+def fixed_read_database():
+    """
+    Keep the `read_replica` services of this context, and of its copies, on
+    the database they would read from now.
+    """
+    token = _read_database.set(_read_database.get() or read_database())
+    try:
+        yield
+    finally:
+        _read_database.reset(token)
+
+
+@asynccontextmanager
+async def afixed_read_database():
+    """
+    Return `fixed_read_database`, looking the database up off the event loop,
+    where the transactions and the replica pin are known.
+    """
+    token = _read_database.set(_read_database.get() or await aread_database())
+    try:
+        yield
+    finally:
+        _read_database.reset(token)
+
+
+def _request_pinned(request) -> bool:
+    # Set by the authentication of the view, on the API.
+    user = getattr(request, "user", None)
+    key = user.pk if user is not None else None
+    # Looked up once per request and user, the cache may be a database.
+    cached = getattr(request, "_replica_pin", None)
+    if cached is None or cached[0] != key:
+        cached = request._replica_pin = (key, is_pinned(user))
+    return cached[1]
+
+
+def read_replica(func):
+    """
+    Route a read-only service to a replica, see `read_database`.
+
+    The queries the service runs go to the replica, and so do the querysets it
+    returns, even when evaluated later by the view. Nested services read from
+    the database of the outermost one. Async services are routed alike.
+    """
+
+    if iscoroutinefunction(func):
+
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            database = _read_database.get() or await aread_database()
+            token = _read_database.set(database)
+            try:
+                # The async ORM runs queries in a thread, with this context.
+                result = await func(*args, **kwargs)
+            finally:
+                _read_database.reset(token)
+
+            if isinstance(result, QuerySet):
+                result = result.using(database)
+            return result
+
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        database = _read_database.get() or read_database()
+        token = _read_database.set(database)
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            _read_database.reset(token)
+
+        if isinstance(result, QuerySet):
+            result = result.using(database)
+        return result
+
+    return wrapper
+
+
+class ReplicaRouter:
+    """
+    Send writes to the primary and `read_replica` services to replicas.
+
+    Other reads stay on the primary. Replicas are listed in
+    `DATABASE_REPLICAS` and never migrated: they copy the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        # Pins in the database cache are read where they are written.
+        if model._meta.app_label == "django_cache":
+            return DEFAULT_DB_ALIAS
+        # Otherwise Django reads from the database of the `instance` hint, so
+        # related objects come from where their instance did.
+        return _read_database.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every database holds the same rows.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
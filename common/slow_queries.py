@@ -0,0 +1,193 @@
+# Core
+import os
+import sys
+import re
+import json
+import time
+import random
+import threading
+from pathlib import Path
+from typing import NotRequired, TypedDict
+
+# Libs
+from django.conf import settings
+
+# Global
+from common.db import fingerprint
+from common.routers import current_request
+
+# Fingerprints remembered as explained, the oldest are explained again.
+_EXPLAINED_SIZE = 1000
+
+# Statements not run again by `EXPLAIN ANALYZE`: they lock rows, or advance
+# sequences and take advisory locks in functions.
+_SIDE_EFFECTS = re.compile(
+    r"\bFOR\s+(?:NO\s+KEY\s+UPDATE|UPDATE|KEY\s+SHARE|SHARE)\b"
+    r"|\b(?:nextval|setval|pg_advisory\w*|pg_try_advisory\w*|set_config"
+    r"|pg_notify|lo_\w+|dblink\w*)\s*\(",
+    re.IGNORECASE,
+)
+
+
+class SlowQueryT(TypedDict):
+    """A slow query type."""
+
+    fingerprint: str
+    sql: str
+    duration: float
+    database: str
+    # The view of the request and the innermost service running it, if any.
+    view: str | None
+    source: str | None
+    timestamp: float
+    plan: NotRequired[str]
+
+
+def query_source(frame) -> str | None:
+    """Return the innermost service function on a stack, or app function."""
+    fallback = None
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("apps."):
+            name = f"{module}:{frame.f_code.co_qualname}"
+            if ".services." in module:
+                return name
+            fallback = fallback or name
+        frame = frame.f_back
+    return fallback
+
+
+def explain(connection, sql: str, params) -> str:
+    """
+    Return the `EXPLAIN (ANALYZE, BUFFERS)` of a statement, run again.
+
+    Statements with side effects, see `_SIDE_EFFECTS`, are only planned with
+    a plain `EXPLAIN`. Run on the driver's connection, so it is neither
+    recorded nor counted, in a savepoint when in a transaction, so a failure
+    does not break it.
+    """
+    options = "" if _SIDE_EFFECTS.search(sql) else "(ANALYZE, BUFFERS) "
+    savepoint = not connection.get_autocommit()
+    with connection.connection.cursor() as cursor:
+        if savepoint:
+            cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute(f"EXPLAIN {options}{sql}", params)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        except connection.Database.Error as error:
+            plan = f"EXPLAIN failed: {error}"
+            if savepoint:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+        if savepoint:
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+    return plan
+
+
+class SlowQueryLog:
+    """
+    Keep the latest statements slower than `SLOW_QUERY_THRESHOLD`.
+
+    Installed as an execute wrapper on every connection. A statement over the
+    threshold is kept with the request's view and the service that ran it,
+    appended as a JSON line to a file per process in `SLOW_QUERY_DIR` for the
+    `slow_queries` command. Past `SLOW_QUERY_BUFFER_SIZE` lines the file is
+    rotated, so two generations at most are kept. The first `SELECT` of each
+    fingerprint, then a `SLOW_QUERY_EXPLAIN_RATE` share, is run again with
+    `EXPLAIN (ANALYZE, BUFFERS)`, doubling its cost once more, see `explain`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._explained = {}
+        self._pid = None
+        self._written = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = time.perf_counter() - start
+        if duration >= settings.SLOW_QUERY_THRESHOLD:
+            self.capture(sql, params, many, context, duration)
+        return result
+
+    def capture(self, sql, params, many, context, duration: float) -> None:
+        """Keep a slow statement, explained if sampled."""
+        connection = context["connection"]
+        request = current_request.get()
+        match = request and request.resolver_match
+        entry: SlowQueryT = {
+            "fingerprint": fingerprint(sql),
+            "sql": sql,
+            "duration": duration,
+            "database": connection.alias,
+            "view": match.view_name if match else None,
+            "source": query_source(sys._getframe()),
+            "timestamp": time.time(),
+        }
+
+        # Server-side cursors are still reading their rows.
+        cursor_name = getattr(context["cursor"], "name", None)
+        explainable = not many and not cursor_name and sql.lstrip().startswith("SELECT")
+        if explainable and self.sample(entry["fingerprint"]):
+            entry["plan"] = explain(connection, sql, params)
+        self.write(entry)
+
+    def sample(self, key: str) -> bool:
+        """Return whether to explain a statement of fingerprint `key`."""
+        with self._lock:
+            first = key not in self._explained
+            if first:
+                if len(self._explained) >= _EXPLAINED_SIZE:
+                    del self._explained[next(iter(self._explained))]
+                self._explained[key] = None
+        return first or random.random() < settings.SLOW_QUERY_EXPLAIN_RATE
+
+    def write(self, entry: SlowQueryT) -> None:
+        line = json.dumps(entry) + "\n"
+        directory = Path(settings.SLOW_QUERY_DIR)
+        with self._lock:
+            # A forked worker starts its own file.
+            if self._pid != os.getpid():
+                self._pid, self._written = os.getpid(), 0
+            path = directory / f"{self._pid}.jsonl"
+            if self._written >= settings.SLOW_QUERY_BUFFER_SIZE:
+                try:
+                    path.replace(path.with_name(f"{path.name}.1"))
+                except FileNotFoundError:
+                    # Cleared by the `slow_queries` command.
+                    pass
+                self._written = 0
+
+            directory.mkdir(parents=True, exist_ok=True)
+            with open(path, "a") as file:
+                file.write(line)
+            self._written += 1
+
+
+slow_query_log = SlowQueryLog()
+
+
+def install_slow_query_log(sender=None, *, connection, **kwargs):
+    """Add `slow_query_log` to a connection, on `connection_created`."""
+    if slow_query_log not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, slow_query_log)
+
+
+def read_slow_queries() -> list[SlowQueryT]:
+    """Return the slow queries every process wrote to `SLOW_QUERY_DIR`."""
+    entries = []
+    for path in Path(settings.SLOW_QUERY_DIR).glob("*.jsonl"):
+        lines = []
+        for generation in (path.with_name(f"{path.name}.1"), path):
+            try:
+                lines += generation.read_text().splitlines()
+            except OSError:
+                # Removed or being rotated.
+                continue
+        for line in lines[-settings.SLOW_QUERY_BUFFER_SIZE :]:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                # Being appended.
+                continue
+    return entries
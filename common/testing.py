@@ -0,0 +1,201 @@
+# Core
+import random
+import itertools
+from collections import Counter
+from datetime import timedelta
+from contextlib import contextmanager
+from functools import wraps
+from unittest import skipUnless
+
+# Libs
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+
+# Apps
+from apps.users.models import Follow, User
+from apps.posts.models import Comment, Like, Publication
+from apps.posts.models.publication import CODE_BLOCK_SIZE, CODE_LENGTH, CODE_SEQUENCE
+
+# Global
+from common.codes import CodeAllocator
+from common.db import QueryRecorder
+
+# Tables of the social graph.
+TABLES = [
+    "users_user",
+    "users_follow",
+    "posts_publication",
+    "posts_comment",
+    "posts_like",
+]
+
+
+def assert_query_budget(max_queries: int):
+    """
+    Fail the decorated test if it runs more than `max_queries` statements,
+    listing those it repeated.
+    """
+
+    def decorator(test):
+        @wraps(test)
+        def wrapper(self, *args, **kwargs):
+            with QueryRecorder().record() as queries:
+                result = test(self, *args, **kwargs)
+            self.assertLessEqual(
+                queries.count,
+                max_queries,
+                f"{test.__name__} ran {queries.count} queries, over its budget "
+                f"of {max_queries}. Repeated: {queries.duplicates}",
+            )
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def seed_dataset(users_count: int, seed: int) -> dict:
+    """
+    Insert a social graph and return sample objects of it.
+
+    Follows have a power-law distribution: a few users are followed by most
+    of the others. Each user has a couple of publications and writes a few
+    comments and likes.
+    """
+    rng = random.Random(seed)
+    timestamp = now()
+    tag = f"{rng.getrandbits(32):08x}"
+
+    users = User.objects.bulk_create(
+        User(
+            username=f"seed{tag}user{i}",
+            email=f"seed{tag}user{i}@example.com",
+            password="!",
+            date_joined=timestamp,
+            updated_at=timestamp,
+        )
+        for i in range(users_count)
+    )
+
+    def audit(user: User, days_ago: float) -> dict:
+        moment = timestamp - timedelta(days=days_ago)
+        return {
+            "created_by": user,
+            "updated_by": user,
+            "created_at": moment,
+            "updated_at": moment,
+        }
+
+    weights = itertools.accumulate(1 / (rank + 1) for rank in range(users_count))
+    cum_weights = list(weights)
+    follows = set()
+    for follower in users:
+        for followed in rng.choices(users, cum_weights=cum_weights, k=10):
+            if followed != follower:
+                follows.add((follower, followed))
+    Follow.objects.bulk_create(
+        Follow(follower=follower, followed=followed, **audit(follower, 0))
+        for follower, followed in follows
+    )
+
+    allocator = CodeAllocator(
+        sequence=CODE_SEQUENCE,
+        length=CODE_LENGTH,
+        block_size=CODE_BLOCK_SIZE,
+        key_setting="PUBLICATION_CODE_KEY",
+    )
+    publications = Publication.objects.bulk_create(
+        Publication(
+            code=allocator.allocate(),
+            image=f"https://example.com/{tag}/{i}.png",
+            user=(user := rng.choice(users)),
+            **audit(user, rng.uniform(0, 365)),
+        )
+        for i in range(users_count * 2)
+    )
+
+    comments = Comment.objects.bulk_create(
+        Comment(
+            comment=f"Comment {i}",
+            publication=rng.choice(publications),
+            user=(user := rng.choice(users)),
+            **audit(user, rng.uniform(0, 365)),
+        )
+        for i in range(users_count * 5)
+    )
+    likes = {
+        (rng.choice(publications), rng.choice(users)) for _ in range(users_count * 5)
+    }
+    Like.objects.bulk_create(
+        Like(publication=publication, user=user, **audit(user, 0))
+        for publication, user in likes
+    )
+
+    with connection.cursor() as cursor:
+        # Sample every row, so the statistics and plans are the same each run.
+        cursor.execute("SET LOCAL default_statistics_target = 10000")
+        cursor.execute(f"ANALYZE {', '.join(TABLES)}")
+
+    hub = users[0]
+    # A typical user, with a handful of followers and publications.
+    member = users[users_count // 10]
+    commented = Counter(comment.publication for comment in comments)
+    publication = commented.most_common(1)[0][0]
+    return {
+        "hub": hub,
+        "member": member,
+        "user": users[-1],
+        "publication": publication,
+        "comment": next(c for c in comments if c.publication == publication),
+    }
+
+
+def seq_scans(sql: str) -> set[str]:
+    """Return the tables a statement's plan scans sequentially."""
+    prefix = connection.ops.explain_query_prefix(format="json")
+    with connection.cursor() as cursor:
+        cursor.execute(f"{prefix} {sql}")
+        nodes = [cursor.fetchone()[0][0]["Plan"]]
+
+    tables = set()
+    while nodes:
+        node = nodes.pop()
+        if node["Node Type"] == "Seq Scan":
+            tables.add(node["Relation Name"])
+        nodes.extend(node.get("Plans", []))
+    return tables
+
+
+@skipUnless(connection.vendor == "postgresql", "Plans are checked on PostgreSQL.")
+class QueryPlanTestCase(TestCase):
+    """
+    Seed a social graph, in `dataset`, to check the plans of the queries
+    tests run.
+    """
+
+    users_count = 200
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset(cls.users_count, seed=0)
+
+    @contextmanager
+    def assertNoSeqScan(self, allowed: frozenset = frozenset()):
+        """
+        Fail if a statement run in the context scans a table of the social
+        graph sequentially, except the `allowed` tables.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            yield
+
+        with connection.cursor() as cursor:
+            # Planned at any size, a sequential scan means no index applies.
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        scanned = set()
+        for query in queries.captured_queries:
+            if query["sql"].startswith(("SELECT", "UPDATE", "DELETE")):
+                scanned |= seq_scans(query["sql"])
+        scanned = scanned.intersection(TABLES) - allowed
+        self.assertFalse(scanned, f"Seq Scan on {', '.join(sorted(scanned))}.")
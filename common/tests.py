@@ -0,0 +1,667 @@
+# Core
+import io
+import os
+import asyncio
+import gzip
+import json
+import uuid
+import time as clock
+import tempfile
+import subprocess
+from contextlib import ExitStack
+from collections import Counter
+from types import SimpleNamespace
+from decimal import Decimal
+from datetime import date, datetime, time, timedelta, timezone
+from unittest import skipIf
+from zoneinfo import ZoneInfo
+
+# Libs
+from django.http import HttpResponse, StreamingHttpResponse
+from django.conf import settings
+from django.urls import reverse
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.core.cache.backends.db import DatabaseCache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import parsers, renderers, serializers as srz
+from rest_framework.exceptions import ParseError
+
+# Apps
+from apps.api import bench
+from apps.users.models import User
+from apps.users.services import user as user_sv
+from apps.posts.models.publication import CODE_BLOCK_SIZE, CODE_SEQUENCE
+from apps.posts.serializers.comment import CommentInfoSerializer
+from apps.posts.serializers.publication import PublicationInfoSerializer
+from apps.users.serializers.follow import FollowerInfoSerializer
+from apps.users.serializers.user import UserInfoSerializer, UserSearchInfoSerializer
+
+# Global
+from common import metrics, routers, slow_queries
+from common.checks import check_shared_cache
+from common.codes import BASE62, CodeAllocator
+from common.compiled import compile_serializer
+from common.db import is_cache_query
+from common.middleware import CompressionMiddleware, ProfilingMiddleware
+from common.middleware import ReplicaPinMiddleware
+from common.middleware import brotli, zstandard
+from common.parsers import JSONParser
+from common.profiling import MAX_STACKS, Profiles, profiles
+from common.renderers import JSONRenderer, orjson
+
+MOMENT = datetime(2026, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc)
+
+
+class _AuthorSerializer(srz.Serializer):
+    id = srz.UUIDField()
+    username = srz.CharField()
+
+
+class _PostSerializer(srz.Serializer):
+    code = srz.CharField()
+    score = srz.DecimalField(max_digits=5, decimal_places=2)
+    created_at = srz.DateTimeField()
+    user = _AuthorSerializer()
+
+
+class CompiledSerializerTests(SimpleTestCase):
+    """Check that compiled serializers represent what DRF's serializers do."""
+
+    def setUp(self):
+        users = bench.sample_users(3)
+        # Nullable columns left empty.
+        users[0].avatar = users[0].description = users[0].website = None
+        self.cases = [
+            (UserInfoSerializer, users),
+            (UserSearchInfoSerializer, users),
+            (FollowerInfoSerializer, users),
+            (PublicationInfoSerializer, bench.sample_publications(4, users)),
+            (CommentInfoSerializer, bench.sample_comments(4, users)),
+        ]
+
+    def test_many(self):
+        for serializer_class, instances in self.cases:
+            with self.subTest(serializer_class.__name__):
+                compiled = compile_serializer(serializer_class)
+                rows = bench.as_rows(instances, compiled.values_fields)
+                self.assertEqual(
+                    compiled.many(rows), serializer_class(instances, many=True).data
+                )
+
+    def test_one(self):
+        for serializer_class, instances in self.cases:
+            with self.subTest(serializer_class.__name__):
+                compiled = compile_serializer(serializer_class)
+                for instance in instances:
+                    self.assertEqual(
+                        compiled.one(instance), serializer_class(instance).data
+                    )
+
+    def test_null_relation(self):
+        publication = bench.sample_publications(1, bench.sample_users(1))[0]
+        compiled = compile_serializer(PublicationInfoSerializer)
+        row = bench.as_rows([publication], compiled.values_fields)[0]
+        row.update({key: None for key in row if key.startswith("user")})
+
+        # E.g. the row of an outer join, without a related object.
+        instance = SimpleNamespace(**vars(publication) | {"user": None})
+        self.assertEqual(
+            compiled.many([row]), [PublicationInfoSerializer(instance).data]
+        )
+        self.assertIsNone(compiled.many([row])[0]["user"])
+
+    def test_fields(self):
+        publications = bench.sample_publications(2, bench.sample_users(2))
+        fields = frozenset({"code", "user.username", "created_at"})
+        compiled = compile_serializer(PublicationInfoSerializer, fields)
+        self.assertEqual(
+            compiled.values_fields, ["code", "user", "user__username", "created_at"]
+        )
+
+        rows = bench.as_rows(publications, compiled.values_fields)
+        expected = [
+            {
+                "code": item["code"],
+                "user": {"username": item["user"]["username"]},
+                "created_at": item["created_at"],
+            }
+            for item in PublicationInfoSerializer(publications, many=True).data
+        ]
+        self.assertEqual(compiled.many(rows), expected)
+        self.assertEqual([compiled.one(item) for item in publications], expected)
+
+
+@skipIf(orjson is None, "orjson is not installed.")
+class JSONRendererTests(SimpleTestCase):
+    """Check that the orjson renderer writes what DRF's renderer does."""
+
+    def assertRendersLikeDRF(self, data):
+        expected = renderers.JSONRenderer().render(data)
+        self.assertEqual(JSONRenderer().render(data), expected)
+
+    def test_values(self):
+        values = {
+            "datetime": MOMENT,
+            "datetime_seconds": MOMENT.replace(microsecond=0),
+            "datetime_offset": MOMENT.astimezone(ZoneInfo("America/Mexico_City")),
+            "datetime_naive": MOMENT.replace(tzinfo=None),
+            "date": date(2026, 1, 2),
+            "time": time(3, 4, 5, 123456),
+            "timedelta": timedelta(seconds=3.5),
+            "uuid": uuid.UUID(int=5),
+            "decimal": Decimal("1.10"),
+            "lazy": _("Not found."),
+            "separators": "a\u2028b\u2029c",
+            "big_integer": 2**70,
+            "non_str_keys": {1: "a"},
+            "tuple": (1, 2),
+            "none": None,
+        }
+        for name, value in values.items():
+            with self.subTest(name):
+                self.assertRendersLikeDRF({"value": value})
+
+    def test_serializer_data(self):
+        post = {
+            "code": "00138e",
+            "score": Decimal("4.5"),
+            "created_at": MOMENT,
+            "user": {"id": uuid.UUID(int=3), "username": "seed"},
+        }
+        self.assertRendersLikeDRF(_PostSerializer(post).data)
+        self.assertRendersLikeDRF(_PostSerializer([post, post], many=True).data)
+        self.assertRendersLikeDRF({"errors": {"detail": [_("Not found.")]}})
+
+    def test_non_finite_floats(self):
+        data = {"values": [float("nan"), float("inf"), -float("inf")]}
+        with self.assertRaises(ValueError):
+            renderers.JSONRenderer().render(data)
+        self.assertEqual(JSONRenderer().render(data), b'{"values":[null,null,null]}')
+
+
+@skipIf(orjson is None, "orjson is not installed.")
+class JSONParserTests(SimpleTestCase):
+    """Check that the orjson parser reads what DRF's parser does."""
+
+    def parse(self, parser, content: bytes, encoding: str = "utf-8"):
+        return parser.parse(io.BytesIO(content), parser_context={"encoding": encoding})
+
+    def test_documents(self):
+        documents = [
+            b'{"comment": "Hey \\u00e9", "tags": [1, 2.5, true, null]}',
+            '{"comment": "Hey é"}'.encode(),
+            b"[]",
+        ]
+        for content in documents:
+            with self.subTest(content):
+                self.assertEqual(
+                    self.parse(JSONParser(), content),
+                    self.parse(parsers.JSONParser(), content),
+                )
+
+    def test_encoding(self):
+        content = '{"comment": "Hey é"}'.encode("latin-1")
+        self.assertEqual(
+            self.parse(JSONParser(), content, "latin-1"), {"comment": "Hey é"}
+        )
+
+    def test_invalid(self):
+        for content in [b'{"value": NaN}', b'{"value": Infinity}', b"{"]:
+            with self.subTest(content):
+                with self.assertRaises(ParseError):
+                    self.parse(parsers.JSONParser(), content)
+                with self.assertRaises(ParseError):
+                    self.parse(JSONParser(), content)
+
+
+class SlowQueryLogTests(SimpleTestCase):
+    """Check that slow queries are appended, rotated and read back."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(
+            SLOW_QUERY_DIR=directory.name,
+            SLOW_QUERY_BUFFER_SIZE=3,
+            SLOW_QUERY_EXPLAIN_RATE=0,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def entry(self, index: int) -> slow_queries.SlowQueryT:
+        return {
+            "fingerprint": f"SELECT {index}",
+            "sql": f"SELECT {index}",
+            "duration": 0.5,
+            "database": "default",
+            "view": None,
+            "source": None,
+            "timestamp": float(index),
+        }
+
+    def test_latest_entries(self):
+        log = slow_queries.SlowQueryLog()
+        for index in range(8):
+            log.write(self.entry(index))
+        entries = slow_queries.read_slow_queries()
+        self.assertEqual([entry["timestamp"] for entry in entries], [5.0, 6.0, 7.0])
+
+    def test_explained_once(self):
+        log = slow_queries.SlowQueryLog()
+        self.assertTrue(log.sample("SELECT 1"))
+        self.assertFalse(log.sample("SELECT 1"))
+
+    def test_explained_size(self):
+        log = slow_queries.SlowQueryLog()
+        for index in range(slow_queries._EXPLAINED_SIZE + 1):
+            log.sample(f"SELECT {index}")
+        self.assertEqual(len(log._explained), slow_queries._EXPLAINED_SIZE)
+        # The oldest fingerprint is forgotten, and explained again.
+        self.assertTrue(log.sample("SELECT 0"))
+
+
+@override_settings(SLOW_QUERY_THRESHOLD=0, SLOW_QUERY_EXPLAIN_RATE=0)
+class SlowQueryExplainTests(TestCase):
+    """Check that slow statements are explained without running side effects."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(SLOW_QUERY_DIR=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def run_slow(self, sql: str, params=()) -> tuple:
+        """Run a statement as a slow one, return its result and plan."""
+        with connection.execute_wrapper(slow_queries.SlowQueryLog()):
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                result = cursor.fetchone()
+        # The installed log may keep the statement too.
+        entries = slow_queries.read_slow_queries()
+        plans = [entry["plan"] for entry in entries if entry["sql"] == sql]
+        return result, plans[-1]
+
+    def test_analyzed(self):
+        _result, plan = self.run_slow("SELECT count(*) FROM users_user")
+        self.assertIn("actual time", plan)
+
+    def test_nextval(self):
+        (value,), plan = self.run_slow("SELECT nextval(%s)", [CODE_SEQUENCE])
+        self.assertNotIn("actual time", plan)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT nextval(%s)", [CODE_SEQUENCE])
+            self.assertEqual(cursor.fetchone()[0], value + CODE_BLOCK_SIZE)
+
+    def test_for_update(self):
+        user = User.objects.create(username="locked", email="locked@example.com")
+        _result, plan = self.run_slow(
+            "SELECT id FROM users_user WHERE id = %s FOR UPDATE", [user.pk]
+        )
+        self.assertIn("LockRows", plan)
+        self.assertNotIn("actual time", plan)
+
+
+@override_settings(COMPRESSION_MIN_SIZE=200)
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Check the responses compressed, and how, by `CompressionMiddleware`."""
+
+    body = b'{"comment": "Hey you"}' * 20
+
+    def compress(self, response, accept_encoding="gzip, br, zstd"):
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def json_response(self, body: bytes = body, **headers) -> HttpResponse:
+        return HttpResponse(body, content_type="application/json", headers=headers)
+
+    def decompress(self, response) -> bytes:
+        content = b"".join(response) if response.streaming else response.content
+        encoding = response["Content-Encoding"]
+        if encoding == "zstd":
+            return zstandard.ZstdDecompressor().decompressobj().decompress(content)
+        if encoding == "br":
+            return brotli.decompress(content)
+        return gzip.decompress(content)
+
+    def test_min_size(self):
+        response = self.compress(self.json_response(b"{}"))
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response.content, b"{}")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+
+    def test_negotiation(self):
+        cases = [
+            ("gzip, br, zstd", "zstd" if zstandard else "br" if brotli else "gzip"),
+            ("gzip, br", "br" if brotli else "gzip"),
+            ("gzip", "gzip"),
+            ("zstd;q=0, br;q=0, gzip", "gzip"),
+            ("*", "zstd" if zstandard else "br" if brotli else "gzip"),
+        ]
+        for accept_encoding, encoding in cases:
+            with self.subTest(accept_encoding):
+                response = self.compress(self.json_response(), accept_encoding)
+                self.assertEqual(response["Content-Encoding"], encoding)
+                self.assertEqual(self.decompress(response), self.body)
+                self.assertEqual(response["Content-Length"], str(len(response.content)))
+                self.assertEqual(response["Vary"], "Accept-Encoding")
+
+    def test_not_accepted(self):
+        for accept_encoding in ["", "identity", "gzip;q=0"]:
+            with self.subTest(accept_encoding):
+                response = self.compress(self.json_response(), accept_encoding)
+                self.assertFalse(response.has_header("Content-Encoding"))
+                self.assertEqual(response.content, self.body)
+
+    def test_etag_weakened(self):
+        response = self.compress(self.json_response(ETag='"abc"'), "gzip")
+        self.assertEqual(response["ETag"], 'W/"abc"')
+        response = self.compress(self.json_response(ETag='W/"abc"'), "gzip")
+        self.assertEqual(response["ETag"], 'W/"abc"')
+
+    def test_streaming(self):
+        chunks = [b"[", self.body, b",", self.body, b"]"]
+        response = StreamingHttpResponse(iter(chunks), content_type="application/json")
+        response = self.compress(response, "gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertFalse(response.has_header("Content-Length"))
+        self.assertEqual(self.decompress(response), b"".join(chunks))
+
+    def test_skipped(self):
+        encoded = self.json_response(gzip.compress(self.body))
+        encoded["Content-Encoding"] = "gzip"
+        media = HttpResponse(self.body, content_type="image/png")
+        for response in [encoded, media]:
+            with self.subTest(response["Content-Type"]):
+                content = response.content
+                response = self.compress(response)
+                self.assertEqual(response.content, content)
+                self.assertFalse(response.has_header("Vary"))
+        self.assertEqual(media.get("Content-Encoding"), None)
+
+
+class MiddlewareProfileTests(TestCase):
+    """Check that the API skips sessions and CSRF, and the admin keeps them."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="Admin-password-1",
+            is_staff=True,
+            is_superuser=True,
+        )
+
+    def setUp(self):
+        self.client = Client(enforce_csrf_checks=True)
+
+    def test_api(self):
+        login = reverse("api:users:auth:token_obtain_pair")
+        credentials = {"email": self.user.email, "password": "Admin-password-1"}
+        # No CSRF token needed, and no session nor CSRF cookie set.
+        response = self.client.post(login, credentials, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.cookies, {})
+
+        token = response.json()["access"]
+        response = self.client.get(
+            reverse("api:users:user:search"),
+            {"search": "admin"},
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.cookies, {})
+        self.assertFalse(hasattr(response.wsgi_request, "session"))
+
+    def test_admin(self):
+        login = reverse("admin:login")
+        credentials = {"username": self.user.email, "password": "Admin-password-1"}
+        response = self.client.post(login, credentials)
+        self.assertEqual(response.status_code, 403)
+
+        response = self.client.get(login)
+        csrf_token = response.cookies[settings.CSRF_COOKIE_NAME].value
+        response = self.client.post(
+            login, credentials | {"csrfmiddlewaretoken": csrf_token}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(settings.SESSION_COOKIE_NAME, response.cookies)
+        self.assertEqual(self.client.get(reverse("admin:index")).status_code, 200)
+
+
+@skipIf(not settings.DATABASE_REPLICAS, "No replica in [database.replicas].")
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Check that reads go to a replica, a test mirror of the primary, unless
+    the user just wrote. Transactions keep reads on the primary, hence not
+    a `TestCase`.
+    """
+
+    databases = "__all__"
+
+    def setUp(self):
+        self.user = User.objects.create(username="replica", email="replica@x.com")
+        self.addCleanup(routers.unpin, self.user)
+        self.factory = RequestFactory()
+
+        def view(request):
+            request.user = self.user
+            user_sv.get_user(self.user.username)
+            return HttpResponse(status=201 if request.method == "POST" else 200)
+
+        self.middleware = ReplicaPinMiddleware(view)
+
+    def read(self, request) -> set[str]:
+        """Return the databases a request read from, but for the cache."""
+        with ExitStack() as stack:
+            queries = {
+                alias: stack.enter_context(CaptureQueriesContext(connections[alias]))
+                for alias in connections
+            }
+            self.middleware(request)
+        return {
+            alias
+            for alias, captured in queries.items()
+            if any(not is_cache_query(query["sql"]) for query in captured)
+        }
+
+    def test_read_replica(self):
+        databases = self.read(self.factory.get("/"))
+        self.assertEqual(len(databases), 1)
+        self.assertLessEqual(databases, set(settings.DATABASE_REPLICAS))
+
+    def test_read_replica_queryset(self):
+        users = user_sv.search_user(search_term="replica")
+        self.assertIn(users.db, settings.DATABASE_REPLICAS)
+        self.assertEqual([user.pk for user in users], [self.user.pk])
+
+    def test_pinned_after_write(self):
+        self.assertEqual(self.read(self.factory.post("/")), {DEFAULT_DB_ALIAS})
+        self.assertEqual(self.read(self.factory.get("/")), {DEFAULT_DB_ALIAS})
+        self.assertTrue(routers.is_pinned(self.user))
+
+    @override_settings(REPLICA_PIN_SECONDS=1)
+    def test_pin_expires(self):
+        self.read(self.factory.post("/"))
+        self.assertEqual(self.read(self.factory.get("/")), {DEFAULT_DB_ALIAS})
+        clock.sleep(1.1)
+        self.assertFalse(routers.is_pinned(self.user))
+        self.assertLessEqual(
+            self.read(self.factory.get("/")), set(settings.DATABASE_REPLICAS)
+        )
+
+    def test_transaction(self):
+        with transaction.atomic():
+            self.assertEqual(self.read(self.factory.get("/")), {DEFAULT_DB_ALIAS})
+
+    def test_cache_reads_primary(self):
+        cache_entry = DatabaseCache("django_cache", {}).cache_model_class
+        router = routers.ReplicaRouter()
+        replica = settings.DATABASE_REPLICAS[0]
+        token = routers._read_database.set(replica)
+        try:
+            self.assertEqual(router.db_for_read(User), replica)
+            self.assertEqual(router.db_for_read(cache_entry), DEFAULT_DB_ALIAS)
+        finally:
+            routers._read_database.reset(token)
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    """Check that replicas require a cache shared by the processes."""
+
+    local = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    shared = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "django_cache",
+        }
+    }
+
+    def test_local_cache(self):
+        with override_settings(DATABASE_REPLICAS=["replica"], CACHES=self.local):
+            errors = check_shared_cache(None)
+        self.assertEqual([error.id for error in errors], ["api.E001"])
+
+    def test_shared_cache(self):
+        with override_settings(DATABASE_REPLICAS=["replica"], CACHES=self.shared):
+            self.assertEqual(check_shared_cache(None), [])
+
+    def test_no_replica(self):
+        with override_settings(DATABASE_REPLICAS=[], CACHES=self.local):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class CodeAllocatorTests(SimpleTestCase):
+    """Check that codes are a keyed permutation of the sequence values."""
+
+    def allocator(self, length=2) -> CodeAllocator:
+        return CodeAllocator(
+            sequence="unused", length=length, block_size=1, key_setting="KEY"
+        )
+
+    def test_bijection(self):
+        # 62² values on 12 bits, so some are cycle-walked back in the space.
+        allocator = self.allocator()
+        with override_settings(KEY="test"):
+            codes = [allocator.encode(value) for value in range(allocator.space)]
+            walked = [
+                value
+                for value in range(allocator.space)
+                if allocator._feistel(value) >= allocator.space
+            ]
+        self.assertTrue(walked)
+        self.assertEqual(len(set(codes)), allocator.space)
+        self.assertTrue(
+            all(len(code) == 2 and set(code) <= set(BASE62) for code in codes)
+        )
+        self.assertRaises(ValueError, allocator.encode, allocator.space)
+
+    def test_key(self):
+        codes = {}
+        for key in ["first", "second"]:
+            with override_settings(KEY=key):
+                allocator = self.allocator(length=6)
+                codes[key] = [allocator.encode(value) for value in range(100)]
+                self.assertEqual(codes[key], list(map(allocator.encode, range(100))))
+        self.assertNotEqual(codes["first"], codes["second"])
+
+    def test_key_required(self):
+        with override_settings(KEY=""):
+            self.assertRaises(ImproperlyConfigured, self.allocator().encode, 0)
+
+
+class MetricsRegistryTests(SimpleTestCase):
+    """Check that `/metrics` sums the files of the workers in `METRICS_DIR`."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings = override_settings(METRICS_DIR=self.directory)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def write(self, pid: int, start: int, requests: int, in_flight: int):
+        snapshot = {
+            metrics.REQUESTS.name: [[["view", "GET", "200"], requests]],
+            metrics.REQUESTS_IN_FLIGHT.name: [[[], in_flight]],
+        }
+        with open(os.path.join(self.directory, f"{pid}-{start}.json"), "w") as file:
+            json.dump(snapshot, file)
+
+    def test_flush(self):
+        metrics.registry.flush()
+        (name,) = os.listdir(self.directory)
+        pid, start = name.removesuffix(".json").split("-")
+        self.assertEqual(int(pid), os.getpid())
+        metrics.registry.flush()
+        self.assertEqual(os.listdir(self.directory), [name])
+
+    def test_collect(self):
+        in_flight = metrics.registry.collect()[metrics.REQUESTS_IN_FLIGHT.name]
+        own = in_flight.get((), 0)
+
+        # A running worker, a stopped one, and a stopped one whose pid it got.
+        stopped = subprocess.Popen(["true"])
+        stopped.wait()
+        self.write(os.getppid(), 2, requests=3, in_flight=2)
+        self.write(os.getppid(), 1, requests=5, in_flight=7)
+        self.write(stopped.pid, 1, requests=11, in_flight=13)
+
+        totals = metrics.registry.collect()
+        self.assertEqual(totals[metrics.REQUESTS.name][("view", "GET", "200")], 19)
+        self.assertEqual(totals[metrics.REQUESTS_IN_FLIGHT.name][()], own + 2)
+
+
+def _profiled_work(request):
+    clock.sleep(0.05)
+    return HttpResponse()
+
+
+async def _aprofiled_work(request):
+    await asyncio.sleep(0.05)
+    return HttpResponse()
+
+
+@override_settings(PROFILING_RATE=1, PROFILING_THRESHOLD=0, PROFILING_INTERVAL=0.002)
+class ProfilingMiddlewareTests(SimpleTestCase):
+    """Check that sampled stacks are kept per view, capped."""
+
+    def request(self, view_name: str):
+        request = RequestFactory().get("/")
+        request.resolver_match = SimpleNamespace(view_name=view_name)
+        return request
+
+    def assertProfiled(self, view_name: str, function: str):
+        (summary,) = [p for p in profiles.summary() if p["view"] == view_name]
+        self.assertEqual(summary["requests"], 1)
+        self.assertGreater(summary["samples"], 0)
+        self.assertIn(f"common.tests:{function}", profiles.collapsed(view_name))
+
+    def test_sync(self):
+        middleware = ProfilingMiddleware(_profiled_work)
+        middleware(self.request("profiling:sync"))
+        self.assertProfiled("profiling:sync", "_profiled_work")
+
+    def test_async(self):
+        middleware = ProfilingMiddleware(_aprofiled_work)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        asyncio.run(middleware(self.request("profiling:async")))
+        self.assertProfiled("profiling:async", "_aprofiled_work")
+
+    def test_max_stacks(self):
+        view_profiles = Profiles()
+        stacks = {f"view;stack{i}": i + 1 for i in range(MAX_STACKS + 10)}
+        view_profiles.add("view", Counter(stacks))
+        view_profiles.add("other", Counter({"other;stack": 1}))
+        lines = view_profiles.collapsed("view").splitlines()
+        self.assertEqual(len(lines), MAX_STACKS)
+        # The rarest stacks are dropped.
+        self.assertEqual(lines[-1], "view;stack10 11")
+        self.assertEqual(view_profiles.collapsed("other"), "other;stack 1\n")
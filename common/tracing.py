@@ -0,0 +1,404 @@
+# Core
+import json
+import time
+import queue
+import inspect
+import pkgutil
+import secrets
+import threading
+import importlib
+import urllib.request
+from collections import deque
+from contextvars import ContextVar
+from contextlib import contextmanager
+from functools import wraps
+from typing import TypedDict
+
+# Libs
+from django.apps import apps
+from django.conf import settings
+
+# Global
+from common.db import fingerprint
+
+# Traces kept per process for the waterfall endpoints.
+MAX_TRACES = 200
+# Columns of the waterfall bars.
+WATERFALL_WIDTH = 40
+
+# The span running in this context, only set while a request is traced.
+_current = ContextVar("current_span", default=None)
+
+
+class TraceInfoT(TypedDict):
+    """A trace summary type."""
+
+    trace_id: str
+    name: str
+    start: float
+    duration_ms: float
+    spans: int
+
+
+class Span:
+    """A timed operation of a trace, nested in its parent."""
+
+    __slots__ = (
+        "trace",
+        "span_id",
+        "parent_id",
+        "name",
+        "kind",
+        "start",
+        "end",
+        "attributes",
+        "error",
+    )
+
+    def __init__(
+        self, trace, name: str, kind: str, parent_id=None, attributes=None, start=None
+    ):
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start = start or time.time_ns()
+        self.end = None
+        self.attributes = attributes or {}
+        self.error = None
+        trace.spans.append(self)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end or time.time_ns()) - self.start) / 1e6
+
+
+class Trace:
+    """The spans of one request."""
+
+    def __init__(self, trace_id: str | None = None):
+        self.trace_id = trace_id or secrets.token_hex(16)
+        self.spans: list[Span] = []
+
+    @property
+    def root(self) -> Span:
+        return self.spans[0]
+
+    def info(self) -> TraceInfoT:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.root.name,
+            "start": self.root.start / 1e9,
+            "duration_ms": self.root.duration_ms,
+            "spans": len(self.spans),
+        }
+
+    @classmethod
+    def from_otlp(cls, document: dict) -> "Trace":
+        """Return a trace exported by `to_otlp`."""
+        (resource,) = document["resourceSpans"]
+        (scope,) = resource["scopeSpans"]
+        trace = None
+        for otlp_span in scope["spans"]:
+            trace = trace or cls(otlp_span["traceId"])
+            attributes = {
+                attribute["key"]: next(iter(attribute["value"].values()))
+                for attribute in otlp_span["attributes"]
+            }
+            current = Span(
+                trace,
+                otlp_span["name"],
+                attributes.pop("instaclone.kind"),
+                otlp_span.get("parentSpanId"),
+                attributes,
+                start=int(otlp_span["startTimeUnixNano"]),
+            )
+            current.span_id = otlp_span["spanId"]
+            current.end = int(otlp_span["endTimeUnixNano"])
+            current.error = otlp_span["status"].get("message")
+        return trace
+
+
+def current_span() -> Span | None:
+    """Return the running span, if the request is traced."""
+    return _current.get()
+
+
+def start_trace(name: str, **attributes):
+    """Start a trace with its root span, return it and the context token."""
+    root = Span(Trace(), name, "request", attributes=attributes)
+    return root, _current.set(root)
+
+
+def start_span(name: str, kind: str, **attributes) -> Span | None:
+    """Start a child of the running span, left running in this context."""
+    parent = _current.get()
+    if parent is None:
+        return None
+    child = Span(parent.trace, name, kind, parent.span_id, attributes)
+    _current.set(child)
+    return child
+
+
+def finish_trace(root: Span, token) -> bool:
+    """End a trace, keep and export it unless faster than `TRACING_THRESHOLD`."""
+    for running in root.trace.spans:
+        running.end = running.end or time.time_ns()
+    _current.reset(token)
+    if root.duration_ms < settings.TRACING_THRESHOLD * 1000:
+        return False
+
+    traces.append(root.trace)
+    if exporter is not None:
+        exporter.export(root.trace)
+    return True
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes):
+    """Time a block as a child of the running span, if the request is traced."""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+
+    child = Span(parent.trace, name, kind, parent.span_id, attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as error:
+        child.error = repr(error)
+        raise
+    finally:
+        child.end = time.time_ns()
+        _current.reset(token)
+
+
+def traced(kind: str, name: str | None = None):
+    """Run a function, sync or async, in a span if the request is traced."""
+
+    def decorator(func):
+        span_name = name or f"{func.__module__}:{func.__qualname__}"
+
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                if _current.get() is None:
+                    return await func(*args, **kwargs)
+                with span(span_name, kind):
+                    return await func(*args, **kwargs)
+
+        else:
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if _current.get() is None:
+                    return func(*args, **kwargs)
+                with span(span_name, kind):
+                    return func(*args, **kwargs)
+
+        wrapper.__traced__ = True
+        return wrapper
+
+    return decorator
+
+
+def instrument_module(module, kind: str) -> None:
+    """Trace the functions a module defines, through its attributes."""
+    for attribute, value in list(vars(module).items()):
+        if not inspect.isfunction(value) or value.__module__ != module.__name__:
+            continue
+        if not getattr(value, "__traced__", False):
+            setattr(module, attribute, traced(kind)(value))
+
+
+def instrument_services() -> None:
+    """
+    Trace the functions of every `apps.*.services` module.
+
+    Callers that imported a function by name before this ran keep calling it
+    untraced: the API views import service modules, never their functions.
+    Services calling one another by name run in their caller's span.
+    """
+    for app_config in apps.get_app_configs():
+        if not app_config.name.startswith("apps."):
+            continue
+        name = f"{app_config.name}.services"
+        try:
+            package = importlib.import_module(name)
+        except ModuleNotFoundError as error:
+            if error.name != name:
+                raise
+            continue
+        for module_info in pkgutil.iter_modules(package.__path__):
+            module = importlib.import_module(f"{package.__name__}.{module_info.name}")
+            instrument_module(module, "service")
+
+
+def trace_query(execute, sql, params, many, context):
+    """Run a statement in a span, if the request is traced."""
+    if _current.get() is None:
+        return execute(sql, params, many, context)
+
+    statement = fingerprint(sql)
+    with span(
+        statement[:60],
+        "db",
+        statement=statement,
+        database=context["connection"].alias,
+    ):
+        return execute(sql, params, many, context)
+
+
+def install_trace_query(sender=None, *, connection, **kwargs):
+    """Add `trace_query` to a connection, on `connection_created`."""
+    if trace_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, trace_query)
+
+
+def waterfall(trace: Trace) -> str:
+    """Return a trace as text, each span indented under its parent with a bar."""
+    root = trace.root
+    total = max(root.duration_ms, 0.001)
+    depths = {root.span_id: 0}
+    lines = [f"Trace {trace.trace_id}, {root.duration_ms:.1f} ms"]
+    for current in trace.spans:
+        depth = depths[current.span_id] = depths.get(current.parent_id, -1) + 1
+        offset_ms = (current.start - root.start) / 1e6
+        begin = int(offset_ms / total * WATERFALL_WIDTH)
+        width = max(1, round(current.duration_ms / total * WATERFALL_WIDTH))
+        bar = " " * begin + "█" * min(width, WATERFALL_WIDTH - begin)
+        label = f"{'  ' * depth}{current.kind} {current.name}"
+        if current.error:
+            label += f" ! {current.error}"
+        lines.append(
+            f"{bar:<{WATERFALL_WIDTH}} {offset_ms:>8.1f} {current.duration_ms:>8.1f} ms  "
+            f"{label}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def _value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(trace: Trace) -> dict:
+    """Return a trace in the OTLP/JSON format of OpenTelemetry collectors."""
+    spans = []
+    for current in trace.spans:
+        attributes = {"instaclone.kind": current.kind, **current.attributes}
+        otlp_span = {
+            "traceId": trace.trace_id,
+            "spanId": current.span_id,
+            "name": current.name,
+            # Server for the request, internal for the others.
+            "kind": 2 if current.kind == "request" else 1,
+            "startTimeUnixNano": str(current.start),
+            "endTimeUnixNano": str(current.end),
+            "attributes": [
+                {"key": key, "value": _value(value)}
+                for key, value in attributes.items()
+            ],
+            "status": {"code": 2, "message": current.error} if current.error else {},
+        }
+        if current.parent_id:
+            otlp_span["parentSpanId"] = current.parent_id
+        spans.append(otlp_span)
+
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {"key": "service.name", "value": _value("instaclone")}
+                    ]
+                },
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+            }
+        ]
+    }
+
+
+class FileExporter:
+    """Append traces to a file, one OTLP/JSON document per line."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, trace: Trace) -> None:
+        line = json.dumps(to_otlp(trace)) + "\n"
+        with self._lock, open(self.path, "a") as file:
+            file.write(line)
+
+
+class OTLPExporter:
+    """
+    Post traces to an OTLP/HTTP collector, from a background thread.
+
+    Traces are dropped, rather than slowing requests, when the collector
+    falls behind or is down.
+    """
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self._queue = queue.Queue(maxsize=1000)
+        threading.Thread(target=self._run, name="trace-exporter", daemon=True).start()
+
+    def export(self, trace: Trace) -> None:
+        try:
+            self._queue.put_nowait(to_otlp(trace))
+        except queue.Full:
+            pass
+
+    def _run(self):
+        while True:
+            request = urllib.request.Request(
+                self.endpoint,
+                data=json.dumps(self._queue.get()).encode(),
+                headers={"Content-Type": "application/json"},
+            )
+            try:
+                urllib.request.urlopen(request, timeout=5).close()
+            except OSError:
+                continue
+
+
+def get_exporter():
+    """Return the exporter `TRACING_EXPORTER` names, if any."""
+    if settings.TRACING_EXPORTER == "file":
+        return FileExporter(settings.TRACING_FILE)
+    if settings.TRACING_EXPORTER == "otlp":
+        return OTLPExporter(settings.TRACING_ENDPOINT)
+    return None
+
+
+# Set up by `apps.api` when tracing is on.
+exporter = None
+# The latest traces of this process.
+traces = deque(maxlen=MAX_TRACES)
+
+
+def find_trace(trace_id: str) -> Trace | None:
+    """Return a recent trace of this process."""
+    return next((trace for trace in traces if trace.trace_id == trace_id), None)
+
+
+def read_traces(path: str) -> list[Trace]:
+    """Return the traces a `FileExporter` wrote, skipping partial lines."""
+    found = []
+    with open(path) as file:
+        for line in file:
+            try:
+                found.append(Trace.from_otlp(json.loads(line)))
+            except (ValueError, KeyError):
+                continue
+    return found
@@ -1,6 +1,7 @@
 import os
+import copy
+import tempfile
 import tomllib
-import cloudinary
 from pathlib import Path
 from datetime import timedelta
 
@@ -28,6 +29,12 @@ ALLOWED_HOSTS = env["core"]["allowed_hosts"]
 # SECURITY
 SECRET_KEY = env["core"]["secret_key"]
 
+# Key of the permutation that turns sequence values into publication codes,
+# see `common.codes.CodeAllocator`. Unlike `SECRET_KEY`, it is not a secret to
+# rotate: never change it once codes are issued, or new codes collide with
+# existing ones. Codes issued before it existed were keyed by `secret_key`.
+PUBLICATION_CODE_KEY = env["core"]["publication_code_key"]
+
 # MODELS
 
 INSTALLED_APPS = [
@@ -50,16 +57,32 @@ INSTALLED_APPS = [
 # HTTP
 
 MIDDLEWARE = [
+    "common.middleware.MetricsMiddleware",
+    "common.middleware.ProfilingMiddleware",
+    "common.middleware.TracingMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
+    "common.middleware.CompressionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
-    "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
-    "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "common.middleware.ReplicaPinMiddleware",
+    "common.middleware.QueryBudgetMiddleware",
+    "common.middleware.PrefixProfileMiddleware",
 ]
 
+# Middleware run after `MIDDLEWARE`, chosen by the longest matching URL prefix.
+MIDDLEWARE_PROFILES = {
+    # The API authenticates with JWT only: no sessions, CSRF nor messages.
+    "/api/": [],
+    "/metrics": [],
+    "": [
+        "django.contrib.sessions.middleware.SessionMiddleware",
+        "django.middleware.csrf.CsrfViewMiddleware",
+        "django.contrib.auth.middleware.AuthenticationMiddleware",
+        "django.contrib.messages.middleware.MessageMiddleware",
+    ],
+}
+
 INTERNAL_IPS = ["localhost", "127.0.0.1"]
 
 WSGI_APPLICATION = "config.wsgi.application"
@@ -95,8 +118,72 @@ DATABASES = {
         "HOST": env["database"]["PGHOST"],
         "PORT": env["database"]["PGPORT"],
         "OPTIONS": {
-            "sslmode": "require",
+            "sslmode": env["database"].get("PGSSLMODE", "require"),
         },
+        # Reused connections are checked before use.
+        "CONN_HEALTH_CHECKS": True,
+    }
+}
+
+_db_pool = env["database"].get("pool", {})
+if _db_pool.get("enabled", False):
+    # Requires `psycopg[pool]`: connections are shared by the threads of a
+    # process and recycled when too old.
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": _db_pool.get("min_size", 2),
+        "max_size": _db_pool.get("max_size", 10),
+        "max_lifetime": _db_pool.get("max_lifetime", 1800),
+        "max_idle": _db_pool.get("max_idle", 300),
+        "timeout": _db_pool.get("timeout", 10),
+    }
+else:
+    # Without a pool, keep each thread's connection open between requests.
+    DATABASES["default"]["CONN_MAX_AGE"] = env["database"].get("CONN_MAX_AGE", 60)
+
+# Read replicas of `default`: each `[database.replicas.<alias>]` key overrides
+# the `[database]` one. Reads are routed by `common.routers`.
+_db_replicas = env["database"].get("replicas", {})
+DATABASE_REPLICAS = list(_db_replicas)
+for _alias, _replica in _db_replicas.items():
+    DATABASES[_alias] = copy.deepcopy(DATABASES["default"])
+    DATABASES[_alias]["TEST"] = {"MIRROR": "default"}
+    for _key, _setting in (
+        ("NAME", "PGDATABASE"),
+        ("USER", "PGUSER"),
+        ("PASSWORD", "PGPASSWORD"),
+        ("HOST", "PGHOST"),
+        ("PORT", "PGPORT"),
+    ):
+        if _setting in _replica:
+            DATABASES[_alias][_key] = _replica[_setting]
+    if "PGSSLMODE" in _replica:
+        DATABASES[_alias]["OPTIONS"]["sslmode"] = _replica["PGSSLMODE"]
+
+DATABASE_ROUTERS = ["common.routers.ReplicaRouter"]
+
+# Seconds a user reads from `default` after a write, longer than replicas lag.
+REPLICA_PIN_SECONDS = env["database"].get("REPLICA_PIN_SECONDS", 5)
+
+# Threads per process running independent queries of a request at once, each
+# holding a connection, see `common.concurrency`.
+QUERY_THREADS = env["database"].get("QUERY_THREADS", 4)
+
+# CACHES
+
+# Replica pins are cached, so with replicas the cache must be shared by every
+# process of a deployment, which `common.checks` enforces.
+_cache = env.get("cache", {})
+CACHE_BACKENDS = {
+    "memory": "django.core.cache.backends.locmem.LocMemCache",
+    # A table on the primary, created by `manage.py createcachetable`.
+    "database": "django.core.cache.backends.db.DatabaseCache",
+    # Requires `redis`.
+    "redis": "django.core.cache.backends.redis.RedisCache",
+}
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[_cache.get("backend", "memory")],
+        "LOCATION": _cache.get("location", "") or "django_cache",
     }
 }
 
@@ -139,14 +226,19 @@ LOGGING = {
         "rich": {"datefmt": "[%X]"},
     },
     "handlers": {
-        "console": {
-            "class": "rich.logging.RichHandler",
-            "filters": ["require_debug_true"],
-            "formatter": "rich",
-            "level": "DEBUG",
-            "rich_tracebacks": True,
-            "tracebacks_show_locals": True,
-        },
+        # Outside debug mode, `rich` would only be imported to drop everything.
+        "console": (
+            {
+                "class": "rich.logging.RichHandler",
+                "filters": ["require_debug_true"],
+                "formatter": "rich",
+                "level": "DEBUG",
+                "rich_tracebacks": True,
+                "tracebacks_show_locals": True,
+            }
+            if DEBUG
+            else {"class": "logging.NullHandler"}
+        ),
     },
     "loggers": {
         "django": {
@@ -188,6 +280,9 @@ CARS_ALLOW_CREDENTIALS = True
 
 # OTHERS
 
+# The admin middleware is in the default `MIDDLEWARE_PROFILES` entry.
+SILENCED_SYSTEM_CHECKS = ["admin.E408", "admin.E409", "admin.E410"]
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 STATIC_URL = "static/"
 
@@ -202,6 +297,15 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "common.renderers.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "common.parsers.JSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "EXCEPTION_HANDLER": "common.api.api_exception_http",
     "DATETIME_INPUT_FORMATS": ["%Y-%m-%dT%I:%M:%S %p", "iso-8601"],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
@@ -216,13 +320,13 @@ SIMPLE_JWT = {
 }
 
 
-# Cloudinary
-cloudinary.config(
-    cloud_name=env["cloudinary"]["CLOUDINARY_NAME"],
-    api_key=env["cloudinary"]["CLOUDINARY_API"],
-    api_secret=env["cloudinary"]["CLOUDINARY_SECRET"],
-    secure=True,
-)
+# Cloudinary, imported and configured on the first upload.
+CLOUDINARY = {
+    "cloud_name": env["cloudinary"]["CLOUDINARY_NAME"],
+    "api_key": env["cloudinary"]["CLOUDINARY_API"],
+    "api_secret": env["cloudinary"]["CLOUDINARY_SECRET"],
+    "secure": True,
+}
 
 # DJANGO SPECTACULAR
 
@@ -263,6 +367,7 @@ SPECTACULAR_SETTINGS = {
         {"name": "📸 Publications", "description": "Publications actions endpoints."},
         {"name": "💬 Comments", "description": "Comments actions endpoints."},
         {"name": "🩷 Likes", "description": "Likes actions endpoints."},
+        {"name": "🩺 Diagnostics", "description": "Staff diagnostics endpoints."},
     ],
 }
 
@@ -271,3 +376,60 @@ SPECTACULAR_SETTINGS = {
 # ----------------------------------------------------------------------
 
 API_URL = "/api/"
+# Where `build_api_schema` writes the OpenAPI schema served outside debug mode.
+API_SCHEMA_DIR = os.path.join(BASE_DIR, "schema")
+
+# Responses smaller than this (in bytes) are not worth compressing.
+COMPRESSION_MIN_SIZE = 1024
+
+# METRICS
+
+# Directory where worker processes share their metrics, set by the server
+# launcher and emptied before workers start. Unset, `/metrics` only shows
+# the serving process.
+METRICS_DIR = os.environ.get("METRICS_DIR", "")
+# Seconds between writes of a worker's metrics to `METRICS_DIR`.
+METRICS_FLUSH_INTERVAL = 1
+# Bearer token scrapers send to `/metrics`, staff users can send their JWT.
+METRICS_TOKEN = env.get("metrics", {}).get("token", "")
+# Whether `/metrics` is served to anyone, e.g. on a private network.
+METRICS_PUBLIC = env.get("metrics", {}).get("public", False)
+
+# PROFILING
+
+_profiling = env.get("profiling", {})
+# Share of requests profiled, from 0 to 1.
+PROFILING_RATE = _profiling.get("rate", 0.0)
+# Seconds past which a request's profile is kept, 0 for none. Every request
+# is sampled while set.
+PROFILING_THRESHOLD = _profiling.get("threshold_ms", 0) / 1000
+# Seconds between stack samples.
+PROFILING_INTERVAL = _profiling.get("interval_ms", 5) / 1000
+
+# SLOW QUERIES
+
+_slow_queries = env.get("slow_queries", {})
+# Seconds past which a statement is kept, 0 to keep none.
+SLOW_QUERY_THRESHOLD = _slow_queries.get("threshold_ms", 200) / 1000
+# Share of slow `SELECT`s run again with `EXPLAIN ANALYZE`, past the first.
+SLOW_QUERY_EXPLAIN_RATE = _slow_queries.get("explain_rate", 0.01)
+# Slow statements kept per process, in `SLOW_QUERY_DIR`.
+SLOW_QUERY_BUFFER_SIZE = _slow_queries.get("buffer_size", 200)
+SLOW_QUERY_DIR = _slow_queries.get("dir") or os.path.join(
+    tempfile.gettempdir(), "instaclone-slow-queries"
+)
+
+# TRACING
+
+_tracing = env.get("tracing", {})
+# Share of requests traced, from 0 to 1.
+TRACING_RATE = _tracing.get("rate", 0.0)
+# Seconds under which a trace is dropped, to keep the slow ones only.
+TRACING_THRESHOLD = _tracing.get("threshold_ms", 0) / 1000
+# Where traces are sent: "file", "otlp" (an OTLP/HTTP collector) or "" for
+# none, they are kept in memory for the waterfall endpoints anyway.
+TRACING_EXPORTER = _tracing.get("exporter", "")
+TRACING_FILE = _tracing.get("file") or os.path.join(
+    tempfile.gettempdir(), "instaclone-traces.jsonl"
+)
+TRACING_ENDPOINT = _tracing.get("endpoint", "http://localhost:4318/v1/traces")